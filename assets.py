@@ -0,0 +1,182 @@
+"""Precompressed, fingerprinted static assets for GeoBluff.
+
+Templates render to pages once at startup. The service worker template is
+rendered last, with a shell version hashed from every other asset, so a
+deploy that changes any cached file also changes the worker and its cache.
+"""
+import gzip
+import hashlib
+import mimetypes
+from pathlib import Path
+
+from fastapi import Response
+from jinja2 import Environment, FileSystemLoader
+
+try:
+    import brotli
+except ImportError:  # Brotli is optional, gzip is always available
+    brotli = None
+
+BASE_DIR = Path(__file__).parent
+STATIC_DIR = BASE_DIR / "static"
+TEMPLATES_DIR = BASE_DIR / "templates"
+WORKER_TEMPLATES = ("sw.js",)  # Rendered after everything they cache
+
+mimetypes.add_type("application/manifest+json", ".webmanifest")
+
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE = "no-cache"
+COMPRESSIBLE_TYPES = ("text/", "application/javascript", "application/json", "image/svg+xml")
+MIN_COMPRESS_SIZE = 256
+ETAG_SUFFIXES = {"gzip": "-gz", "br": "-br"}  # Each encoded body is its own representation
+
+static_assets = {}  # Dict of file name -> asset
+fingerprinted = {}  # Dict of fingerprinted name -> file name
+pages = {}  # Dict of template name -> asset
+rules = {}  # Dict of language -> asset
+
+
+def build_asset(content, media_type):
+    """Hash and precompress a response body once, with one ETag per encoding."""
+    digest = hashlib.sha256(content).hexdigest()
+    asset = {
+        "body": content,
+        "media_type": media_type,
+        "etag": f'"{digest[:20]}"',
+        "hash": digest[:10],
+        "encodings": {},  # Dict of encoding -> body
+        "etags": {}  # Dict of encoding -> ETag of that body
+    }
+    if len(content) < MIN_COMPRESS_SIZE or not media_type.startswith(COMPRESSIBLE_TYPES):
+        return asset
+
+    compressed = {"gzip": gzip.compress(content, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        compressed["br"] = brotli.compress(content, quality=11)
+    for encoding, body in compressed.items():
+        if len(body) < len(content):
+            asset["encodings"][encoding] = body
+            asset["etags"][encoding] = f'"{digest[:20]}{ETAG_SUFFIXES[encoding]}"'
+    return asset
+
+
+def fingerprint(name, digest):
+    """Insert the content hash before the extension: app.js -> app.<hash>.js."""
+    path = Path(name)
+    return str(path.with_name(f"{path.stem}.{digest}{path.suffix}"))
+
+
+def asset_url(name):
+    """Public URL of a static file, fingerprinted when it is known."""
+    asset = static_assets.get(name)
+    if asset is None:
+        return f"/static/{name}"
+    return f"/static/{fingerprint(name, asset['hash'])}"
+
+
+def media_type_of(name, default="application/octet-stream"):
+    media_type = mimetypes.guess_type(name)[0] or default
+    if media_type.startswith("text/"):
+        media_type += "; charset=utf-8"
+    return media_type
+
+
+def add_static(name, content):
+    """Serve generated content like a static file (fingerprinted and precompressed)."""
+    asset = build_asset(content, media_type_of(name))
+    static_assets[name] = asset
+    fingerprinted[fingerprint(name, asset["hash"])] = name
+
+
+def load_static(generated=None):
+    static_assets.clear()
+    fingerprinted.clear()
+    for path in sorted(STATIC_DIR.rglob("*")):
+        if not path.is_file():
+            continue
+        add_static(path.relative_to(STATIC_DIR).as_posix(), path.read_bytes())
+    for name, content in (generated or {}).items():
+        add_static(name, content)
+
+
+def shell_version():
+    """Hash of every static file, page and rules text, used as the offline cache key."""
+    digest = hashlib.sha256()
+    for group in (static_assets, pages, rules):
+        for name in sorted(group):
+            digest.update(f"{name}={group[name]['hash']};".encode())
+    return digest.hexdigest()[:12]
+
+
+def load_pages():
+    pages.clear()
+    env = Environment(loader=FileSystemLoader(str(TEMPLATES_DIR)), autoescape=True)
+    env.globals["asset_url"] = asset_url
+    names = env.list_templates()
+    for name in [n for n in names if n not in WORKER_TEMPLATES] + list(WORKER_TEMPLATES):
+        if name not in names:
+            continue
+        if name in WORKER_TEMPLATES:
+            env.globals["shell_version"] = shell_version()
+        content = env.get_template(name).render()
+        pages[name] = build_asset(content.encode("utf-8"), media_type_of(name, "text/html"))
+
+
+def load_rules(rules_files):
+    rules.clear()
+    for language, path in rules_files.items():
+        if path.exists():
+            content = path.read_bytes()
+            rules[language] = build_asset(content, "text/plain; charset=utf-8")
+
+
+def build(rules_files, generated=None):
+    """Build every served asset in memory, static files first so pages can link them.
+
+    `generated` maps extra static names to their content (data bundles).
+    """
+    load_static(generated)
+    load_rules(rules_files)
+    load_pages()
+
+
+def etag_matches(if_none_match, etag):
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def pick_encoding(accept_encoding, asset):
+    accepted = {
+        token.split(";")[0].strip().lower()
+        for token in (accept_encoding or "").split(",")
+        if not token.strip().endswith(";q=0")
+    }
+    for encoding in ("br", "gzip"):
+        if encoding in accepted and encoding in asset["encodings"]:
+            return encoding
+    return None
+
+
+def asset_response(request, asset, cache_control, vary=("Accept-Encoding",)):
+    """Serve a prebuilt asset, answering 304 when the client copy is current.
+
+    The encoding is picked first: the client's copy is current only if it
+    holds the same encoded body.
+    """
+    encoding = pick_encoding(request.headers.get("accept-encoding"), asset)
+    etag = asset["etags"][encoding] if encoding else asset["etag"]
+    headers = {
+        "ETag": etag,
+        "Cache-Control": cache_control,
+        "Vary": ", ".join(vary)
+    }
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    body = asset["body"]
+    if encoding:
+        body = asset["encodings"][encoding]
+        headers["Content-Encoding"] = encoding
+    return Response(body, media_type=asset["media_type"], headers=headers)
@@ -0,0 +1,86 @@
+"""Batched background writers for GeoBluff.
+
+A writer is a bounded queue fed by non-blocking puts from the request path,
+and a thread that drains it in batches: it waits up to `flush_seconds` for a
+first item, then takes whatever else is ready, up to `batch_size`. When the
+queue is full the item is refused instead of waiting. Stopping queues a
+marker behind the pending items, so they are all handled before the thread
+ends.
+"""
+import queue
+import threading
+
+STOP = object()
+
+
+def create(name, handle, queue_size, batch_size, flush_seconds, setup=None, teardown=None):
+    """A writer calling `handle(batch, context)` from its thread.
+
+    `context` is what `setup()` returns, called in the thread before the
+    first batch (a SQLite connection must stay on its thread); `teardown`
+    gets it back once the last batch is handled.
+    """
+    return {
+        "name": name,
+        "queue": queue.Queue(maxsize=queue_size),
+        "handle": handle,
+        "batch_size": batch_size,
+        "flush_seconds": flush_seconds,
+        "setup": setup,
+        "teardown": teardown,
+        "thread": None
+    }
+
+
+def put(writer, item):
+    """Queue an item without blocking; False if the queue is full."""
+    try:
+        writer["queue"].put_nowait(item)
+    except queue.Full:
+        return False
+    return True
+
+
+def next_batch(writer):
+    """Wait up to flush_seconds for a first item, then take what is ready."""
+    items = writer["queue"]
+    try:
+        batch = [items.get(timeout=writer["flush_seconds"])]
+    except queue.Empty:
+        return []
+    while len(batch) < writer["batch_size"]:
+        try:
+            batch.append(items.get_nowait())
+        except queue.Empty:
+            break
+    return batch
+
+
+def run(writer):
+    context = writer["setup"]() if writer["setup"] else None
+    stopping = False
+    while not stopping:
+        batch = next_batch(writer)
+        if batch and batch[-1] is STOP:
+            batch.pop()
+            stopping = True
+        if batch:
+            writer["handle"](batch, context)
+    if writer["teardown"]:
+        writer["teardown"](context)
+
+
+def start(writer):
+    if writer["thread"] is None:
+        writer["thread"] = threading.Thread(target=run, args=(writer,), name=writer["name"], daemon=True)
+        writer["thread"].start()
+
+
+def stop(writer):
+    """Handle the queued items, then stop the thread."""
+    thread = writer["thread"]
+    if thread is None:
+        return
+    writer["queue"].put(STOP)
+    thread.join(timeout=writer["flush_seconds"] * 2)
+    writer["thread"] = None
@@ -0,0 +1,117 @@
+"""Capital autocomplete for GeoBluff.
+
+Every capital spelling (French, English and variants) is normalized and kept
+in a sorted array, indexed from each word start, so completions are a binary
+search away. A bounded edit distance catches typos when prefixes run short.
+Other decks get the same index over their secret field, built on first use.
+"""
+import threading
+from bisect import bisect_left
+
+import decks
+import game
+from game import normalize_text
+
+MAX_SUGGESTIONS = 8
+MAX_FUZZY_DISTANCE = 2
+MIN_FUZZY_LENGTH = 3
+MAX_FUZZY_SCAN = 5000  # Above this many names, typos are only looked for under the same first letter
+
+indexes = {}  # Dict of deck_id -> index (sorted keys, displays, full lengths, whole names)
+lock = threading.Lock()
+
+
+def build(countries, secret="capital", deck_id=decks.DEFAULT_DECK):
+    """Build a deck's index once from its card table."""
+    entries = set()
+    for country in countries:
+        for spelling in game.secret_spellings(country, secret):
+            norm = normalize_text(spelling)
+            # Index from each word start so "city" completes "Mexico City"
+            starts = [0] + [i + 1 for i, char in enumerate(norm) if char in " -'"]
+            for start in starts:
+                if start < len(norm):
+                    entries.add((norm[start:], spelling, len(norm)))
+    entries = sorted(entries)
+    whole_names = [(key, display) for key, display, length in entries if len(key) == length]
+    index = {
+        "keys": [key for key, _, _ in entries],  # Sorted normalized keys
+        "displays": [display for _, display, _ in entries],  # Display spelling for each key
+        "full_lengths": [length for _, _, length in entries],  # Length of the whole spelling
+        "whole_names": whole_names,  # (normalized, display) of whole spellings, for typos
+        "whole_keys": [key for key, _ in whole_names]
+    }
+    indexes[deck_id] = index
+    return index
+
+
+def get_index(deck_id=None):
+    deck_id = decks.normalize_deck(deck_id)
+    index = indexes.get(deck_id)
+    if index is None:
+        with lock:
+            index = indexes.get(deck_id)
+            if index is None:
+                deck = game.get_deck(deck_id)
+                index = build(deck["cards"], deck["secret"], deck_id)
+    return index
+
+
+def bounded_distance(s1, s2, limit):
+    """Banded Levenshtein distance, giving up (limit + 1) once it exceeds limit."""
+    if abs(len(s1) - len(s2)) > limit:
+        return limit + 1
+    over = limit + 1
+    previous_row = [j if j <= limit else over for j in range(len(s2) + 1)]
+    for i, c1 in enumerate(s1, 1):
+        lo = max(1, i - limit)
+        hi = min(len(s2), i + limit)
+        current_row = [over] * (len(s2) + 1)
+        if i <= limit:
+            current_row[0] = i
+        for j in range(lo, hi + 1):
+            current_row[j] = min(
+                previous_row[j] + 1,
+                current_row[j - 1] + 1,
+                previous_row[j - 1] + (c1 != s2[j - 1])
+            )
+        if min(current_row[lo - 1:hi + 1]) > limit:
+            return over
+        previous_row = current_row
+    return min(previous_row[-1], over)
+
+
+def suggest(query, limit=MAX_SUGGESTIONS, deck_id=None):
+    """Ranked capital completions: exact, then prefix, then close typos."""
+    norm = normalize_text(query or "")
+    if not norm:
+        return []
+    limit = max(1, min(limit, MAX_SUGGESTIONS))
+    index = get_index(deck_id)
+    keys, displays, full_lengths = index["keys"], index["displays"], index["full_lengths"]
+
+    ranked = {}
+    lo = bisect_left(keys, norm)
+    hi = bisect_left(keys, norm + "\uffff")
+    for i in range(lo, hi):
+        # Whole-name matches before word matches, shorter names first
+        rank = (0 if keys[i] == norm else 1, full_lengths[i] - len(keys[i]) > 0, full_lengths[i])
+        if displays[i] not in ranked or rank < ranked[displays[i]]:
+            ranked[displays[i]] = rank
+
+    if not ranked and len(norm) >= MIN_FUZZY_LENGTH:
+        # No completion at all: fall back to close typos of whole names
+        max_distance = 1 if len(norm) < 6 else MAX_FUZZY_DISTANCE
+        whole_names = index["whole_names"]
+        if len(whole_names) > MAX_FUZZY_SCAN:
+            # Large decks: only the names sharing the first letter are compared
+            whole_keys = index["whole_keys"]
+            whole_names = whole_names[
+                bisect_left(whole_keys, norm[0]):bisect_left(whole_keys, norm[0] + "\uffff")
+            ]
+        for key, display in whole_names:
+            distance = bounded_distance(norm, key[:len(norm)], max_distance)
+            if distance <= max_distance and display not in ranked:
+                ranked[display] = (2 + distance, False, len(key))
+
+    return [display for display, _ in sorted(ranked.items(), key=lambda item: (item[1], item[0]))][:limit]
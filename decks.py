@@ -0,0 +1,134 @@
+"""Card decks for GeoBluff.
+
+A deck is a table of cards: dicts with a unique "name", an optional "flag",
+the deck's secret field (what the last card's team must name, the capital
+for countries) and one numeric value per category. The "countries" deck is
+the country table loaded by game.py. Other decks (world cities, regions,
+classroom decks) are declared in decks_config.json and only read from disk
+the first time a game is dealt from them, JSON or packed (see packed.py).
+"""
+import json
+import threading
+from pathlib import Path
+
+import packed
+
+DECKS_CONFIG_FILE = Path(__file__).parent / "decks_config.json"
+DEFAULT_DECK = "countries"
+
+declarations = {}  # Dict of deck_id -> declaration (label, file, categories, labels, secret)
+loaded = {}  # Dict of deck_id -> deck, filled on first use
+lock = threading.Lock()  # Games are dealt from engine worker threads
+
+
+def register(deck_id, file=None, label=None, categories=None, labels=None, secret="capital",
+             cards=None):
+    """Declare a deck read from `file` on first use, or already loaded as `cards`."""
+    declarations[deck_id] = {
+        "id": deck_id,
+        "label": label or deck_id,
+        "file": file,
+        "categories": list(categories or []),
+        "labels": labels or {},  # Dict of language -> category id -> label
+        "secret": secret
+    }
+    if cards is not None:
+        loaded[deck_id] = build(declarations[deck_id], cards)
+
+
+def load_config(path=DECKS_CONFIG_FILE):
+    """Register the decks listed in the config file (cards are not read yet).
+
+    {"decks": [{"id": "cities", "label": "World cities", "file": "decks/cities.json",
+                "secret": "country",
+                "categories": [{"id": "population", "label": "Population", "label_en": "Population"}]}]}
+    """
+    if not path.exists():
+        return
+    with open(path, encoding="utf-8") as f:
+        config = json.load(f)
+    for entry in config.get("decks") or []:
+        deck_id = entry.get("id")
+        if not deck_id or deck_id == DEFAULT_DECK or not entry.get("file"):
+            continue
+        categories = [c for c in entry.get("categories") or [] if c.get("id")]
+        register(
+            deck_id,
+            file=path.parent / entry["file"],
+            label=entry.get("label"),
+            categories=[c["id"] for c in categories],
+            labels={
+                "fr": {c["id"]: c.get("label", c["id"]) for c in categories},
+                "en": {c["id"]: c.get("label_en") or c.get("label", c["id"]) for c in categories}
+            },
+            secret=entry.get("secret") or "capital"
+        )
+
+
+def build(declaration, cards):
+    """A loaded deck: its declaration, its cards and their positions by name."""
+    return {**declaration, "cards": cards, "index": {card["name"]: i for i, card in enumerate(cards)}}
+
+
+def is_playable(card, declaration):
+    if not card.get("name") or not card.get(declaration["secret"]):
+        return False
+    return all(isinstance(card.get(c), (int, float)) for c in declaration["categories"])
+
+
+def load(declaration):
+    """Read a deck file, keeping the cards with a secret and every category value.
+
+    A ".bin" file is a table packed with packed.write, mapped instead of parsed.
+    """
+    if Path(declaration["file"]).suffix == ".bin":
+        table = packed.load(declaration["file"])
+        if table is None:
+            raise ValueError(f"Unreadable deck file {declaration['file']}")
+        data = table.rows()
+    else:
+        with open(declaration["file"], encoding="utf-8") as f:
+            data = json.load(f)
+    cards = []
+    names = set()
+    for card in data:
+        if is_playable(card, declaration) and card["name"] not in names:
+            names.add(card["name"])
+            cards.append(card)
+    return build(declaration, cards)
+
+
+def get(deck_id=None):
+    """The deck, loaded on first use, or None if no such deck is declared."""
+    deck_id = deck_id or DEFAULT_DECK
+    deck = loaded.get(deck_id)
+    if deck is None and deck_id in declarations:
+        with lock:
+            deck = loaded.get(deck_id)
+            if deck is None:
+                deck = load(declarations[deck_id])
+                loaded[deck_id] = deck
+    return deck
+
+
+def normalize_deck(deck_id):
+    """A declared deck id, the default deck otherwise."""
+    return deck_id if deck_id in declarations else DEFAULT_DECK
+
+
+def describe():
+    """Declared decks, without loading them."""
+    return [
+        {
+            "id": d["id"],
+            "label": d["label"],
+            "categories": d["categories"],
+            "secret": d["secret"],
+            "loaded": d["id"] in loaded,
+            "cards": len(loaded[d["id"]]["cards"]) if d["id"] in loaded else None
+        }
+        for d in declarations.values()
+    ]
+
+
+load_config()
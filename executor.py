@@ -0,0 +1,102 @@
+"""Execution layer between the async handlers and the synchronous game engine.
+
+Heavier engine calls (dealing a game, checking a capital, drawing cards) run
+on a bounded thread pool so the event loop keeps serving other rooms' polls.
+Every call that changes a game takes that game's lock first, so moves on one
+game still apply in arrival order whichever thread runs them. Cheap reads
+stay inline on the loop.
+
+Games live in this process's memory, so a process pool would have to ship
+every state back and forth: threads are used instead. With GEOBLUFF_SHARDS
+set, the games live in shard processes instead, and engine calls are sent
+to the game's shard (see shards.py).
+"""
+import asyncio
+import os
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+import ratelimit
+import shards
+
+MAX_WORKERS = min(8, (os.cpu_count() or 1) + 2)
+MAX_PENDING = 256  # Calls queued for the pool before new ones wait for a slot
+LAG_INTERVAL = 0.25  # Seconds between loop-lag probes
+LAG_WINDOW = 40  # Probes kept for the recent maximum (10 seconds)
+
+pool = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="engine")
+locks = weakref.WeakValueDictionary()  # game_id -> asyncio.Lock, dropped when unused
+slots = None  # asyncio.Semaphore, created on the running loop
+metrics = {"pooled": 0, "inline": 0, "pending": 0, "lag": 0.0, "lag_max": 0.0, "lag_ewma": 0.0}
+recent_lags = []
+
+
+def game_lock(game_id):
+    lock = locks.get(game_id)
+    if lock is None:
+        lock = asyncio.Lock()
+        locks[game_id] = lock
+    return lock
+
+
+async def run_in_pool(game_id, func, /, *args, **kwargs):
+    """Run a heavy engine call on the pool, after earlier calls on the same game."""
+    global slots
+    if shards.routes(func):
+        return await shards.call(game_id, func, *args, **kwargs)
+    if slots is None:
+        slots = asyncio.Semaphore(MAX_PENDING)
+    loop = asyncio.get_running_loop()
+    async with slots:
+        metrics["pending"] += 1
+        try:
+            if game_id is None:
+                return await loop.run_in_executor(pool, partial(func, *args, **kwargs))
+            async with game_lock(game_id):
+                return await loop.run_in_executor(pool, partial(func, *args, **kwargs))
+        finally:
+            metrics["pending"] -= 1
+            metrics["pooled"] += 1
+
+
+async def run_ordered(game_id, func, /, *args, **kwargs):
+    """Run a cheap engine call inline, still ordered behind pooled calls on the game."""
+    if shards.routes(func):
+        return await shards.call(game_id, func, *args, **kwargs)
+    metrics["inline"] += 1
+    async with game_lock(game_id):
+        return func(*args, **kwargs)
+
+
+async def watch_loop_lag():
+    """Measure how late the loop wakes up, and report it to admission control."""
+    while True:
+        expected = time.monotonic() + LAG_INTERVAL
+        await asyncio.sleep(LAG_INTERVAL)
+        lag = max(0.0, time.monotonic() - expected)
+        recent_lags.append(lag)
+        if len(recent_lags) > LAG_WINDOW:
+            recent_lags.pop(0)
+        metrics["lag"] = lag
+        metrics["lag_max"] = max(recent_lags)
+        metrics["lag_ewma"] = 0.8 * metrics["lag_ewma"] + 0.2 * lag
+        ratelimit.loop_lag = metrics["lag_ewma"]
+
+
+def snapshot():
+    return {
+        "workers": MAX_WORKERS,
+        "pending": metrics["pending"],
+        "pooled": metrics["pooled"],
+        "inline": metrics["inline"],
+        "locked_games": len(locks),
+        "loop_lag_ms": round(metrics["lag"] * 1000, 2),
+        "loop_lag_max_ms": round(metrics["lag_max"] * 1000, 2),
+        "loop_lag_avg_ms": round(metrics["lag_ewma"] * 1000, 2)
+    }
+
+
+def shutdown():
+    pool.shutdown(wait=True, cancel_futures=True)
@@ -1,14 +1,30 @@
 """Game logic for GeoBluff."""
 import json
+import math
+import mmap
 import random
+import sys
+from array import array
+from bisect import bisect_left, bisect_right, insort
 import time
 import unicodedata
 import uuid
 from pathlib import Path
 
+import decks
+import packed
+import presence
+
 # Use countries.json for production, fallback to countries_test.json if needed
 COUNTRIES_FILE = Path(__file__).parent / "countries.json"
 FALLBACK_COUNTRIES_FILE = Path(__file__).parent / "countries_test.json"
+# Packed copy of the countries file, mapped read-only and shared by every worker process
+PACKED_COUNTRIES_FILE = Path(__file__).parent / "countries.bin"
+# Optional year x country values per category, written by generate_countries.py
+YEARS_FILE = Path(__file__).parent / "countries_years.bin"
+YEARS_MAGIC = b"GBY1"
+MIN_YEAR_COVERAGE = 150  # Same rule as generate_countries.py: a category needs this many countries
+MIN_YEAR_COUNTRIES = 60  # Below this many complete countries a year is not playable
 
 DEFAULT_CATEGORIES = [
     {"id": "population", "label": "Population"},
@@ -75,9 +91,56 @@ DEFAULT_CATEGORY_SETS = [
 CONFIG_FILE = Path(__file__).parent / "categories_config.json"
 
 SUPPORTED_LANGUAGES = {"fr", "en"}
+GAME_MODES = {"local", "online"}
+MIN_TEAMS = 2
+MAX_TEAMS = 8
 DEFAULT_LANGUAGE = "fr"
 game_language = DEFAULT_LANGUAGE
-PRESENCE_TIMEOUT_SECONDS = 6
+TIE_TOLERANCE = 0.0001
+HIDDEN_CARD = {"hidden": True}  # Card back shown to spectators and other teams
+MAX_MIN_GAP = 0.5
+
+# Every player action with the rules that allow it, checked in this order:
+# the phase, the board size, then who may act ("current" player, "final"
+# player who placed the last card, "opponent" of the capital player, or anyone).
+ACTIONS = {
+    "play_card": {
+        "phases": ("playing",), "error": "Cannot play card now", "actor": "current"
+    },
+    "call_bluff": {
+        "phases": ("playing",), "error": "Cannot call bluff now", "actor": "current",
+        "min_board": (2, "Need at least 2 cards on board")
+    },
+    "change_category": {
+        "phases": ("playing",), "error": "Can only change category during playing phase",
+        "actor": "current",
+        "max_board": (1, "Cannot change category after cards have been placed")
+    },
+    "set_position": {"phases": ("placing",), "error": "Not in placing phase", "actor": "current"},
+    "validate_placement": {
+        "phases": ("placing",), "error": "Not in placing phase", "actor": "current"
+    },
+    "cancel_placement": {
+        "phases": ("placing",), "error": "Not in placing phase", "actor": "current"
+    },
+    "reveal_card": {"phases": ("bluff_reveal", "final_validation"), "error": "Not in reveal phase"},
+    "continue_after_bluff": {"phases": ("bluff_result",), "error": "Not in bluff result phase"},
+    "continue_after_final_validation": {
+        "phases": ("final_validation_result",), "error": "Not in final validation result phase"
+    },
+    "check_capital": {
+        "phases": ("capital_check",), "error": "Not in capital check phase", "actor": "final"
+    },
+    "capital_decision": {
+        "phases": ("capital_validation",), "error": "Not in capital validation phase",
+        "actor": "opponent"
+    },
+}
+# Dict of phase -> actions that may be valid in it
+ACTIONS_BY_PHASE = {
+    phase: [action for action, rule in ACTIONS.items() if phase in rule["phases"]]
+    for rule in ACTIONS.values() for phase in rule["phases"]
+}
 
 CATEGORY_LABELS_EN = {
     "population": "Population",
@@ -190,16 +253,22 @@ def get_language(game_id=None):
         return games[game_id]["language"]
     return game_language
 
-def get_category_label(category_id, language):
+def get_category_label(category_id, language, deck=None):
+    if deck is not None and category_id in deck["labels"].get(language, {}):
+        return deck["labels"][language][category_id]
     if language == "en":
         return CATEGORY_LABELS_EN.get(category_id, CATEGORY_LABELS.get(category_id, category_id))
     return CATEGORY_LABELS.get(category_id, category_id)
 
-def translate(key, language, **params):
+def translate(key, language, deck=None, **params):
     bundle = TRANSLATIONS.get(language, TRANSLATIONS[DEFAULT_LANGUAGE])
     template = bundle.get(key, TRANSLATIONS[DEFAULT_LANGUAGE].get(key, key))
     if "category_id" in params and "label" not in params:
-        params["label"] = get_category_label(params["category_id"], language)
+        params["label"] = get_category_label(params["category_id"], language, deck)
+    if "country_id" in params and "country" not in params:
+        params["country"] = get_card_view(params["country_id"], language, deck=deck)["name"]
+    if "capital_of" in params and "capital" not in params:
+        params["capital"] = get_card_view(params["capital_of"], language, deck=deck)["capital"]
     return template.format(**params)
 
 def set_message(game_state, key, **params):
@@ -219,25 +288,468 @@ def clear_message(game_state):
         return
     game_state["message_parts"] = None
 
+def source_stamp(path):
+    """Identify a countries file version, to tell if its packed copy is up to date."""
+    stat = path.stat()
+    return f"{path.name}:{stat.st_size}:{stat.st_mtime_ns}"
+
 def load_countries():
-    """Load countries from JSON file."""
+    """Load countries from JSON file, as rows of its packed copy when possible.
+
+    The first process to start after the JSON file changed packs it again;
+    if the packed file cannot be written, plain dicts are used.
+    """
     primary = COUNTRIES_FILE if COUNTRIES_FILE.exists() else None
     fallback = FALLBACK_COUNTRIES_FILE if FALLBACK_COUNTRIES_FILE.exists() else None
 
     for path in [primary, fallback]:
         if path is None:
             continue
+        stamp = source_stamp(path)
+        table = packed.load(PACKED_COUNTRIES_FILE, stamp)
+        if table is not None:
+            return table.rows()
         with open(path, encoding="utf-8") as f:
             data = json.load(f)
         if data and {"name", "capital", "flag"}.issubset(data[0].keys()):
-            return data
+            try:
+                packed.write(data, PACKED_COUNTRIES_FILE, stamp)
+            except OSError:
+                return data
+            table = packed.load(PACKED_COUNTRIES_FILE, stamp)
+            return table.rows() if table is not None else data
 
     return []
 
+class CardView(dict):
+    """Read-only card projection, shared by every state that shows the card."""
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("CardView is read-only")
+
+    __setitem__ = __delitem__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+
+def card_fields(card, language, secret="capital"):
+    """What a card shows in a language; "capital" is the deck's secret field."""
+    suffix = "" if language == DEFAULT_LANGUAGE else f"_{language}"
+    return {
+        "id": card["name"],
+        "name": card.get(f"name{suffix}") or card["name"],
+        "flag": card.get("flag", ""),
+        "capital": card.get(f"{secret}{suffix}") or card[secret]
+    }
+
 COUNTRIES = load_countries()
 CATEGORIES, CATEGORY_LABELS, CATEGORY_SETS = load_categories_config(COUNTRIES)
+COUNTRY_INDEX = {c["name"]: i for i, c in enumerate(COUNTRIES)}
+decks.register(decks.DEFAULT_DECK, label="Pays", categories=CATEGORIES, cards=COUNTRIES)
+
+def get_deck(deck_id=None):
+    """A deck ready to deal from (loaded, with its card view cache), by id."""
+    deck = decks.get(decks.normalize_deck(deck_id))
+    deck.setdefault("views", {})  # Dict of language -> (card name, is_reference) -> CardView
+    return deck
+
+COUNTRY_DECK = get_deck()
+
+def game_deck(game_state):
+    return get_deck(game_state.get("deck"))
+
+def get_card_view(card_name, language, is_reference=False, deck=None):
+    """Read-only view of a card, built from its (mapped) row the first time it is shown.
+
+    Views are cached per deck, language and card, so a process only holds
+    the views of the cards its games have dealt, not a copy of the table.
+    """
+    deck = deck or COUNTRY_DECK
+    if language not in SUPPORTED_LANGUAGES:
+        language = DEFAULT_LANGUAGE
+    views = deck["views"].setdefault(language, {})
+    view = views.get((card_name, is_reference))
+    if view is None:
+        card = deck["cards"][deck["index"][card_name]]
+        fields = card_fields(card, language, deck["secret"])
+        view = views.setdefault(
+            (card_name, is_reference),
+            CardView(fields, is_reference=True) if is_reference else CardView(fields)
+        )
+    return view
+
+def secret_spellings(card, secret="capital"):
+    """Every accepted answer for a card's secret (French, English and listed variants)."""
+    spellings = [card.get(secret), card.get(f"{secret}_en")] + (card.get(f"{secret}_variants") or [])
+    return [s for s in spellings if s]
+
+def local_bundle():
+    """Read-only data to deal and play hot-seat games in the browser (latest values only).
+
+    Countries are stored by column, indexed like COUNTRIES, with only what a
+    card shows, the accepted capital spellings and the category values.
+    """
+    languages = sorted(SUPPORTED_LANGUAGES)
+    return {
+        "default_language": DEFAULT_LANGUAGE,
+        "tie_tolerance": TIE_TOLERANCE,
+        "min_teams": MIN_TEAMS,
+        "max_teams": MAX_TEAMS,
+        "categories": CATEGORIES,
+        "labels": {
+            language: {c: get_category_label(c, language) for c in CATEGORIES} for language in languages
+        },
+        "category_sets": {set_id: s["categories"] for set_id, s in CATEGORY_SETS.items()},
+        "actions": ACTIONS,  # The browser engine checks moves with this same table
+        "messages": TRANSLATIONS,
+        "countries": {
+            "id": [c["name"] for c in COUNTRIES],
+            "flag": [c["flag"] for c in COUNTRIES],
+            "name": {
+                language: [card_fields(c, language)["name"] for c in COUNTRIES] for language in languages
+            },
+            "capital": {
+                language: [card_fields(c, language)["capital"] for c in COUNTRIES] for language in languages
+            },
+            "spellings": [secret_spellings(c) for c in COUNTRIES],
+            "values": {category: [c.get(category) for c in COUNTRIES] for category in CATEGORIES}
+        }
+    }
+
+def load_year_values():
+    """Map the per-category year x country arrays of YEARS_FILE read-only.
+
+    Returns (first year, number of years, source width, source column of each
+    COUNTRIES entry or -1, dict of category -> float64 view), with NaN where a
+    country has no value yet that year. Every worker process maps the same
+    pages instead of holding its own copy; a file written with the other byte
+    order is swapped into a private copy.
+    """
+    empty = (None, 0, 0, array("q"), {})
+    if not YEARS_FILE.exists():
+        return empty
+    try:
+        with open(YEARS_FILE, "rb") as f:
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return empty
+    buffer = memoryview(mapping)
+    if bytes(buffer[:len(YEARS_MAGIC)]) != YEARS_MAGIC:
+        return empty
+    length = int.from_bytes(buffer[len(YEARS_MAGIC):len(YEARS_MAGIC) + 4], "little")
+    offset = len(YEARS_MAGIC) + 4 + length
+    header = json.loads(bytes(buffer[len(YEARS_MAGIC) + 4:offset]))
+    width = len(header["countries"])
+    year_count = header["last_year"] - header["first_year"] + 1
+    source_columns = {iso3: i for i, iso3 in enumerate(header["countries"])}
+    columns = array("q", [source_columns.get(c.get("iso3"), -1) for c in COUNTRIES])
+    size = 8 * year_count * width
+    values = {}
+    for category in header["categories"]:
+        if category in CATEGORIES:
+            table = buffer[offset:offset + size].cast("d")
+            if header["byteorder"] != sys.byteorder:
+                table = array("d", table)
+                table.byteswap()
+            values[category] = table
+        offset += size
+    return header["first_year"], year_count, width, columns, values
+
+FIRST_YEAR, YEAR_COUNT, YEAR_WIDTH, YEAR_COLUMNS, YEAR_VALUES = load_year_values()
+YEAR_DECKS = {}  # Dict of year -> (playable categories, COUNTRIES indexes, countries), built on first use
+
+def value_at(category, year, index):
+    """Value of COUNTRIES[index] for a category, in a given year or the latest one."""
+    if year is None:
+        return COUNTRIES[index].get(category)
+    table = YEAR_VALUES.get(category)
+    column = YEAR_COLUMNS[index]
+    if table is None or column < 0:
+        return None
+    value = table[(year - FIRST_YEAR) * YEAR_WIDTH + column]
+    return None if math.isnan(value) else value
+
+def value_of(card, category, year=None):
+    """Value of a card in a category, in a reference year (countries only) or the latest one."""
+    if year is None:
+        return card.get(category)
+    return value_at(category, year, COUNTRY_INDEX[card["name"]])
+
+def card_value(game_state, card, category=None):
+    """Value of a card in the game's category (or `category`) and reference year."""
+    return value_of(card, category or game_state["category"], game_state.get("year"))
+
+def get_year_deck(year):
+    """Categories with enough coverage in a year, the countries that have them all
+    (as COUNTRIES indexes) and those countries."""
+    deck = YEAR_DECKS.get(year)
+    if deck is None:
+        indexes = range(len(COUNTRIES))
+        categories = [
+            category for category in CATEGORIES
+            if sum(value_at(category, year, i) is not None for i in indexes) >= MIN_YEAR_COVERAGE
+        ]
+        playable = [
+            i for i in indexes
+            if all(value_at(category, year, i) is not None for category in categories)
+        ]
+        deck = (categories, playable, [COUNTRIES[i] for i in playable])
+        YEAR_DECKS[year] = deck
+    return deck
+
+def is_playable_year(year):
+    categories, playable, _ = get_year_deck(year)
+    return bool(categories) and len(playable) >= MIN_YEAR_COUNTRIES
+
+def available_years():
+    """Years that can be picked as a game's reference year."""
+    if FIRST_YEAR is None:
+        return []
+    return [year for year in range(FIRST_YEAR, FIRST_YEAR + YEAR_COUNT) if is_playable_year(year)]
+
+def normalize_year(year):
+    """A playable reference year, or None to play with the latest values."""
+    try:
+        year = int(year)
+    except (TypeError, ValueError):
+        return None
+    if FIRST_YEAR is None or not FIRST_YEAR <= year < FIRST_YEAR + YEAR_COUNT:
+        return None
+    return year if is_playable_year(year) else None
+
+def deck_countries(year=None, deck=None):
+    """Cards that can be dealt from a deck, with a reference year for countries."""
+    if year is None:
+        return (deck or COUNTRY_DECK)["cards"]
+    return get_year_deck(year)[2]
+
+def sample_excluding(cards, used, count):
+    """Draw up to `count` distinct cards whose name is not in `used`.
+
+    Only hands and the board are ever out of the deck, so random picks are
+    retried instead of listing the free cards, unless `used` is half the deck.
+    """
+    if len(used) * 2 >= len(cards):
+        available = [c for c in cards if c["name"] not in used]
+        return random.sample(available, min(count, len(available)))
+    names = set(used)
+    drawn = []
+    while len(drawn) < count:
+        card = cards[random.randrange(len(cards))]
+        if card["name"] not in names:
+            names.add(card["name"])
+            drawn.append(card)
+    return drawn
 
 games = {}  # Dict of game_id -> game_state
+listeners = []  # Callbacks (event, payload) for "transition", "seat_joined", "round_over" and "game_over"
+CATEGORY_INDEXES = {}  # Dict of (deck_id, category, year) -> (sorted values, deck indexes)
+
+def add_listener(callback):
+    listeners.append(callback)
+
+def emit(event, **payload):
+    """Notify listeners with plain data (never the live game state)."""
+    for callback in listeners:
+        callback(event, payload)
+
+def set_phase(game_state, phase):
+    """Move a game to another phase: every transition goes through here."""
+    previous = game_state["phase"]
+    game_state["phase"] = phase
+    if phase in ("bluff_reveal", "final_validation"):
+        # Reveal progress belongs to the game, never to the shared country dicts
+        game_state["revealed"] = [False] * len(game_state["board"])
+        game_state["revealed_count"] = 0
+    emit_transition(game_state, previous)
+
+def is_descent(game_state, left, right):
+    """True if `left` is worth more than `right` in the game's category (ties are in order)."""
+    return card_value(game_state, left) > card_value(game_state, right) + TIE_TOLERANCE
+
+def set_board(game_state, board):
+    """Replace the board, recounting its descents (adjacent pairs out of order)."""
+    game_state["board"] = board
+    game_state["descents"] = sum(
+        is_descent(game_state, left, right) for left, right in zip(board, board[1:])
+    )
+
+def board_insert(game_state, position, card):
+    """Insert a card, updating the descent count from its two neighbours only."""
+    board = game_state["board"]
+    before = board[position - 1] if position > 0 else None
+    after = board[position] if position < len(board) else None
+    delta = 0
+    if before is not None and after is not None:
+        delta -= is_descent(game_state, before, after)
+    if before is not None:
+        delta += is_descent(game_state, before, card)
+    if after is not None:
+        delta += is_descent(game_state, card, after)
+    board.insert(position, card)
+    game_state["descents"] += delta
+
+def board_remove(game_state, position):
+    """Remove and return a card, updating the descent count from its two neighbours only."""
+    board = game_state["board"]
+    before = board[position - 1] if position > 0 else None
+    after = board[position + 1] if position + 1 < len(board) else None
+    card = board.pop(position)
+    delta = 0
+    if before is not None:
+        delta -= is_descent(game_state, before, card)
+    if after is not None:
+        delta -= is_descent(game_state, card, after)
+    if before is not None and after is not None:
+        delta += is_descent(game_state, before, after)
+    game_state["descents"] += delta
+    return card
+
+def emit_transition(game_state, previous):
+    """Publish a game's phase and settings after a change (previous is None on creation)."""
+    emit(
+        "transition",
+        game_id=game_state["game_id"],
+        previous=previous,
+        phase=game_state["phase"],
+        mode=game_state.get("mode"),
+        language=game_state.get("language"),
+        category_set=game_state.get("category_set"),
+        teams=game_state.get("teams")
+    )
+
+def finish_game(game_state, winner, message_key, **params):
+    """End the game with a winner and publish its summary."""
+    set_phase(game_state, "game_over")
+    game_state["winner"] = winner
+    set_message(game_state, message_key, player=winner, **params)
+    emit(
+        "game_over",
+        game_id=game_state["game_id"],
+        winner=winner,
+        mode=game_state.get("mode"),
+        language=game_state.get("language"),
+        category_set=game_state.get("category_set"),
+        cards_per_player=game_state.get("cards_per_player"),
+        min_gap=game_state.get("min_gap"),
+        year=game_state.get("year"),
+        rounds=game_state.get("rounds", 0),
+        duration=round(time.time() - game_state.get("created_at", time.time()), 1),
+        capital_card=(game_state.get("capital_card") or {}).get("name"),
+        clients=seated_clients(game_state)
+    )
+
+def claim_seat(game_state, player, client_id):
+    """Remember which client plays a seat, claimed on the seat's own turn.
+
+    In an online room a client holds a single seat.
+    """
+    if not client_id or player is None or game_state["current_player"] != player:
+        return
+    if game_state.get("mode") == "online" and viewer_seat(game_state, client_id) is not None:
+        return
+    game_state.setdefault("seats", {}).setdefault(player, client_id)
+
+def authorize(game_state, action, client_id, player=None):
+    """Error message if a client may not take `action` now, else None.
+
+    A shared screen (local game) plays every seat. In an online room the
+    client only acts as its own seat, whatever seat the request names.
+    """
+    claim_seat(game_state, player, client_id)
+    if game_state.get("mode") != "online":
+        return None
+    seat = viewer_seat(game_state, client_id)
+    if seat is None:
+        return "Not seated in this game"
+    if player is not None and player != seat:
+        return "Not your seat"
+    return check_action(game_state, action, seat)
+
+def act(game_id, client_id, action, player, func, *args):
+    """Run the engine action `func(game_id, *args)` for a client, if it may take it."""
+    game_state = games.get(game_id)
+    if game_state is not None:
+        error = authorize(game_state, action, client_id, player)
+        if error:
+            return {"error": error}
+    return func(game_id, *args)
+
+def join_seat(game_id, client_id):
+    """Seat of a client in an online room, taking the first free one on arrival.
+
+    The first arrival at a seat, reserved for the client or not, emits
+    "seat_joined" with the number of seats joined so far.
+    """
+    game_state = games.get(game_id)
+    if game_state is None or not client_id or game_state.get("mode") != "online":
+        return None
+    seats = game_state.setdefault("seats", {})
+    seat = viewer_seat(game_state, client_id)
+    if seat is None:
+        seat = next((player for player in game_state["turn_order"] if player not in seats), None)
+        if seat is None:
+            return None  # Room full: the client watches
+        seats[seat] = client_id
+    joined = game_state.setdefault("joined", [])  # Seats whose client arrived, in order
+    if seat not in joined:
+        joined.append(seat)
+        emit("seat_joined", game_id=game_id, player=seat, joined=len(joined), teams=game_state["teams"])
+    return seat
+
+def viewer_seat(game_state, client_id):
+    if not client_id:
+        return None
+    for player, seated in (game_state.get("seats") or {}).items():
+        if seated == client_id:
+            return player
+    return None
+
+def seated_clients(game_state):
+    seats = game_state.get("seats") or {}
+    return [seats.get(player) for player in range(1, game_state["teams"] + 1)]
+
+def normalize_teams(teams):
+    """Number of teams of a room, between MIN_TEAMS and MAX_TEAMS."""
+    try:
+        teams = int(teams)
+    except (TypeError, ValueError):
+        return MIN_TEAMS
+    return max(MIN_TEAMS, min(teams, MAX_TEAMS))
+
+def hand(game_state, player):
+    """Cards of a seat (seats are numbered from 1)."""
+    return game_state["hands"][player - 1]
+
+def cards_in_hands(game_state):
+    return [card for cards in game_state["hands"] for card in cards]
+
+def next_player(game_state, player):
+    """Seat that plays after `player` in the turn rotation."""
+    order = game_state["turn_order"]
+    return order[(order.index(player) + 1) % len(order)]
+
+def previous_player(game_state, player):
+    """Seat that played just before `player`, the target of its bluff call."""
+    order = game_state["turn_order"]
+    return order[order.index(player) - 1]
+
+def emit_round(game_state, kind, correct_order, loser, winner=None):
+    """Publish the outcome of a resolved board (bluff call or final validation)."""
+    game_state["rounds"] = game_state.get("rounds", 0) + 1
+    category = game_state["category"]
+    emit(
+        "round_over",
+        game_id=game_state["game_id"],
+        kind=kind,
+        category=category,
+        cards=[c["name"] for c in game_state["board"]],
+        values=[card_value(game_state, c) for c in game_state["board"]],
+        correct_order=correct_order,
+        bluff_caller=game_state.get("bluff_caller"),
+        loser=loser,
+        winner=winner,
+        clients=seated_clients(game_state)
+    )
 
 def pick_random_category(category_pool=None, exclude=None):
     """Pick a random category from a pool, optionally excluding one."""
@@ -287,104 +799,334 @@ def check_capital(input_capital, correct_capital):
 
     return levenshtein_distance(input_norm, correct_norm) <= 2
 
+def get_category_index(category, year=None, deck=None):
+    """Return the category values sorted ascending, with matching deck indexes."""
+    deck = deck or COUNTRY_DECK
+    index = CATEGORY_INDEXES.get((deck["id"], category, year))
+    if index is None:
+        if year is None:
+            cards = deck["cards"]
+            pairs = sorted(
+                (card[category], i) for i, card in enumerate(cards) if card.get(category) is not None
+            )
+        else:
+            pairs = sorted(
+                (value_at(category, year, i), i) for i in get_year_deck(year)[1]
+                if value_at(category, year, i) is not None
+            )
+        index = ([v for v, _ in pairs], [i for _, i in pairs])
+        CATEGORY_INDEXES[(deck["id"], category, year)] = index
+    return index
+
+def normalize_min_gap(min_gap):
+    """Clamp a relative minimum gap option, None disables gap dealing."""
+    try:
+        min_gap = float(min_gap or 0)
+    except (TypeError, ValueError):
+        return None
+    if min_gap <= 0:
+        return None
+    return min(min_gap, MAX_MIN_GAP)
+
+def gap_interval(values, value, min_gap):
+    """Range of sorted ranks whose value is too close to `value`."""
+    delta = max(abs(value) * min_gap, TIE_TOLERANCE)
+    return (bisect_left(values, value - delta), bisect_right(values, value + delta))
+
+def sample_with_min_gap(category, taken, count, min_gap, year=None, deck=None):
+    """Draw up to `count` cards keeping a relative gap from `taken` and from each other.
+
+    Blocked values become rank intervals of the sorted category index, so a
+    draw maps a random free rank past the merged intervals in O(k log n)
+    instead of rejection sampling over the deck.
+    """
+    deck = deck or COUNTRY_DECK
+    values, order = get_category_index(category, year, deck)
+    blocked = []
+    for card in taken:
+        value = value_of(card, category, year)
+        if value is not None:
+            insort(blocked, gap_interval(values, value, min_gap))
+
+    drawn = []
+    for _ in range(count):
+        merged = []
+        for lo, hi in blocked:
+            if merged and lo <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], hi)
+            else:
+                merged.append([lo, hi])
+        free = len(values) - sum(hi - lo for lo, hi in merged)
+        if free <= 0:
+            break
+        rank = random.randrange(free)
+        for lo, hi in merged:
+            if rank < lo:
+                break
+            rank += hi - lo
+        card = deck["cards"][order[rank]]
+        drawn.append(card)
+        insort(blocked, gap_interval(values, values[rank], min_gap))
+    return drawn
+
+def deal_cards(category, taken, count, min_gap=None, year=None, deck=None):
+    """Draw `count` cards not in `taken`, spaced by `min_gap` when possible."""
+    drawn = sample_with_min_gap(category, taken, count, min_gap, year, deck) if min_gap else []
+    if len(drawn) < count:
+        # Not enough spaced values left: top up with plain random cards
+        used = set(c["name"] for c in taken) | set(c["name"] for c in drawn)
+        drawn.extend(sample_excluding(deck_countries(year, deck), used, count - len(drawn)))
+    return drawn
+
 def resolve_category_pool(category_set_id):
     if category_set_id and category_set_id in CATEGORY_SETS:
         return CATEGORY_SETS[category_set_id]["categories"]
     return CATEGORIES
 
 
-def new_game(cards_per_player=7, language=None, game_id=None, category_set=None):
+def partial_shuffle(size, count):
+    """First `count` positions of a Fisher-Yates shuffle of range(size), in O(count).
+
+    The index array is virtual: only the swapped slots are kept in a dict, so
+    dealing never copies or shuffles the whole deck.
+    """
+    swapped = {}
+    drawn = []
+    for i in range(min(count, size)):
+        j = random.randrange(i, size)
+        drawn.append(swapped.get(j, j))
+        swapped[j] = swapped.get(i, i)
+    return drawn
+
+def deal_hands(size, count, hands):
+    """Independent draws of `count` distinct indexes below `size`, one per hand."""
+    return [partial_shuffle(size, count) for _ in range(hands)]
+
+def new_game(cards_per_player=7, language=None, game_id=None, category_set=None, min_gap=None,
+             mode="local", year=None, teams=MIN_TEAMS, deck=None):
     """Start a new game."""
+    return new_games(
+        1, cards_per_player, language=language, game_ids=[game_id] if game_id else None,
+        category_set=category_set, min_gap=min_gap, mode=mode, year=year, teams=teams, deck=deck
+    )[0]
+
+def new_games(count, cards_per_player=7, language=None, game_ids=None, category_set=None,
+              min_gap=None, mode="local", year=None, teams=MIN_TEAMS, deck=None, seats=None):
+    """Start `count` games with shared settings (tournament rounds), returning their states.
+
+    `seats` optionally reserves each game's seats: one list of client ids per
+    game, seat 1 first (a bracket's seat tokens).
+    """
     global game_language
 
     if language is not None:
         game_language = normalize_language(language)
 
-    cards_per_player = max(3, min(cards_per_player, 10))
-
-    category_pool = resolve_category_pool(category_set)
-    category = pick_random_category(category_pool)
-    shuffled = random.sample(COUNTRIES, len(COUNTRIES))
-
-    # Reference card (after player hands)
-    ref_index = cards_per_player * 2
-    reference_card = shuffled[ref_index]
-    player1_cards = shuffled[:cards_per_player]
-    player2_cards = shuffled[cards_per_player:cards_per_player * 2]
-
-    # Generate new game_id if not provided
-    if not game_id:
-        game_id = str(uuid.uuid4())[:8]
-
-    game_state = {
-        "game_id": game_id,
-        "category": category,
-        "category_label": get_category_label(category, game_language),
-        "category_pool": category_pool,
-        "category_set": category_set if category_set in CATEGORY_SETS else None,
-        "player1_cards": player1_cards,
-        "player2_cards": player2_cards,
-        "board": [reference_card],  # Start with reference card on board
-        "current_player": 1,
-        "phase": "playing",  # playing, placing, bluff_reveal, capital_check, game_over
-        "winner": None,
-        "message_parts": None,
-        "bluff_caller": None,
-        "reveal_index": 0,
-        "pending_card": None,  # Card being placed (not yet validated)
-        "pending_position": 0,  # Index where card will be inserted (0 = leftmost)
-        "language": game_language,
-        "presence": {}
-    }
+    teams = normalize_teams(teams)
+    min_gap = normalize_min_gap(min_gap)
+    deck = get_deck(deck)
+    if deck is COUNTRY_DECK:
+        year = normalize_year(year)
+        category_pool = resolve_category_pool(category_set)
+    else:
+        # Other decks have their own categories and no yearly values
+        year = None
+        category_set = None
+        category_pool = deck["categories"]
+    if year is not None:
+        # Only categories with data that year, all of them if the set has none
+        year_categories = get_year_deck(year)[0]
+        category_pool = [c for c in category_pool if c in year_categories] or year_categories
+    cards = deck_countries(year, deck)
+    # Every hand plus the reference card must fit in the deck
+    cards_per_player = max(3, min(cards_per_player, 10, (len(cards) - 1) // teams))
+    dealt_count = cards_per_player * teams + 1
+    deals = [] if min_gap else deal_hands(len(cards), dealt_count, count)
+
+    states = []
+    for n in range(count):
+        category = pick_random_category(category_pool)
+        if min_gap:
+            dealt = deal_cards(category, [], dealt_count, min_gap, year, deck)
+        else:
+            dealt = [cards[i] for i in deals[n]]
 
-    games[game_id] = game_state
-    return get_state(game_id)
+        # Reference card (after player hands)
+        reference_card = dealt[cards_per_player * teams]
+        hands = [
+            dealt[seat * cards_per_player:(seat + 1) * cards_per_player] for seat in range(teams)
+        ]
+
+        # Generate new game_id if not provided
+        game_id = game_ids[n] if game_ids and n < len(game_ids) else None
+        if not game_id:
+            game_id = str(uuid.uuid4())[:8]
+
+        game_state = {
+            "game_id": game_id,
+            "category": category,
+            "category_label": get_category_label(category, game_language, deck),
+            "category_pool": category_pool,
+            "deck": deck["id"],
+            "category_set": category_set if category_set in CATEGORY_SETS else None,
+            "cards_per_player": cards_per_player,
+            "mode": mode if mode in GAME_MODES else "local",
+            "teams": teams,
+            "hands": hands,  # One list of cards per seat, seat n at index n - 1
+            "turn_order": list(range(1, teams + 1)),
+            "board": [reference_card],  # Start with reference card on board
+            "descents": 0,  # Adjacent board pairs out of order, kept up to date on every change
+            "revealed": [],  # Per board card during a reveal phase
+            "revealed_count": 0,
+            "current_player": 1,
+            "phase": "playing",  # playing, placing, bluff_reveal, capital_check, game_over
+            "winner": None,
+            "message_parts": None,
+            "bluff_caller": None,
+            "bluff_target": None,
+            "reveal_index": 0,
+            "pending_card": None,  # Card being placed (not yet validated)
+            "pending_position": 0,  # Index where card will be inserted (0 = leftmost)
+            "language": game_language,
+            "min_gap": min_gap,
+            "year": year,  # Reference year of the values, None for the latest ones
+            "rounds": 0,
+            "created_at": time.time(),
+            "seats": dict(enumerate(seats[n], 1)) if seats else {},  # Dict of player -> client_id
+            "version": 0
+        }
+
+        games[game_id] = game_state
+        emit_transition(game_state, None)
+        states.append(get_state(game_id))
+    return states
+
+def check_action(game_state, action, player=None):
+    """Error message if `action` is not allowed now (for `player` if given), else None."""
+    rule = ACTIONS[action]
+    if game_state["phase"] not in rule["phases"]:
+        return rule["error"]
+    board = len(game_state["board"])
+    if "min_board" in rule and board < rule["min_board"][0]:
+        return rule["min_board"][1]
+    if "max_board" in rule and board > rule["max_board"][0]:
+        return rule["max_board"][1]
+    actor = rule.get("actor")
+    if player is None or actor is None:
+        return None
+    if actor == "current" and game_state["current_player"] != player:
+        return "Not your turn"
+    if actor == "final" and game_state.get("final_player") != player:
+        return "Not your turn"
+    if actor == "opponent" and game_state.get("capital_player") == player:
+        return "Not your decision"
+    return None
+
+def allowed_actions(game_state, seat=None):
+    """Actions a viewer can take now; seat None is a shared screen playing every seat."""
+    return [
+        action for action in ACTIONS_BY_PHASE.get(game_state["phase"], ())
+        if check_action(game_state, action, seat) is None
+    ]
 
 def get_state(game_id, client_id=None):
     """Get current game state (hiding opponent's card values)."""
     if game_id not in games:
         return None
 
+    # Online, a client only sees its own hand; a hot-seat screen shows them all
     game_state = games[game_id]
-    now = time.time()
-    presence = game_state.setdefault("presence", {})
-    stale = [cid for cid, ts in presence.items() if now - ts > PRESENCE_TIMEOUT_SECONDS]
-    for cid in stale:
-        presence.pop(cid, None)
-    if client_id:
-        presence[client_id] = now
-
-    active_clients = len(presence)
-    if client_id:
-        other_present = any(cid != client_id for cid in presence)
+    seat = None
+    if game_state.get("mode") == "online":
+        seat = viewer_seat(game_state, client_id)
+        state = project_state(game_id, (seat,) if seat else ())
+        state["allowed_actions"] = allowed_actions(game_state, seat) if seat else []
     else:
-        other_present = active_clients > 1
+        state = project_state(game_id)
+        state["allowed_actions"] = allowed_actions(game_state)
+    state["viewer_seat"] = seat
+    # Presence is maintained by heartbeats, reading the state never writes it
+    state["active_clients"] = presence.count(game_id)
+    state["other_present"] = presence.other_present(game_id, client_id)
+
+    return state
+
+def get_spectator_state(game_id):
+    """Get the state shown to spectators: hands are never revealed."""
+    if game_id not in games:
+        return None
+
+    state = project_state(game_id, visible_seats=())
+    state["allowed_actions"] = []
+    state["spectator"] = True
+    return state
+
+def get_version(game_id):
+    """State version, bumped on every move (None if the game does not exist)."""
+    if game_id not in games:
+        return None
+    return games[game_id]["version"]
+
+def touch(game_state):
+    """Mark the game as changed so cached projections are rebuilt."""
+    game_state["version"] = game_state.get("version", 0) + 1
+
+def export_game(game_state):
+    """Copy of a game with card names instead of cards, to move it to another process."""
+    state = dict(game_state)
+    state["hands"] = [[card["name"] for card in cards] for cards in game_state["hands"]]
+    state["board"] = [card["name"] for card in game_state["board"]]
+    for key in ("pending_card", "capital_card"):
+        if game_state.get(key):
+            state[key] = game_state[key]["name"]
+    return state
 
+def import_game(state):
+    """Add a game exported by export_game, with its cards taken from its deck again."""
+    deck = game_deck(state)
+    cards, index = deck["cards"], deck["index"]
+    game_state = dict(state)
+    game_state["hands"] = [[cards[index[name]] for name in names] for names in state["hands"]]
+    game_state["board"] = [cards[index[name]] for name in state["board"]]
+    for key in ("pending_card", "capital_card"):
+        if state.get(key):
+            game_state[key] = cards[index[state[key]]]
+    games[game_state["game_id"]] = game_state
+    return game_state
+
+def project_state(game_id, visible_seats=None):
+    """Build the public projection of a game (hiding card values per phase).
+
+    Hands of seats outside `visible_seats` are card backs; None shows every hand.
+    """
+    game_state = games[game_id]
     state = game_state.copy()
     language = get_language(game_id)
+    deck = game_deck(game_state)
     state["language"] = language
-    state["category_label"] = get_category_label(state["category"], language)
+    state["category_label"] = get_category_label(state["category"], language, deck)
     category = state["category"]
 
-    # Hide values for cards in hand (only show name and flag)
+    # Hidden cards reference the shared per-language views (only name, flag, capital)
     def hide_card(card):
-        return {"name": card["name"], "flag": card["flag"], "capital": card["capital"]}
+        return get_card_view(card["name"], language, deck=deck)
 
     def full_card(card):
-        return {
-            "name": card["name"],
-            "flag": card["flag"],
-            "capital": card["capital"],
-            "value": card[category]
-        }
+        return {**hide_card(card), "value": card_value(game_state, card, category)}
+
+    def project_hands(view):
+        return [
+            [view(c) for c in cards] if visible_seats is None or player in visible_seats
+            else [HIDDEN_CARD] * len(cards)
+            for player, cards in enumerate(state["hands"], 1)
+        ]
 
     # During playing/placing phase, hide card values
     if state["phase"] in ("playing", "placing"):
-        state["player1_cards"] = [hide_card(c) for c in state["player1_cards"]]
-        state["player2_cards"] = [hide_card(c) for c in state["player2_cards"]]
+        state["hands"] = project_hands(hide_card)
         # All cards hidden (including reference)
         state["board"] = [
-            {**hide_card(c), "is_reference": i == 0}
+            get_card_view(c["name"], language, True, deck) if i == 0 else hide_card(c)
             for i, c in enumerate(state["board"])
         ]
         # Add pending card info
@@ -392,16 +1134,14 @@ def get_state(game_id, client_id=None):
             state["pending_card"] = hide_card(state["pending_card"])
     elif state["phase"] in ("bluff_reveal", "final_validation"):
         # During bluff reveal or final validation, show values only for revealed cards
-        state["player1_cards"] = [hide_card(c) for c in state["player1_cards"]]
-        state["player2_cards"] = [hide_card(c) for c in state["player2_cards"]]
+        state["hands"] = project_hands(hide_card)
         state["board"] = [
-            {**full_card(c), "revealed": c.get("revealed", False), "is_reference": i == 0}
-            for i, c in enumerate(state["board"])
+            {**full_card(c), "revealed": revealed, "is_reference": i == 0}
+            for i, (c, revealed) in enumerate(zip(state["board"], state["revealed"]))
         ]
     else:
         # During other phases (game_over, capital_check, etc.), show all values
-        state["player1_cards"] = [full_card(c) for c in state["player1_cards"]]
-        state["player2_cards"] = [full_card(c) for c in state["player2_cards"]]
+        state["hands"] = project_hands(full_card)
         state["board"] = [
             {**full_card(c), "revealed": True, "is_reference": i == 0}
             for i, c in enumerate(state["board"])
@@ -413,7 +1153,7 @@ def get_state(game_id, client_id=None):
 
     if state.get("message_parts"):
         parts = [
-            translate(part["key"], language, **(part.get("params") or {}))
+            translate(part["key"], language, deck, **(part.get("params") or {}))
             for part in state["message_parts"]
         ]
         state["message"] = " ".join(parts)
@@ -422,9 +1162,12 @@ def get_state(game_id, client_id=None):
 
     state.pop("message_parts", None)
     state.pop("category_pool", None)
-    state.pop("presence", None)
-    state["active_clients"] = active_clients
-    state["other_present"] = other_present
+    state.pop("seats", None)
+    state.pop("joined", None)
+    # Whether the board is in order must stay secret until it is revealed
+    state.pop("descents", None)
+    state.pop("revealed", None)
+    state.pop("revealed_count", None)
 
     return state
 
@@ -436,7 +1179,11 @@ def set_language(game_id, language):
     if game_id and game_id in games:
         game_state = games[game_id]
         game_state["language"] = game_language
-        game_state["category_label"] = get_category_label(game_state["category"], game_language)
+        game_state["category_label"] = get_category_label(
+            game_state["category"], game_language, game_deck(game_state)
+        )
+        emit_transition(game_state, game_state["phase"])
+        touch(game_state)
         return get_state(game_id)
     return {"language": game_language}
 
@@ -447,12 +1194,10 @@ def change_category(game_id):
 
     game_state = games[game_id]
 
-    if game_state["phase"] != "playing":
-        return {"error": "Can only change category during playing phase"}
-
-    # Only allow category change when board has just the reference card
-    if len(game_state["board"]) > 1:
-        return {"error": "Cannot change category after cards have been placed"}
+    # Only while the board holds just the reference card
+    error = check_action(game_state, "change_category")
+    if error:
+        return {"error": error}
 
     # Pick a different category
     old_category = game_state["category"]
@@ -460,9 +1205,13 @@ def change_category(game_id):
     new_category = pick_random_category(category_pool, exclude=old_category)
 
     game_state["category"] = new_category
-    game_state["category_label"] = get_category_label(new_category, get_language(game_id))
+    game_state["category_label"] = get_category_label(
+        new_category, get_language(game_id), game_deck(game_state)
+    )
+    set_board(game_state, game_state["board"])  # Descents depend on the category
     set_message(game_state, "new_category", category_id=new_category)
 
+    touch(game_state)
     return get_state(game_id)
 
 
@@ -473,13 +1222,11 @@ def play_card(game_id, player, card_name):
 
     game_state = games[game_id]
 
-    if game_state["phase"] != "playing":
-        return {"error": "Cannot play card now"}
-
-    if game_state["current_player"] != player:
-        return {"error": "Not your turn"}
+    error = check_action(game_state, "play_card", player)
+    if error:
+        return {"error": error}
 
-    cards = game_state[f"player{player}_cards"]
+    cards = hand(game_state, player)
     card = next((c for c in cards if c["name"] == card_name), None)
 
     if card is None:
@@ -490,9 +1237,10 @@ def play_card(game_id, player, card_name):
     game_state["pending_card"] = card
     # Default position: rightmost (after all existing cards)
     game_state["pending_position"] = len(game_state["board"])
-    game_state["phase"] = "placing"
+    set_phase(game_state, "placing")
     set_message(game_state, "choose_position")
 
+    touch(game_state)
     return get_state(game_id)
 
 def set_position(game_id, position):
@@ -502,8 +1250,9 @@ def set_position(game_id, position):
 
     game_state = games[game_id]
 
-    if game_state["phase"] != "placing":
-        return {"error": "Not in placing phase"}
+    error = check_action(game_state, "set_position")
+    if error:
+        return {"error": error}
 
     # Position is an index from 0 to len(board)
     max_pos = len(game_state["board"])
@@ -511,6 +1260,7 @@ def set_position(game_id, position):
         return {"error": f"Position must be between 0 and {max_pos}"}
 
     game_state["pending_position"] = position
+    touch(game_state)
     return get_state(game_id)
 
 def validate_placement(game_id):
@@ -520,35 +1270,38 @@ def validate_placement(game_id):
 
     game_state = games[game_id]
 
-    if game_state["phase"] != "placing":
-        return {"error": "Not in placing phase"}
+    error = check_action(game_state, "validate_placement")
+    if error:
+        return {"error": error}
 
     card = game_state["pending_card"]
     position = game_state["pending_position"]
     player = game_state["current_player"]
 
     # Insert card at the specified index
-    game_state["board"].insert(position, card)
+    board_insert(game_state, position, card)
 
     # Clear pending state
     game_state["pending_card"] = None
     game_state["pending_position"] = None
 
     # Check for win condition (last card played)
-    cards = game_state[f"player{player}_cards"]
+    cards = hand(game_state, player)
     if len(cards) == 0:
         # Enter final validation phase - reveal cards one by one like bluff
-        game_state["phase"] = "final_validation"
+        set_phase(game_state, "final_validation")
         game_state["final_player"] = player  # Player who placed last card
         game_state["capital_card"] = card  # Store for capital check later
         set_message(game_state, "final_validation")
+        touch(game_state)
         return get_state(game_id)
 
-    # Switch player
-    game_state["current_player"] = 2 if player == 1 else 1
-    game_state["phase"] = "playing"
+    # Next seat in the rotation plays
+    game_state["current_player"] = next_player(game_state, player)
+    set_phase(game_state, "playing")
     clear_message(game_state)
 
+    touch(game_state)
     return get_state(game_id)
 
 def cancel_placement(game_id):
@@ -558,19 +1311,21 @@ def cancel_placement(game_id):
 
     game_state = games[game_id]
 
-    if game_state["phase"] != "placing":
-        return {"error": "Not in placing phase"}
+    error = check_action(game_state, "cancel_placement")
+    if error:
+        return {"error": error}
 
     player = game_state["current_player"]
     card = game_state["pending_card"]
 
     # Return card to hand
-    game_state[f"player{player}_cards"].append(card)
+    hand(game_state, player).append(card)
     game_state["pending_card"] = None
     game_state["pending_position"] = None
-    game_state["phase"] = "playing"
+    set_phase(game_state, "playing")
     clear_message(game_state)
 
+    touch(game_state)
     return get_state(game_id)
 
 def call_bluff(game_id, player):
@@ -580,20 +1335,17 @@ def call_bluff(game_id, player):
 
     game_state = games[game_id]
 
-    if game_state["phase"] != "playing":
-        return {"error": "Cannot call bluff now"}
+    error = check_action(game_state, "call_bluff", player)
+    if error:
+        return {"error": error}
 
-    if len(game_state["board"]) < 2:
-        return {"error": "Need at least 2 cards on board"}
-
-    if game_state["current_player"] != player:
-        return {"error": "Not your turn"}
-
-    game_state["phase"] = "bluff_reveal"
+    set_phase(game_state, "bluff_reveal")
     game_state["bluff_caller"] = player
+    game_state["bluff_target"] = previous_player(game_state, player)
     game_state["reveal_index"] = 0
     set_message(game_state, "reveal_cards")
 
+    touch(game_state)
     return get_state(game_id)
 
 def reveal_card(game_id, index):
@@ -603,58 +1355,53 @@ def reveal_card(game_id, index):
 
     game_state = games[game_id]
 
-    if game_state["phase"] not in ("bluff_reveal", "final_validation"):
-        return {"error": "Not in reveal phase"}
+    error = check_action(game_state, "reveal_card")
+    if error:
+        return {"error": error}
 
     if index < 0 or index >= len(game_state["board"]):
         return {"error": "Invalid card index"}
 
     # Mark this card as revealed
-    game_state["board"][index]["revealed"] = True
-
-    # Count revealed cards
-    revealed_count = sum(1 for card in game_state["board"] if card.get("revealed", False))
+    if not game_state["revealed"][index]:
+        game_state["revealed"][index] = True
+        game_state["revealed_count"] += 1
 
     # Check if all cards revealed
-    if revealed_count >= len(game_state["board"]):
+    if game_state["revealed_count"] >= len(game_state["board"]):
         if game_state["phase"] == "bluff_reveal":
             return check_bluff_result(game_id)
         else:
             return check_final_validation_result(game_id)
 
+    touch(game_state)
     return get_state(game_id)
 
 def check_bluff_result(game_id):
     """Check if bluff was correct after all cards revealed - enter result phase."""
     game_state = games[game_id]
 
-    category = game_state["category"]
-    board = game_state["board"]
     bluff_caller = game_state["bluff_caller"]
+    bluff_target = game_state.get("bluff_target") or previous_player(game_state, bluff_caller)
 
-    # Check if order is correct (ascending, ties are valid)
-    is_correct_order = True
-    for i in range(len(board) - 1):
-        val1 = board[i][category]
-        val2 = board[i + 1][category]
-        # Use tolerance for float comparison, ties (equal values) are valid
-        if val1 > val2 + 0.0001:
-            is_correct_order = False
-            break
+    # The order is correct (ascending, ties are valid) when no adjacent pair is out of order
+    is_correct_order = game_state["descents"] == 0
 
     if is_correct_order:
         # Order was correct, bluff caller loses
-        loser = bluff_caller
+        loser, winner = bluff_caller, bluff_target
         set_message(game_state, "bluff_correct", player=bluff_caller)
     else:
-        # Order was wrong, bluff caller wins
-        loser = 2 if bluff_caller == 1 else 1
+        # Order was wrong, bluff caller wins against the player it called
+        loser, winner = bluff_target, bluff_caller
         set_message(game_state, "bluff_wrong", player=loser)
 
     # Enter result phase - wait for user to click continue
-    game_state["phase"] = "bluff_result"
+    set_phase(game_state, "bluff_result")
     game_state["bluff_loser"] = loser
+    emit_round(game_state, "bluff", is_correct_order, loser, winner)
 
+    touch(game_state)
     return get_state(game_id)
 
 
@@ -662,30 +1409,27 @@ def check_final_validation_result(game_id):
     """Check if order is correct after final validation - either ask capital or penalize."""
     game_state = games[game_id]
 
-    category = game_state["category"]
-    board = game_state["board"]
     player = game_state["final_player"]
 
-    # Check if order is correct (ascending, ties are valid)
-    is_correct_order = True
-    for i in range(len(board) - 1):
-        val1 = board[i][category]
-        val2 = board[i + 1][category]
-        if val1 > val2 + 0.0001:
-            is_correct_order = False
-            break
+    # The order is correct (ascending, ties are valid) when no adjacent pair is out of order
+    is_correct_order = game_state["descents"] == 0
 
     if is_correct_order:
         # Order correct - now ask for capital
         card = game_state["capital_card"]
-        game_state["phase"] = "capital_check"
-        set_message(game_state, "order_correct_capital", player=player, country=card["name"])
+        set_phase(game_state, "capital_check")
+        set_message(game_state, "order_correct_capital", player=player, country_id=card["name"])
     else:
         # Order wrong - player draws 2 cards, enter result phase
-        game_state["phase"] = "final_validation_result"
+        set_phase(game_state, "final_validation_result")
         game_state["final_validation_failed"] = True
         set_message(game_state, "order_wrong", player=player)
+    # A failed validation is lost against the board; with two teams the other one wins it
+    loser = None if is_correct_order else player
+    winner = next_player(game_state, player) if loser and game_state["teams"] == 2 else None
+    emit_round(game_state, "final_validation", is_correct_order, loser, winner)
 
+    touch(game_state)
     return get_state(game_id)
 
 
@@ -696,26 +1440,29 @@ def continue_after_final_validation(game_id):
 
     game_state = games[game_id]
 
-    if game_state["phase"] != "final_validation_result":
-        return {"error": "Not in final validation result phase"}
+    error = check_action(game_state, "continue_after_final_validation")
+    if error:
+        return {"error": error}
 
     player = game_state["final_player"]
 
     # Clear the board (cards are discarded)
-    game_state["board"] = []
+    set_board(game_state, [])
 
-    # Player draws 2 new cards
-    draw_new_cards(game_id, player, 2)
+    # Player draws 2 new cards, spaced for the next round's category
+    category_pool = game_state.get("category_pool") or CATEGORIES
+    next_category = pick_random_category(category_pool)
+    draw_new_cards(game_id, player, 2, category=next_category)
 
     # Clear validation state
     game_state["final_player"] = None
     game_state["capital_card"] = None
     game_state["final_validation_failed"] = None
 
-    # Start new round with new category, other player starts
-    other_player = 2 if player == 1 else 1
-    start_new_round(game_id, other_player)
+    # Start new round with new category, the next player starts
+    start_new_round(game_id, next_player(game_state, player), category=next_category)
 
+    touch(game_state)
     return get_state(game_id)
 
 
@@ -726,71 +1473,94 @@ def continue_after_bluff(game_id):
 
     game_state = games[game_id]
 
-    if game_state["phase"] != "bluff_result":
-        return {"error": "Not in bluff result phase"}
+    error = check_action(game_state, "continue_after_bluff")
+    if error:
+        return {"error": error}
 
     loser = game_state["bluff_loser"]
 
     # Clear the board (cards are discarded)
-    game_state["board"] = []
+    set_board(game_state, [])
 
     # Loser draws 2 new cards from available countries
-    draw_new_cards(game_id, loser, 2)
+    category_pool = game_state.get("category_pool") or CATEGORIES
+    next_category = pick_random_category(category_pool)
+    draw_new_cards(game_id, loser, 2, category=next_category)
 
     # Check if someone has won (no cards left) - unlikely after drawing but check anyway
-    for player in [1, 2]:
-        if len(game_state[f"player{player}_cards"]) == 0:
-            game_state["phase"] = "game_over"
-            game_state["winner"] = player
-            set_message(game_state, "game_over_win", player=player)
+    for player, cards in enumerate(game_state["hands"], 1):
+        if len(cards) == 0:
+            finish_game(game_state, player, "game_over_win")
+            touch(game_state)
             return get_state(game_id)
 
     # Start new round with new category and new reference card
-    start_new_round(game_id, loser)
+    start_new_round(game_id, loser, category=next_category)
 
+    touch(game_state)
     return get_state(game_id)
 
 
-def draw_new_cards(game_id, player, count):
+def draw_new_cards(game_id, player, count, category=None):
     """Draw new cards for a player from available countries."""
     game_state = games[game_id]
+    min_gap = game_state.get("min_gap")
+
+    if min_gap:
+        # Keep the gap from every card already in hands or on the board
+        taken = cards_in_hands(game_state) + game_state["board"]
+        new_cards = deal_cards(
+            category or game_state["category"], taken, count, min_gap, game_state.get("year"),
+            game_deck(game_state)
+        )
+        hand(game_state, player).extend(new_cards)
+        return
 
     # Get all cards currently in players' hands
-    player_cards = set(c["name"] for c in game_state["player1_cards"] + game_state["player2_cards"])
+    player_cards = set(c["name"] for c in cards_in_hands(game_state))
 
-    # Get available countries (not in any player's hand)
-    available = [c for c in COUNTRIES if c["name"] not in player_cards]
+    # Draw up to 'count' cards not in any player's hand
+    deck = deck_countries(game_state.get("year"), game_deck(game_state))
+    hand(game_state, player).extend(sample_excluding(deck, player_cards, count))
 
-    # Draw up to 'count' cards
-    cards_to_draw = min(count, len(available))
-    if cards_to_draw > 0:
-        new_cards = random.sample(available, cards_to_draw)
-        game_state[f"player{player}_cards"].extend(new_cards)
-
-def start_new_round(game_id, starting_player):
+def start_new_round(game_id, starting_player, category=None):
     """Start a new round with a new category."""
     game_state = games[game_id]
 
     # Pick new category (pure random, repetition allowed)
     category_pool = game_state.get("category_pool") or CATEGORIES
-    new_category = pick_random_category(category_pool)
+    new_category = category or pick_random_category(category_pool)
 
     # Pick a reference card from remaining countries (not in players' hands)
-    player_cards = set(c["name"] for c in game_state["player1_cards"] + game_state["player2_cards"])
-    available_countries = [c for c in COUNTRIES if c["name"] not in player_cards]
+    hands = cards_in_hands(game_state)
+    min_gap = game_state.get("min_gap")
+    deck = game_deck(game_state)
+    if min_gap:
+        available_countries = sample_with_min_gap(
+            new_category, hands, 1, min_gap, game_state.get("year"), deck
+        )
+    else:
+        available_countries = []
+    if not available_countries:
+        player_cards = set(c["name"] for c in hands)
+        cards = deck_countries(game_state.get("year"), deck)
+        available_countries = sample_excluding(cards, player_cards, 1)
 
     if available_countries:
-        reference_card = random.choice(available_countries)
+        reference_card = available_countries[0]
     else:
         # If all countries are in hands, take one from loser's hand
-        reference_card = game_state[f"player{starting_player}_cards"].pop(0)
+        reference_card = hand(game_state, starting_player).pop(0)
 
-    game_state["board"] = [reference_card]
     game_state["category"] = new_category
-    game_state["category_label"] = get_category_label(new_category, get_language(game_id))
+    set_board(game_state, [reference_card])
+    game_state["category_label"] = get_category_label(
+        new_category, get_language(game_id), game_deck(game_state)
+    )
     game_state["current_player"] = starting_player
-    game_state["phase"] = "playing"
+    set_phase(game_state, "playing")
     game_state["bluff_caller"] = None
+    game_state["bluff_target"] = None
     game_state["reveal_index"] = 0
     append_message(game_state, "new_category", category_id=new_category)
 
@@ -801,24 +1571,25 @@ def check_capital_answer(game_id, player, answer):
 
     game_state = games[game_id]
 
-    if game_state["phase"] != "capital_check":
-        return {"error": "Not in capital check phase"}
+    error = check_action(game_state, "check_capital", player)
+    if error:
+        return {"error": error}
 
     # Use the stored capital_card (the card the player just placed)
     card = game_state.get("capital_card") or game_state["board"][-1]
-    correct_capital = card["capital"]
+    # Any known spelling of the deck's secret is accepted (French, English or a listed variant)
+    spellings = secret_spellings(card, game_deck(game_state)["secret"])
 
-    if check_capital(answer, correct_capital):
-        game_state["phase"] = "game_over"
-        game_state["winner"] = player
-        set_message(game_state, "capital_correct", capital=correct_capital, player=player)
+    if any(check_capital(answer, spelling) for spelling in spellings):
+        finish_game(game_state, player, "capital_correct", capital_of=card["name"])
     else:
         # Wrong answer - enter validation phase where opponent can accept or refuse
-        game_state["phase"] = "capital_validation"
+        set_phase(game_state, "capital_validation")
         game_state["capital_answer"] = answer
         game_state["capital_player"] = player
-        set_message(game_state, "capital_incorrect", answer=answer, capital=correct_capital)
+        set_message(game_state, "capital_incorrect", answer=answer, capital_of=card["name"])
 
+    touch(game_state)
     return get_state(game_id)
 
 
@@ -829,34 +1600,34 @@ def validate_capital_decision(game_id, accepted):
 
     game_state = games[game_id]
 
-    if game_state["phase"] != "capital_validation":
-        return {"error": "Not in capital validation phase"}
+    error = check_action(game_state, "capital_decision")
+    if error:
+        return {"error": error}
 
     player = game_state["capital_player"]
     # Use the stored capital_card
     card = game_state.get("capital_card") or game_state["board"][-1]
-    correct_capital = card["capital"]
 
     if accepted:
         # Opponent accepts the answer
-        game_state["phase"] = "game_over"
-        game_state["winner"] = player
-        set_message(game_state, "capital_accepted", player=player)
+        finish_game(game_state, player, "capital_accepted")
     else:
         # Opponent refuses - remove the capital_card from board and player draws 2 new cards
         if game_state.get("capital_card"):
             # Find and remove the capital_card from board
-            game_state["board"] = [c for c in game_state["board"] if c["name"] != card["name"]]
+            names = [c["name"] for c in game_state["board"]]
+            board_remove(game_state, names.index(card["name"]))
         else:
-            game_state["board"].pop()
+            board_remove(game_state, len(game_state["board"]) - 1)
         draw_new_cards(game_id, player, 2)
-        game_state["phase"] = "playing"
-        game_state["current_player"] = 2 if player == 1 else 1
-        set_message(game_state, "capital_refused", capital=correct_capital, player=player)
+        set_phase(game_state, "playing")
+        game_state["current_player"] = next_player(game_state, player)
+        set_message(game_state, "capital_refused", capital_of=card["name"], player=player)
 
     # Clear validation state
     game_state["capital_answer"] = None
     game_state["capital_player"] = None
     game_state["capital_card"] = None
 
+    touch(game_state)
     return get_state(game_id)
@@ -8,14 +8,24 @@ Usage:
 
 Crée countries.json avec ~195 pays contenant:
 - name, capital, flag, population, area, gdp (+ autres catégories configurées)
+
+Crée aussi countries_years.bin : pour chaque catégorie, un tableau dense
+année x pays de doubles (NaN si aucune valeur), pour jouer avec une année
+de référence.
 """
 
 import json
+import math
+import os
 import requests
+import sys
 import time
+from array import array
 from pathlib import Path
 from typing import Optional
 
+import validate_data
+
 
 def get_flag_emoji(iso2: str) -> str:
     """Convertit un code ISO2 en emoji drapeau."""
@@ -115,6 +125,85 @@ def fetch_world_bank(indicator: str, name: str) -> dict:
     return result
 
 
+def fetch_world_bank_years(indicator: str, name: str, first_year: int, last_year: int) -> dict:
+    """Récupère un indicateur World Bank sur une plage d'années: {iso3: {année: valeur}}."""
+    print(f"📥 Récupération {name} {first_year}-{last_year} (World Bank)...")
+
+    url = f"https://api.worldbank.org/v2/country/all/indicator/{indicator}"
+    params = {"format": "json", "per_page": 20000, "date": f"{first_year}:{last_year}"}
+
+    result = {}
+    page = 1
+
+    while True:
+        params["page"] = page
+        try:
+            response = requests.get(url, params=params, timeout=60)
+            response.raise_for_status()
+            data = response.json()
+
+            if len(data) < 2 or not data[1]:
+                break
+
+            for item in data[1]:
+                iso3 = item.get("countryiso3code")
+                if item.get("value") is not None and iso3 and str(item.get("date", "")).isdigit():
+                    result.setdefault(iso3, {})[int(item["date"])] = float(item["value"])
+
+            if page >= data[0].get("pages", 1):
+                break
+            page += 1
+            time.sleep(0.1)
+        except Exception as e:
+            print(f"   ⚠ Erreur page {page}: {e}")
+            break
+
+    print(f"   ✓ {len(result)} pays")
+    return result
+
+
+YEARS_MAGIC = b"GBY1"
+FIRST_YEAR = 2000
+LAST_YEAR = 2023
+
+
+def write_years_bin(countries: list, series: dict, output: str = "countries_years.bin"):
+    """Écrit les tableaux année x pays de chaque catégorie dans un fichier binaire compact.
+
+    Format: magic, taille de l'en-tête (uint32 little-endian), en-tête JSON,
+    puis pour chaque catégorie len(années) x len(pays) doubles, ligne par année.
+    Une année sans valeur reprend la dernière valeur connue avant elle.
+    """
+    iso3s = [c["iso3"] for c in countries]
+    years = range(FIRST_YEAR, LAST_YEAR + 1)
+    header = json.dumps({
+        "first_year": FIRST_YEAR,
+        "last_year": LAST_YEAR,
+        "countries": iso3s,
+        "categories": list(series),
+        "byteorder": sys.byteorder,
+    }).encode("utf-8")
+    # Espaces après le JSON: les tableaux commencent sur 8 octets, lus en place par le jeu
+    header += b" " * (-(len(YEARS_MAGIC) + 4 + len(header)) % 8)
+
+    with open(output, "wb") as f:
+        f.write(YEARS_MAGIC)
+        f.write(len(header).to_bytes(4, "little"))
+        f.write(header)
+        for cat_id, by_country in series.items():
+            table = array("d", [math.nan]) * (len(years) * len(iso3s))
+            for column, iso3 in enumerate(iso3s):
+                known = by_country.get(iso3, {})
+                last = math.nan
+                for row, year in enumerate(years):
+                    last = known.get(year, last)
+                    table[row * len(iso3s) + column] = last
+            f.write(table.tobytes())
+
+    size = Path(output).stat().st_size
+    print(f"💾 {output}: {len(series)} catégories, {len(years)} années, {size // 1024} Ko")
+
+
 # Capitales en français (principales traductions)
 CAPITALES_FR = {
     "AFG": "Kaboul", "DEU": "Berlin", "SAU": "Riyad", "ARE": "Abou Dabi",
@@ -197,8 +286,8 @@ def load_categories_config(config_path: Path) -> dict:
         return json.load(f)
 
 
-def generate_countries_json(output: str = "countries.json"):
-    """Génère le fichier countries.json."""
+def generate_countries_json(output: str = "countries.json", years_output: str = "countries_years.bin"):
+    """Génère le fichier countries.json (et les séries annuelles dans years_output)."""
     print("🌍 Génération de countries.json pour GeoBluff\n")
     min_coverage = 150
     
@@ -291,8 +380,21 @@ def generate_countries_json(output: str = "countries.json"):
         if c.get("name") and all(c.get(cat_id) is not None for cat_id in enabled_set)
     ]
     valid.sort(key=lambda x: x["name"])
-    
-    # 5. Sauvegarder
+
+    # 6. Séries annuelles (les catégories REST n'ont pas d'historique: valeur constante)
+    series = {}
+    for cat_id, cat in category_map.items():
+        if cat.get("source") == "wb" and cat.get("indicator"):
+            series[cat_id] = fetch_world_bank_years(
+                cat["indicator"], cat.get("label", cat_id), FIRST_YEAR, LAST_YEAR
+            )
+        else:
+            series[cat_id] = {
+                c["iso3"]: {FIRST_YEAR: float(c[cat_id])} for c in valid if c.get(cat_id) is not None
+            }
+    write_years_bin(valid, series, years_output)
+
+    # 7. Sauvegarder
     print(f"\n💾 Sauvegarde de {len(valid)} pays...")
     with open(output, "w", encoding="utf-8") as f:
         json.dump(valid, f, ensure_ascii=False, indent=2)
@@ -321,7 +423,9 @@ def show_categories():
 
 
 if __name__ == "__main__":
-    countries = generate_countries_json()
+    # Écrire à côté des fichiers du jeu, qui ne sont remplacés qu'après validation
+    outputs = {"countries.json": "countries.json.new", "countries_years.bin": "countries_years.bin.new"}
+    countries = generate_countries_json(outputs["countries.json"], outputs["countries_years.bin"])
     
     # Aperçu
     print("\n📋 Exemple (France):")
@@ -330,3 +434,13 @@ if __name__ == "__main__":
         print(json.dumps(france, ensure_ascii=False, indent=2))
     
     show_categories()
+
+    # Refuser des données qui casseraient une partie
+    print("\n🔎 Validation des données:")
+    status = validate_data.main(["--quiet", "--countries", outputs["countries.json"]])
+    if status:
+        print(f"❌ Données refusées: les fichiers du jeu sont inchangés ({', '.join(outputs.values())} conservés)")
+        sys.exit(status)
+    for target, new in outputs.items():
+        os.replace(new, target)
+    print(f"✅ {', '.join(outputs)} mis à jour")
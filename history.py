@@ -0,0 +1,76 @@
+"""Game history export for GeoBluff.
+
+Finished games (and, optionally, every resolved round) are pushed onto a
+bounded in-process queue. A background thread drains it in batches into
+gzip-compressed JSONL files, rotated by size and age (see batches.py). The
+request path only does a non-blocking put: when the queue is full the record
+is dropped and counted instead of waiting on disk.
+"""
+import gzip
+import os
+import time
+from pathlib import Path
+
+import batches
+import wire
+
+HISTORY_DIR = Path(os.environ.get("GEOBLUFF_HISTORY_DIR", Path(__file__).parent / "history"))
+RECORD_ROUNDS = os.environ.get("GEOBLUFF_HISTORY_ROUNDS", "1") != "0"
+QUEUE_SIZE = 10000
+BATCH_SIZE = 500
+FLUSH_SECONDS = 5
+ROTATE_BYTES = 16 * 1024 * 1024  # Uncompressed bytes per file
+ROTATE_SECONDS = 3600
+
+stats = {"queued": 0, "dropped": 0, "written": 0, "files": 0}
+output = {"path": None, "opened_at": 0, "size": 0}  # Current file, used by the writer thread only
+
+
+def on_game_event(event, payload):
+    """game.py listener: enqueue without ever blocking the request."""
+    if event not in ("round_over", "game_over") or (event == "round_over" and not RECORD_ROUNDS):
+        return
+    if batches.put(writer, {"event": event, "ts": round(time.time(), 3), **payload}):
+        stats["queued"] += 1
+    else:
+        stats["dropped"] += 1
+
+
+def current_file(now):
+    if (
+        output["path"] is None
+        or output["size"] >= ROTATE_BYTES
+        or now - output["opened_at"] >= ROTATE_SECONDS
+    ):
+        HISTORY_DIR.mkdir(parents=True, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.gmtime(now))
+        output["path"] = HISTORY_DIR / f"games-{stamp}-{os.getpid()}.jsonl.gz"
+        output["opened_at"] = now
+        output["size"] = 0
+        stats["files"] += 1
+    return output["path"]
+
+
+def write_batch(batch, context=None):
+    lines = b"".join(wire.dumps_json(record) + b"\n" for record in batch)
+    # Each batch is a complete gzip member: a crash never corrupts earlier batches
+    try:
+        with gzip.open(current_file(time.time()), "ab") as f:
+            f.write(lines)
+    except OSError as e:
+        print(f"History write failed: {e}")
+        return
+    output["size"] += len(lines)
+    stats["written"] += len(batch)
+
+
+writer = batches.create("history-writer", write_batch, QUEUE_SIZE, BATCH_SIZE, FLUSH_SECONDS)
+
+
+def start():
+    batches.start(writer)
+
+
+def stop():
+    """Flush queued records and stop the writer."""
+    batches.stop(writer)
@@ -0,0 +1,146 @@
+"""Open-room lobby and quick matchmaking for GeoBluff.
+
+Joinable online rooms are indexed by (category_set, cards_per_player, language, teams,
+deck) and updated incrementally when rooms are created, joined or abandoned, so
+matching and listing never walk the whole game table.
+"""
+import time
+from collections import OrderedDict
+from itertools import islice
+
+import decks
+import presence
+
+MAX_PAGE_SIZE = 50
+ROOM_TTL_SECONDS = 600  # Rooms nobody joined in that time are taken off the lobby
+
+buckets = {}  # Dict of room key -> OrderedDict of game_id -> room (oldest first)
+open_rooms = OrderedDict()  # Dict of game_id -> room, in creation order
+seated = {}  # Dict of game_id -> set of client_ids holding a seat (never listed)
+opened = {}  # Dict of game_id -> time.monotonic() of its opening
+
+
+def room_key(category_set, cards_per_player, language, teams=2, deck=None):
+    return (category_set or "all", cards_per_player, language, teams, deck or decks.DEFAULT_DECK)
+
+
+def open_room(game_id, category_set, cards_per_player, language, host=None, teams=2, deck=None):
+    """List a room that waits for its other teams."""
+    expire_rooms()
+    key = room_key(category_set, cards_per_player, language, teams, deck)
+    room = {
+        "game_id": game_id,
+        "category_set": key[0],
+        "cards_per_player": cards_per_player,
+        "language": language,
+        "teams": teams,
+        "deck": key[4]
+    }
+    buckets.setdefault(key, OrderedDict())[game_id] = room
+    open_rooms[game_id] = room
+    seated[game_id] = {host} if host else set()
+    opened[game_id] = time.monotonic()
+    return room
+
+
+def expire_rooms(now=None):
+    """Close the rooms older than ROOM_TTL_SECONDS that nobody joined besides their host.
+
+    Rooms are kept in creation order, so only the expired ones are visited.
+    """
+    cutoff = (time.monotonic() if now is None else now) - ROOM_TTL_SECONDS
+    expired = []
+    for game_id in open_rooms:
+        if opened[game_id] > cutoff:
+            break
+        if len(seated[game_id]) <= 1:
+            expired.append(game_id)
+    for game_id in expired:
+        close_room(game_id)
+
+
+def seat_taken(game_id, client_id):
+    """Record a client seated in a room, closing the room once every seat is taken."""
+    room = open_rooms.get(game_id)
+    if room is None or not client_id:
+        return
+    clients = seated[game_id]
+    clients.add(client_id)
+    if len(clients) >= room["teams"]:
+        close_room(game_id)
+
+
+def close_room(game_id):
+    """Remove a room from the index (joined, abandoned or finished)."""
+    room = open_rooms.pop(game_id, None)
+    if room is None:
+        return None
+    seated.pop(game_id, None)
+    opened.pop(game_id, None)
+    key = room_key(
+        room["category_set"], room["cards_per_player"], room["language"], room["teams"], room["deck"]
+    )
+    bucket = buckets.get(key)
+    if bucket is not None:
+        bucket.pop(game_id, None)
+        if not bucket:
+            del buckets[key]
+    return room
+
+
+def quick_match(category_set, cards_per_player, language, client_id=None, deck=None, teams=2):
+    """Take the longest-waiting room with matching settings and seat the caller, or None.
+
+    The room stays listed until its last seat is taken.
+    """
+    expire_rooms()
+    bucket = buckets.get(room_key(category_set, cards_per_player, language, teams, deck))
+    if not bucket:
+        return None
+    # The oldest room is the answer unless the caller already sits in it
+    game_id = next(
+        (gid for gid in bucket if not client_id or client_id not in seated[gid]), None
+    )
+    if game_id is not None:
+        seat_taken(game_id, client_id)
+    return game_id
+
+
+def list_rooms(category_set=None, cards_per_player=None, language=None, offset=0, limit=20,
+               deck=None, teams=None):
+    """Page through open rooms, using a single bucket when every filter is given.
+
+    The deck filter defaults to the countries deck in that case.
+    """
+    expire_rooms()
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    offset = max(0, offset)
+    if category_set and cards_per_player and language and teams:
+        rooms = buckets.get(room_key(category_set, cards_per_player, language, teams, deck), {})
+        candidates = rooms.values()
+    else:
+        rooms = open_rooms
+        candidates = (
+            room for room in open_rooms.values()
+            if (not category_set or room["category_set"] == category_set)
+            and (not cards_per_player or room["cards_per_player"] == cards_per_player)
+            and (not language or room["language"] == language)
+            and (not teams or room["teams"] == teams)
+            and (not deck or room["deck"] == deck)
+        )
+    page = list(islice(candidates, offset, offset + limit + 1))
+    has_more = len(page) > limit
+    return {
+        "rooms": page[:limit],
+        "next_offset": offset + limit if has_more else None,
+        "indexed": len(rooms)
+    }
+
+
+def on_presence(event, game_id, client_id):
+    """Presence listener: rooms close when everyone left.
+
+    Spectators count as present, so full rooms are closed by seat_taken instead.
+    """
+    if event == "leave" and game_id in open_rooms and presence.count(game_id) == 0:
+        close_room(game_id)
@@ -1,23 +1,102 @@
 """FastAPI app for GeoBluff."""
+import asyncio
+import os
+from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional
 from fastapi import FastAPI, Request, Body
-from fastapi.staticfiles import StaticFiles
-from fastapi.templating import Jinja2Templates
-from fastapi.responses import JSONResponse, PlainTextResponse
+from fastapi.responses import PlainTextResponse
 from pydantic import BaseModel
 
+import assets
+import capitals
+import decks
+import executor
 import game
+import history
+import lobby
+import presence
+import ratelimit
+import ratings
+import shards
+import spectators
+import stats
+import tournament
+import wire
+
+ADMIN_TOKEN = os.environ.get("GEOBLUFF_ADMIN_TOKEN")
+LOCAL_HOSTS = {"127.0.0.1", "::1", "localhost"}
 
 RULES_FILES = {
     "fr": Path(__file__).parent / "rules.md",
     "en": Path(__file__).parent / "rules_en.md"
 }
 
-app = FastAPI(title="GeoBluff")
 
-app.mount("/static", StaticFiles(directory="static"), name="static")
-templates = Jinja2Templates(directory="templates")
+async def expire_presence():
+    """Advance the presence timing wheel so idle clients leave without any poll."""
+    while True:
+        presence.advance()
+        await asyncio.sleep(presence.TICK_SECONDS)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    presence.add_listener(lobby.on_presence)
+    game.add_listener(history.on_game_event)
+    game.add_listener(ratings.on_game_event)
+    game.add_listener(tournament.on_game_event)
+    game.add_listener(stats.on_game_event)
+    history.start()
+    ratings.start()
+    shards.start()
+    presence_task = asyncio.create_task(expire_presence())
+    lag_task = asyncio.create_task(executor.watch_loop_lag())
+    yield
+    presence_task.cancel()
+    lag_task.cancel()
+    executor.shutdown()
+    shards.stop()
+    history.stop()
+    ratings.stop()
+
+
+app = FastAPI(title="GeoBluff", lifespan=lifespan)
+
+@app.middleware("http")
+async def admission_control(request: Request, call_next):
+    """Rate limit API calls per client and IP, and shed polls under overload."""
+    if not request.url.path.startswith("/api/"):
+        return await call_next(request)
+
+    client_id = request.headers.get("x-client-id") or request.query_params.get("client_id")
+    ip = request.client.host if request.client else "unknown"
+    rejected = ratelimit.admit(request.method, request.url.path, ip, client_id)
+    if rejected:
+        status_code, retry_after = rejected
+        response = wire.encode_response(request, {"error": "Too many requests"}, status_code)
+        response.headers["Retry-After"] = str(retry_after)
+        return response
+
+    ratelimit.request_started()
+    try:
+        return await call_next(request)
+    finally:
+        ratelimit.request_finished()
+
+
+@app.exception_handler(shards.ShardUnavailable)
+async def shard_unavailable(request: Request, exc: shards.ShardUnavailable):
+    """A shard restarted during the call: the client retries like under load."""
+    response = wire.encode_response(request, {"error": "Engine restarting"}, 503)
+    response.headers["Retry-After"] = "1"
+    return response
+
+
+# Static files, pages and rules are hashed and compressed once at startup, with the
+# country bundle that lets the browser deal hot-seat games by itself
+assets.build(RULES_FILES, {"countries.bundle.json": wire.dumps_json(game.local_bundle())})
+capitals.build(game.COUNTRIES)
 
 
 class GameRequest(BaseModel):
@@ -61,6 +140,20 @@ class NewGameRequest(BaseModel):
     language: Optional[str] = None
     game_id: Optional[str] = None
     category_set: Optional[str] = None
+    min_gap: Optional[float] = None  # Minimum relative gap between dealt values
+    mode: str = "local"  # "online" rooms are listed in the lobby
+    year: Optional[int] = None  # Reference year of the values, latest values if unset
+    teams: int = 2  # Seats around the table, from 2 to 8
+    deck: Optional[str] = None  # Deck to deal from, countries if unset
+
+
+class QuickMatchRequest(BaseModel):
+    client_id: str
+    cards_per_player: int = 7
+    language: Optional[str] = None
+    category_set: Optional[str] = None
+    teams: int = 2  # Seats around the table, from 2 to 8
+    deck: Optional[str] = None
 
 
 class SetLanguageRequest(BaseModel):
@@ -72,142 +165,440 @@ class ChangeCategoryRequest(BaseModel):
     game_id: str
 
 
+class HeartbeatRequest(BaseModel):
+    game_id: str
+    client_id: str
+    leaving: bool = False
+
+
+class TournamentRequest(BaseModel):
+    name: Optional[str] = None
+    teams: List[str]  # Team names, best seed first
+    cards_per_player: int = 7
+    language: Optional[str] = None
+    category_set: Optional[str] = None
+    min_gap: Optional[float] = None
+    year: Optional[int] = None
+    deck: Optional[str] = None
+
+
+async def action_response(request, result):
+    """Encode an action result, projected for the calling client in online rooms."""
+    if "error" in result:
+        return wire.encode_response(request, result, status_code=400)
+    if result.get("mode") == "online":
+        # Engine actions return the shared view: the caller sees its own hand and actions
+        client_id = request.headers.get("x-client-id")
+        game_id = result["game_id"]
+        result = await executor.run_ordered(
+            game_id, game.get_state, game_id, client_id=client_id
+        ) or result
+    return wire.encode_response(request, result)
+
+
+async def run_action(request, run, action, player, func, game_id, *args):
+    """Run an engine action as the calling client and encode its result.
+
+    `run` is executor.run_ordered or run_in_pool; in online rooms the action
+    is checked against the seat of the client sending it (see game.act).
+    """
+    client_id = request.headers.get("x-client-id")
+    result = await run(game_id, game.act, game_id, client_id, action, player, func, *args)
+    return await action_response(request, result)
+
+
 @app.get("/")
 async def index(request: Request):
     """Serve the game page."""
-    return templates.TemplateResponse("index.html", {"request": request})
+    return assets.asset_response(request, assets.pages["index.html"], assets.REVALIDATE_CACHE)
+
+
+@app.get("/sw.js")
+async def service_worker(request: Request):
+    """Serve the service worker from the root so it controls the whole site."""
+    return assets.asset_response(request, assets.pages["sw.js"], assets.REVALIDATE_CACHE)
+
+
+@app.get("/manifest.webmanifest")
+async def manifest(request: Request):
+    """Serve the web app manifest."""
+    return assets.asset_response(request, assets.pages["manifest.webmanifest"], assets.REVALIDATE_CACHE)
+
+
+@app.get("/static/{path:path}")
+async def static_file(request: Request, path: str):
+    """Serve a static file, fingerprinted names are cached forever."""
+    if path in assets.fingerprinted:
+        asset = assets.static_assets[assets.fingerprinted[path]]
+        return assets.asset_response(request, asset, assets.IMMUTABLE_CACHE)
+    if path in assets.static_assets:
+        return assets.asset_response(request, assets.static_assets[path], assets.REVALIDATE_CACHE)
+    return PlainTextResponse("Not found", status_code=404)
 
 
 @app.get("/api/rules")
-async def get_rules(lang: Optional[str] = None):
-    """Get game rules from markdown file."""
+async def get_rules(request: Request, lang: Optional[str] = None):
+    """Get game rules, negotiated by language."""
+    if not lang:
+        accept_language = request.headers.get("accept-language", "")
+        lang = accept_language.split(",")[0].split("-")[0]
     language = game.normalize_language(lang)
-    rules_file = RULES_FILES.get(language, RULES_FILES["fr"])
-    if rules_file.exists():
-        content = rules_file.read_text(encoding="utf-8")
-        return PlainTextResponse(content)
+    asset = assets.rules.get(language) or assets.rules.get("fr")
+    if asset:
+        vary = ("Accept-Encoding", "Accept-Language")
+        return assets.asset_response(request, asset, assets.REVALIDATE_CACHE, vary=vary)
     fallback = "Regles non disponibles" if language == "fr" else "Rules not available"
     return PlainTextResponse(fallback)
 
 
+@app.get("/api/capitals/suggest")
+async def suggest_capitals(
+    request: Request, q: str = "", limit: int = capitals.MAX_SUGGESTIONS, deck: Optional[str] = None
+):
+    """Capital completions for the capital answer box (the deck's secret for other decks)."""
+    if deck and deck not in capitals.indexes:
+        # A large deck's first index build must not block the loop
+        suggestions = await executor.run_in_pool(None, capitals.suggest, q, limit, deck)
+    else:
+        suggestions = capitals.suggest(q, limit, deck)
+    return wire.encode_response(request, {"suggestions": suggestions})
+
+
+@app.get("/api/decks")
+async def list_decks(request: Request):
+    """Decks a game can be dealt from."""
+    return wire.encode_response(request, {"decks": decks.describe()})
+
+
+@app.get("/api/years")
+async def list_years(request: Request):
+    """Reference years a countries game can be played in (empty without yearly data)."""
+    # Every year's playable pool is scanned on first use
+    years = await executor.run_in_pool(None, game.available_years)
+    return wire.encode_response(request, {"years": years})
+
+
 @app.post("/api/new-game")
-async def new_game(req: Optional[NewGameRequest] = Body(default=None)):
+async def new_game(request: Request, req: Optional[NewGameRequest] = Body(default=None)):
     """Start a new game."""
     cards = req.cards_per_player if req else 7
     language = req.language if req else None
     game_id = req.game_id if req else None
     category_set = req.category_set if req else None
-    return game.new_game(cards, language=language, game_id=game_id, category_set=category_set)
+    min_gap = req.min_gap if req else None
+    mode = req.mode if req else "local"
+    year = req.year if req else None
+    teams = req.teams if req else 2
+    deck = req.deck if req else None
+    result = await executor.run_in_pool(
+        game_id, game.new_game,
+        cards, language=language, game_id=game_id, category_set=category_set, min_gap=min_gap,
+        mode=mode, year=year, teams=teams, deck=deck
+    )
+    if result["mode"] == "online":
+        client_id = request.headers.get("x-client-id")
+        lobby.open_room(
+            result["game_id"], result["category_set"], result["cards_per_player"], result["language"],
+            host=client_id, teams=result["teams"], deck=result["deck"]
+        )
+        # The creator takes the first seat and only sees that hand
+        game_id = result["game_id"]
+        if await executor.run_ordered(game_id, game.join_seat, game_id, client_id):
+            lobby.seat_taken(game_id, client_id)
+            result = await executor.run_ordered(game_id, game.get_state, game_id, client_id=client_id)
+    return wire.encode_response(request, result)
+
+
+@app.post("/api/quick-match")
+async def quick_match(request: Request, req: QuickMatchRequest):
+    """Join the longest-waiting matching room, or open a new one and wait."""
+    language = game.normalize_language(req.language)
+    category_set = req.category_set if req.category_set in game.CATEGORY_SETS else None
+    cards = max(3, min(req.cards_per_player, 10))
+    deck = decks.normalize_deck(req.deck)
+    teams = game.normalize_teams(req.teams)
+    game_id = lobby.quick_match(
+        category_set, cards, language, client_id=req.client_id, deck=deck, teams=teams
+    )
+    if game_id is not None:
+        presence.heartbeat(game_id, req.client_id)
+        await executor.run_ordered(game_id, game.join_seat, game_id, req.client_id)
+        state = await executor.run_ordered(game_id, game.get_state, game_id, client_id=req.client_id)
+        if state is not None:
+            return wire.encode_response(request, {**state, "matched": True})
+
+    state = await executor.run_in_pool(
+        None, game.new_game, cards, language=language, category_set=category_set, mode="online",
+        teams=teams, deck=deck
+    )
+    lobby.open_room(
+        state["game_id"], state["category_set"], state["cards_per_player"], language,
+        host=req.client_id, teams=state["teams"], deck=state["deck"]
+    )
+    presence.heartbeat(state["game_id"], req.client_id)
+    game_id = state["game_id"]
+    await executor.run_ordered(game_id, game.join_seat, game_id, req.client_id)
+    state = await executor.run_ordered(game_id, game.get_state, game_id, client_id=req.client_id)
+    return wire.encode_response(request, {**state, "matched": False})
+
+
+@app.get("/api/lobby")
+async def list_lobby(
+    request: Request,
+    category_set: Optional[str] = None,
+    cards_per_player: Optional[int] = None,
+    language: Optional[str] = None,
+    offset: int = 0,
+    limit: int = 20,
+    deck: Optional[str] = None,
+    teams: Optional[int] = None
+):
+    """List open rooms waiting for more players."""
+    result = lobby.list_rooms(
+        category_set, cards_per_player, language, offset=offset, limit=limit, deck=deck,
+        teams=teams
+    )
+    return wire.encode_response(request, result)
+
+
+@app.get("/api/leaderboard")
+async def leaderboard(
+    request: Request,
+    category: Optional[str] = None,
+    limit: int = 20,
+    client_id: Optional[str] = None
+):
+    """Top rated players overall or for one category, with the caller's own rating."""
+    board = category or ratings.OVERALL
+    result = {"board": board, "leaders": ratings.leaderboard(board, limit)}
+    if client_id:
+        result["me"] = ratings.rating_of(client_id, board)
+    return wire.encode_response(request, result)
+
+
+@app.get("/api/metrics")
+async def metrics(request: Request):
+    """Engine pool, shards, event loop lag and background writer counters."""
+    result = {
+        "executor": executor.snapshot(),
+        "shards": shards.snapshot(),
+        "inflight": ratelimit.inflight,
+        "history": history.stats,
+        "ratings": ratings.stats
+    }
+    return wire.encode_response(request, result)
+
+
+def is_admin(request):
+    """Admin pages need GEOBLUFF_ADMIN_TOKEN when it is set, else a local client."""
+    if ADMIN_TOKEN:
+        token = request.headers.get("x-admin-token") or request.query_params.get("token")
+        return token == ADMIN_TOKEN
+    return request.client is not None and request.client.host in LOCAL_HOSTS
+
+
+@app.get("/admin")
+async def admin_page(request: Request):
+    """Serve the operator dashboard."""
+    if not is_admin(request):
+        return PlainTextResponse("Forbidden", status_code=403)
+    return assets.asset_response(request, assets.pages["admin.html"], assets.REVALIDATE_CACHE)
+
+
+@app.get("/api/admin/stats")
+async def admin_stats(request: Request, recent: int = 50):
+    """Live game counters by phase, mode, language and category set, and recent transitions."""
+    if not is_admin(request):
+        return wire.encode_response(request, {"error": "Forbidden"}, status_code=403)
+    result = {**stats.snapshot(recent), "waiting_rooms": len(lobby.open_rooms)}
+    return wire.encode_response(request, result)
+
 
 @app.post("/api/set-language")
-async def set_language(req: SetLanguageRequest):
+async def set_language(request: Request, req: SetLanguageRequest):
     """Set current language for the game."""
-    return game.set_language(req.game_id, req.language)
+    result = await executor.run_ordered(req.game_id, game.set_language, req.game_id, req.language)
+    return await action_response(request, result)
+
+
+@app.get("/api/wire-keys")
+async def wire_keys(request: Request):
+    """Short field keys used by the MessagePack representation."""
+    return wire.encode_response(request, wire.SHORT_KEYS)
+
+
+@app.post("/api/heartbeat")
+async def heartbeat(request: Request, req: HeartbeatRequest):
+    """Keep a client present in a game (or remove it when leaving), seating it in online rooms."""
+    seat = None
+    if req.leaving:
+        presence.leave(req.game_id, req.client_id)
+    else:
+        presence.heartbeat(req.game_id, req.client_id)
+        seat = await executor.run_ordered(req.game_id, game.join_seat, req.game_id, req.client_id)
+        if seat:
+            lobby.seat_taken(req.game_id, req.client_id)
+    result = {
+        "active_clients": presence.count(req.game_id),
+        "other_present": presence.other_present(req.game_id, req.client_id),
+        "seat": seat
+    }
+    return wire.encode_response(request, result)
 
 
 @app.get("/api/game-state")
-async def game_state(game_id: str, client_id: Optional[str] = None):
+async def game_state(request: Request, game_id: str, client_id: Optional[str] = None):
     """Get current game state."""
-    state = game.get_state(game_id, client_id=client_id)
+    state = await executor.run_ordered(game_id, game.get_state, game_id, client_id=client_id)
     if state is None:
-        return JSONResponse({"error": "No game in progress"}, status_code=404)
-    return state
+        return wire.encode_response(request, {"error": "No game in progress"}, status_code=404)
+    return wire.encode_response(request, state)
+
+
+@app.get("/bench")
+async def bench_page(request: Request):
+    """Serve the in-browser render benchmark."""
+    return assets.asset_response(request, assets.pages["bench.html"], assets.REVALIDATE_CACHE)
+
+
+@app.get("/tournament")
+async def tournament_page(request: Request):
+    """Serve the tournament organizer page."""
+    return assets.asset_response(request, assets.pages["tournament.html"], assets.REVALIDATE_CACHE)
+
+
+@app.post("/api/tournaments")
+async def create_tournament(request: Request, req: TournamentRequest):
+    """Create an elimination bracket and deal its first round."""
+    result = await executor.run_in_pool(
+        None, tournament.create, req.name, req.teams,
+        cards_per_player=req.cards_per_player, language=req.language,
+        category_set=req.category_set, min_gap=req.min_gap, year=req.year, deck=req.deck
+    )
+    if "error" in result:
+        return wire.encode_response(request, result, status_code=400)
+    return wire.encode_response(request, result)
+
+
+@app.get("/api/tournament")
+async def get_tournament(request: Request, tournament_id: str):
+    """Get a bracket, one cached body per bracket version."""
+    frame = tournament.get_frame(tournament_id, wire.wants_msgpack(request))
+    if frame is None:
+        return wire.encode_response(request, {"error": "No such tournament"}, status_code=404)
+    return wire.frame_response(request, frame)
+
+
+@app.get("/api/tournament/seats")
+async def get_tournament_seats(request: Request, tournament_id: str):
+    """Seat tokens of a bracket's games (its join links), for the organizer's key only."""
+    seats = tournament.seat_tokens(tournament_id, request.headers.get("x-organizer-key"))
+    if seats is None:
+        return wire.encode_response(request, {"error": "Organizer key required"}, status_code=403)
+    response = wire.encode_response(request, {"seats": seats})
+    response.headers["Cache-Control"] = "no-store"
+    return response
+
+
+@app.get("/api/spectate")
+async def spectate(request: Request, game_id: str):
+    """Get the shared spectator view of a game (hands hidden, not counted as present)."""
+    frame = await executor.run_ordered(
+        game_id, spectators.get_frame, game_id, wire.wants_msgpack(request)
+    )
+    if frame is None:
+        return wire.encode_response(request, {"error": "No game in progress"}, status_code=404)
+    return wire.frame_response(request, frame)
 
 
 @app.post("/api/play-card")
-async def play_card(req: PlayCardRequest):
+async def play_card(request: Request, req: PlayCardRequest):
     """Play a card."""
-    result = game.play_card(req.game_id, req.player, req.card_name)
-    if "error" in result:
-        return JSONResponse(result, status_code=400)
-    return result
+    return await run_action(
+        request, executor.run_ordered, "play_card", req.player,
+        game.play_card, req.game_id, req.player, req.card_name
+    )
 
 
 @app.post("/api/call-bluff")
-async def call_bluff(req: BluffRequest):
+async def call_bluff(request: Request, req: BluffRequest):
     """Call bluff."""
-    result = game.call_bluff(req.game_id, req.player)
-    if "error" in result:
-        return JSONResponse(result, status_code=400)
-    return result
+    return await run_action(
+        request, executor.run_ordered, "call_bluff", req.player, game.call_bluff, req.game_id, req.player
+    )
 
 
 @app.post("/api/reveal-card")
-async def reveal_card(req: RevealCardRequest):
+async def reveal_card(request: Request, req: RevealCardRequest):
     """Reveal a specific card during bluff."""
-    result = game.reveal_card(req.game_id, req.index)
-    if "error" in result:
-        return JSONResponse(result, status_code=400)
-    return result
+    return await run_action(
+        request, executor.run_ordered, "reveal_card", None, game.reveal_card, req.game_id, req.index
+    )
 
 
 @app.post("/api/check-capital")
-async def check_capital(req: CapitalRequest):
+async def check_capital(request: Request, req: CapitalRequest):
     """Check capital answer."""
-    result = game.check_capital_answer(req.game_id, req.player, req.answer)
-    if "error" in result:
-        return JSONResponse(result, status_code=400)
-    return result
+    return await run_action(
+        request, executor.run_in_pool, "check_capital", req.player,
+        game.check_capital_answer, req.game_id, req.player, req.answer
+    )
 
 
 @app.post("/api/set-position")
-async def set_position(req: PositionRequest):
+async def set_position(request: Request, req: PositionRequest):
     """Set position for pending card."""
-    result = game.set_position(req.game_id, req.position)
-    if "error" in result:
-        return JSONResponse(result, status_code=400)
-    return result
+    return await run_action(
+        request, executor.run_ordered, "set_position", None, game.set_position, req.game_id, req.position
+    )
 
 
 @app.post("/api/validate-placement")
-async def validate_placement(req: GameRequest):
+async def validate_placement(request: Request, req: GameRequest):
     """Validate card placement and end turn."""
-    result = game.validate_placement(req.game_id)
-    if "error" in result:
-        return JSONResponse(result, status_code=400)
-    return result
+    return await run_action(
+        request, executor.run_ordered, "validate_placement", None, game.validate_placement, req.game_id
+    )
 
 
 @app.post("/api/cancel-placement")
-async def cancel_placement(req: GameRequest):
+async def cancel_placement(request: Request, req: GameRequest):
     """Cancel placement and return card to hand."""
-    result = game.cancel_placement(req.game_id)
-    if "error" in result:
-        return JSONResponse(result, status_code=400)
-    return result
+    return await run_action(
+        request, executor.run_ordered, "cancel_placement", None, game.cancel_placement, req.game_id
+    )
 
 
 @app.post("/api/capital-decision")
-async def capital_decision(req: CapitalDecisionRequest):
+async def capital_decision(request: Request, req: CapitalDecisionRequest):
     """Opponent decides if capital answer is acceptable."""
-    result = game.validate_capital_decision(req.game_id, req.accepted)
-    if "error" in result:
-        return JSONResponse(result, status_code=400)
-    return result
+    return await run_action(
+        request, executor.run_in_pool, "capital_decision", None,
+        game.validate_capital_decision, req.game_id, req.accepted
+    )
 
 
 @app.post("/api/change-category")
-async def change_category(req: ChangeCategoryRequest):
+async def change_category(request: Request, req: ChangeCategoryRequest):
     """Change to a different category."""
-    result = game.change_category(req.game_id)
-    if "error" in result:
-        return JSONResponse(result, status_code=400)
-    return result
+    return await run_action(
+        request, executor.run_ordered, "change_category", None, game.change_category, req.game_id
+    )
 
 
 @app.post("/api/continue-after-bluff")
-async def continue_after_bluff(req: GameRequest):
+async def continue_after_bluff(request: Request, req: GameRequest):
     """Continue game after viewing bluff result."""
-    result = game.continue_after_bluff(req.game_id)
-    if "error" in result:
-        return JSONResponse(result, status_code=400)
-    return result
+    return await run_action(
+        request, executor.run_in_pool, "continue_after_bluff", None,
+        game.continue_after_bluff, req.game_id
+    )
 
 
 @app.post("/api/continue-after-final-validation")
-async def continue_after_final_validation(req: GameRequest):
+async def continue_after_final_validation(request: Request, req: GameRequest):
     """Continue game after failed final validation."""
-    result = game.continue_after_final_validation(req.game_id)
-    if "error" in result:
-        return JSONResponse(result, status_code=400)
-    return result
+    return await run_action(
+        request, executor.run_in_pool, "continue_after_final_validation", None,
+        game.continue_after_final_validation, req.game_id
+    )
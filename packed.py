@@ -0,0 +1,203 @@
+"""Memory-mapped card tables for GeoBluff.
+
+countries.json is packed once into countries.bin, a fixed layout that every
+worker process maps read-only: numeric columns are read in place as arrays
+and strings live in a blob indexed by (offset, length) spans, so N workers
+share the same physical pages instead of each parsing its own copy. Cards
+are small row proxies that read their fields from the mapping on access.
+
+Layout: magic, header length (4 bytes, little endian), JSON header, then
+one 8-byte aligned block per column, in the machine's byte order:
+  "d"  float64 per card, NaN when missing
+  "q"  int64 per card, INT_MISSING when missing
+  "s"  int64 (offset, length) per card, then the UTF-8 blob; length -1 when missing
+  "l"  like "s", list items joined with LIST_SEPARATOR
+"""
+import json
+import math
+import mmap
+import os
+import sys
+from array import array
+from collections.abc import Mapping
+
+MAGIC = b"GBC1"
+ALIGN = 8
+INT_MISSING = -(1 << 63)
+LIST_SEPARATOR = "\x1f"
+
+
+def is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def column_kind(values):
+    """Storage of a column; mostly numeric columns stay numeric (stray text is missing)."""
+    present = [v for v in values if v is not None]
+    numbers = [v for v in present if is_number(v)]
+    if present and len(numbers) * 2 > len(present):
+        return "q" if all(isinstance(v, int) for v in numbers) else "d"
+    if present and all(isinstance(v, list) for v in present):
+        return "l"
+    return "s"
+
+
+def pack_column(kind, values):
+    if kind == "d":
+        return array("d", [float(v) if is_number(v) else math.nan for v in values]).tobytes()
+    if kind == "q":
+        return array("q", [v if is_number(v) else INT_MISSING for v in values]).tobytes()
+    spans = array("q")
+    blob = bytearray()
+    for value in values:
+        if value is None:
+            spans.extend((0, -1))
+            continue
+        text = LIST_SEPARATOR.join(map(str, value)) if kind == "l" else str(value)
+        encoded = text.encode("utf-8")
+        spans.extend((len(blob), len(encoded)))
+        blob += encoded
+    return spans.tobytes() + bytes(blob)
+
+
+def write(cards, path, stamp=None):
+    """Pack a list of card dicts into `path`, replacing it atomically.
+
+    `stamp` identifies the source (see load), so a stale table is rebuilt.
+    """
+    names = list(dict.fromkeys(key for card in cards for key in card))
+    columns = []
+    chunks = []
+    offset = 0
+    for name in names:
+        values = [card.get(name) for card in cards]
+        kind = column_kind(values)
+        data = pack_column(kind, values)
+        padding = -len(data) % ALIGN
+        columns.append({"name": name, "kind": kind, "offset": offset, "size": len(data)})
+        chunks.extend((data, b"\0" * padding))
+        offset += len(data) + padding
+    header = json.dumps({
+        "byteorder": sys.byteorder,
+        "count": len(cards),
+        "stamp": stamp,
+        "columns": columns
+    }).encode("utf-8")
+    prefix = MAGIC + len(header).to_bytes(4, "little") + header
+    prefix += b"\0" * (-len(prefix) % ALIGN)
+    # Other workers may be mapping the current file: write aside, then swap names
+    temporary = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(temporary, "wb") as f:
+        f.write(prefix)
+        f.writelines(chunks)
+    os.replace(temporary, path)
+
+
+class Table:
+    """A mapped card table: column name -> (kind, int64/float64 view, blob start)."""
+
+    def __init__(self, buffer, header, start):
+        self.buffer = buffer
+        self.count = header["count"]
+        self.columns = {}
+        for column in header["columns"]:
+            base = start + column["offset"]
+            kind = column["kind"]
+            width = 2 * self.count if kind in "sl" else self.count
+            view = buffer[base:base + 8 * width].cast(kind if kind in "dq" else "q")
+            self.columns[column["name"]] = (kind, view, base + 8 * width)
+
+    def value(self, name, index):
+        """Field of a card, None when the column or the value is missing."""
+        column = self.columns.get(name)
+        if column is None:
+            return None
+        kind, view, blob = column
+        if kind == "d":
+            value = view[index]
+            return None if math.isnan(value) else value
+        if kind == "q":
+            value = view[index]
+            return None if value == INT_MISSING else value
+        offset, length = view[2 * index], view[2 * index + 1]
+        if length < 0:
+            return None
+        text = str(self.buffer[blob + offset:blob + offset + length], "utf-8")
+        if kind == "l":
+            return text.split(LIST_SEPARATOR) if text else []
+        return text
+
+    def rows(self):
+        return [Row(self, index) for index in range(self.count)]
+
+
+class Row(Mapping):
+    """Read-only card proxy: a row of a mapped table that reads like a dict.
+
+    The name is decoded once: it is the card's identity, looked up on every
+    projection, and the process keeps it anyway as a key of its name index.
+    """
+
+    __slots__ = ("table", "index", "name")
+
+    def __init__(self, table, index):
+        self.table = table
+        self.index = index
+        self.name = table.value("name", index)
+
+    def __getitem__(self, key):
+        if key == "name" and self.name is not None:
+            return self.name
+        value = self.table.value(key, self.index)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def get(self, key, default=None):
+        value = self.table.value(key, self.index)
+        return default if value is None else value
+
+    def __contains__(self, key):
+        return self.table.value(key, self.index) is not None
+
+    def __iter__(self):
+        return (name for name in self.table.columns if name in self)
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __bool__(self):
+        return True
+
+    def __eq__(self, other):
+        if isinstance(other, Row):
+            return self.table is other.table and self.index == other.index
+        return Mapping.__eq__(self, other)
+
+    def __hash__(self):
+        return hash((id(self.table), self.index))
+
+    def __repr__(self):
+        return f"Row({dict(self)!r})"
+
+
+def load(path, stamp=None):
+    """Map a packed table read-only, or None if it is missing, stale or unreadable here."""
+    try:
+        with open(path, "rb") as f:
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    buffer = memoryview(mapping)
+    if bytes(buffer[:len(MAGIC)]) != MAGIC:
+        return None
+    length = int.from_bytes(buffer[len(MAGIC):len(MAGIC) + 4], "little")
+    start = len(MAGIC) + 4 + length
+    try:
+        header = json.loads(bytes(buffer[len(MAGIC) + 4:start]))
+        if header["byteorder"] != sys.byteorder or (stamp is not None and header["stamp"] != stamp):
+            return None
+        return Table(buffer, header, start + (-start % ALIGN))
+    except (ValueError, KeyError, TypeError):
+        # Truncated or foreign file: the caller packs it again
+        return None
@@ -0,0 +1,95 @@
+"""Presence tracking for GeoBluff rooms.
+
+Clients send heartbeats; each heartbeat schedules the client's expiry in a
+hashed timing wheel shared by every room. Advancing the wheel only visits the
+slots whose time has come, and reads are plain lookups of precomputed counts.
+"""
+import time
+
+PRESENCE_TIMEOUT_SECONDS = 6
+TICK_SECONDS = 0.5
+TIMEOUT_TICKS = int(PRESENCE_TIMEOUT_SECONDS / TICK_SECONDS)
+WHEEL_SIZE = 64  # Must stay above TIMEOUT_TICKS so a slot never holds two laps
+
+rooms = {}  # Dict of game_id -> {client_id: deadline tick}
+wheel = [set() for _ in range(WHEEL_SIZE)]  # Slot -> {(game_id, client_id)}
+listeners = []  # Callbacks (event, game_id, client_id) for "join" / "leave"
+current_tick = None
+
+
+def now_tick(now=None):
+    return int((time.monotonic() if now is None else now) / TICK_SECONDS)
+
+
+def add_listener(callback):
+    listeners.append(callback)
+
+
+def emit(event, game_id, client_id):
+    for callback in listeners:
+        callback(event, game_id, client_id)
+
+
+def expire(game_id, client_id):
+    clients = rooms.get(game_id)
+    if clients is None or clients.pop(client_id, None) is None:
+        return
+    if not clients:
+        del rooms[game_id]
+    emit("leave", game_id, client_id)
+
+
+def advance(now=None):
+    """Expire every client whose deadline has passed, one wheel slot per tick."""
+    global current_tick
+
+    target = now_tick(now)
+    if current_tick is None:
+        current_tick = target
+        return
+    # After a long pause every slot is due, there is no need to walk each lap
+    start = max(current_tick + 1, target - WHEEL_SIZE + 1)
+    for tick in range(start, target + 1):
+        slot = wheel[tick % WHEEL_SIZE]
+        for entry in list(slot):
+            game_id, client_id = entry
+            deadline = rooms.get(game_id, {}).get(client_id)
+            if deadline is None or deadline % WHEEL_SIZE != tick % WHEEL_SIZE:
+                slot.discard(entry)  # Stale entry: the client left or was refreshed
+            elif deadline <= target:
+                slot.discard(entry)
+                expire(game_id, client_id)
+    current_tick = max(current_tick, target)
+
+
+def heartbeat(game_id, client_id, now=None):
+    """Record that a client is alive in a room."""
+    advance(now)
+    clients = rooms.setdefault(game_id, {})
+    joined = client_id not in clients
+    deadline = current_tick + TIMEOUT_TICKS
+    clients[client_id] = deadline
+    wheel[deadline % WHEEL_SIZE].add((game_id, client_id))
+    if joined:
+        emit("join", game_id, client_id)
+
+
+def leave(game_id, client_id):
+    """Explicitly remove a client (closing the tab, leaving the room)."""
+    expire(game_id, client_id)
+
+
+def remove_room(game_id):
+    for client_id in list(rooms.get(game_id, ())):
+        expire(game_id, client_id)
+
+
+def count(game_id):
+    return len(rooms.get(game_id, ()))
+
+
+def other_present(game_id, client_id=None):
+    clients = rooms.get(game_id, ())
+    if client_id:
+        return len(clients) - (client_id in clients) > 0
+    return len(clients) > 1
@@ -0,0 +1,81 @@
+"""Admission control for GeoBluff: per-client and per-IP token buckets, load shedding.
+
+Polls (GET requests and heartbeats) are cheap to retry, so they get tighter
+limits and are shed first when too many requests are in flight. Moves are
+only rate limited, never shed, so they keep their latency under load.
+"""
+import time
+from collections import OrderedDict
+
+MAX_TRACKED_KEYS = 10000  # Per limiter, least recently seen keys are dropped
+MAX_INFLIGHT = 64  # Above this many requests in flight, polls are shed
+MAX_LOOP_LAG = 0.2  # Seconds of average event loop lag above which polls are shed
+SHED_RETRY_AFTER = 2
+LOW_PRIORITY_POSTS = {"/api/heartbeat"}
+
+
+class TokenBuckets:
+    """Token buckets keyed by client, kept in a bounded LRU."""
+
+    def __init__(self, rate, burst, max_keys=MAX_TRACKED_KEYS):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self.buckets = OrderedDict()  # key -> [tokens, last refill time]
+
+    def take(self, key, now=None):
+        """Spend one token, returning 0 if allowed or the seconds to wait."""
+        now = time.monotonic() if now is None else now
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = [self.burst, now]
+            self.buckets[key] = bucket
+            if len(self.buckets) > self.max_keys:
+                self.buckets.popitem(last=False)
+        else:
+            self.buckets.move_to_end(key)
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+        if bucket[0] >= 1:
+            bucket[0] -= 1
+            return 0
+        return (1 - bucket[0]) / self.rate
+
+
+# Per-IP limits are looser: a classroom shares one address
+limiters = {
+    "poll": {"client": TokenBuckets(5, 10), "ip": TokenBuckets(60, 120)},
+    "action": {"client": TokenBuckets(8, 20), "ip": TokenBuckets(120, 240)}
+}
+inflight = 0
+loop_lag = 0.0  # Updated by executor.watch_loop_lag
+
+
+def is_poll(method, path):
+    return method == "GET" or path in LOW_PRIORITY_POSTS
+
+
+def admit(method, path, ip, client_id=None):
+    """Return None to admit a request, or (status code, retry after seconds)."""
+    priority = "poll" if is_poll(method, path) else "action"
+    if priority == "poll" and (inflight >= MAX_INFLIGHT or loop_lag >= MAX_LOOP_LAG):
+        return 503, SHED_RETRY_AFTER
+
+    limiter = limiters[priority]
+    waits = [limiter["ip"].take(ip)]
+    if client_id:
+        waits.append(limiter["client"].take(client_id))
+    wait = max(waits)
+    if wait > 0:
+        return 429, max(1, int(wait + 0.999))
+    return None
+
+
+def request_started():
+    global inflight
+    inflight += 1
+
+
+def request_finished():
+    global inflight
+    inflight -= 1
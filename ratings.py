@@ -0,0 +1,169 @@
+"""Elo ratings and leaderboards for GeoBluff.
+
+Ratings are kept per client (won games) and per category (won rounds). Game
+events are queued and applied by a background thread (see batches.py), which
+also batches the changed rows into SQLite and republishes the top of each
+leaderboard, so requests only read an in-memory snapshot.
+"""
+import hashlib
+import os
+import sqlite3
+from bisect import bisect_left, insort
+from pathlib import Path
+
+import batches
+
+DB_PATH = Path(os.environ.get("GEOBLUFF_RATINGS_DB", Path(__file__).parent / "ratings.sqlite3"))
+OVERALL = "overall"
+INITIAL_RATING = 1500
+K_FACTOR = 32
+TOP_K = 100
+QUEUE_SIZE = 10000
+BATCH_SIZE = 500
+FLUSH_SECONDS = 2
+
+ratings = {}  # Dict of (board, client_id) -> [rating, games], written by the worker only
+ranked = {}  # Dict of board -> sorted list of (-rating, client_id), worker only
+leaderboards = {}  # Dict of board -> tuple of top entries, replaced whole on update
+stats = {"queued": 0, "dropped": 0, "applied": 0}
+
+
+def player_tag(client_id):
+    """Public alias for a client: the client id itself claims seats, never show it."""
+    return hashlib.sha256(client_id.encode()).hexdigest()[:8]
+
+
+def on_game_event(event, payload):
+    """game.py listener: turn finished games and rounds into rating results.
+
+    A game's winner beats every other seated team; a round is won by one team
+    against one other (the bluff caller and the player it called).
+    """
+    clients = payload.get("clients") or []
+    if event == "game_over":
+        board, winner = OVERALL, payload["winner"]
+        losers = [player for player in range(1, len(clients) + 1) if player != winner]
+    elif event == "round_over" and payload.get("loser") and payload.get("winner"):
+        board, winner, losers = payload["category"], payload["winner"], [payload["loser"]]
+    else:
+        return
+    if not winner or winner > len(clients) or not clients[winner - 1]:
+        return
+    for loser in losers:
+        loser_client = clients[loser - 1]
+        if not loser_client or loser_client == clients[winner - 1]:
+            continue  # Hot-seat games and unclaimed seats are not rated
+        if batches.put(worker, (board, clients[winner - 1], loser_client)):
+            stats["queued"] += 1
+        else:
+            stats["dropped"] += 1
+
+
+def expected_score(rating, opponent):
+    return 1 / (1 + 10 ** ((opponent - rating) / 400))
+
+
+def set_rating(board, client_id, rating, games):
+    """Update a rating and its position in the board's ranking."""
+    entries = ranked.setdefault(board, [])
+    previous = ratings.get((board, client_id))
+    if previous is not None:
+        index = bisect_left(entries, (-previous[0], client_id))
+        if index < len(entries) and entries[index][1] == client_id:
+            entries.pop(index)
+    ratings[(board, client_id)] = [rating, games]
+    insort(entries, (-rating, client_id))
+
+
+def apply_result(board, winner, loser):
+    winner_rating, winner_games = ratings.get((board, winner), (INITIAL_RATING, 0))
+    loser_rating, loser_games = ratings.get((board, loser), (INITIAL_RATING, 0))
+    delta = K_FACTOR * (1 - expected_score(winner_rating, loser_rating))
+    set_rating(board, winner, winner_rating + delta, winner_games + 1)
+    set_rating(board, loser, loser_rating - delta, loser_games + 1)
+
+
+def publish(board):
+    top = []
+    for position, (negative_rating, client_id) in enumerate(ranked.get(board, ())[:TOP_K], 1):
+        top.append({
+            "rank": position,
+            "player": player_tag(client_id),
+            "rating": round(-negative_rating),
+            "games": ratings[(board, client_id)][1]
+        })
+    leaderboards[board] = tuple(top)
+
+
+def open_db():
+    db = sqlite3.connect(DB_PATH)
+    db.execute(
+        "CREATE TABLE IF NOT EXISTS ratings ("
+        "board TEXT NOT NULL, client_id TEXT NOT NULL, rating REAL NOT NULL, "
+        "games INTEGER NOT NULL, PRIMARY KEY (board, client_id))"
+    )
+    return db
+
+
+def load(db):
+    for board, client_id, rating, games in db.execute("SELECT board, client_id, rating, games FROM ratings"):
+        set_rating(board, client_id, rating, games)
+    for board in ranked:
+        publish(board)
+
+
+def save(db, rows):
+    db.executemany(
+        "INSERT INTO ratings (board, client_id, rating, games) VALUES (?, ?, ?, ?) "
+        "ON CONFLICT (board, client_id) DO UPDATE SET rating = excluded.rating, games = excluded.games",
+        rows
+    )
+    db.commit()
+
+
+def open_and_load():
+    db = open_db()
+    load(db)
+    return db
+
+
+def apply_batch(batch, db):
+    """Apply (board, winner client, loser client) results, then publish and save what changed."""
+    changed = set()
+    for board, winner, loser in batch:
+        apply_result(board, winner, loser)
+        changed.update(((board, winner), (board, loser)))
+    stats["applied"] += len(batch)
+    for board in {board for board, _ in changed}:
+        publish(board)
+    try:
+        save(db, [(board, client_id, *ratings[(board, client_id)]) for board, client_id in changed])
+    except sqlite3.Error as e:
+        print(f"Ratings write failed: {e}")
+
+
+worker = batches.create(
+    "ratings-writer", apply_batch, QUEUE_SIZE, BATCH_SIZE, FLUSH_SECONDS,
+    setup=open_and_load, teardown=lambda db: db.close()
+)
+
+
+def start():
+    batches.start(worker)
+
+
+def stop():
+    """Apply and save queued results, then stop the worker."""
+    batches.stop(worker)
+
+
+def leaderboard(board=OVERALL, limit=20):
+    """Top of a leaderboard, from the last published snapshot."""
+    return list(leaderboards.get(board, ())[:max(1, min(limit, TOP_K))])
+
+
+def rating_of(client_id, board=OVERALL):
+    entry = ratings.get((board, client_id))
+    if entry is None:
+        return {"player": player_tag(client_id), "rating": INITIAL_RATING, "games": 0}
+    return {"player": player_tag(client_id), "rating": round(entry[0]), "games": entry[1]}
@@ -0,0 +1,347 @@
+"""Engine shards for GeoBluff: games partitioned across N processes by game_id.
+
+With GEOBLUFF_SHARDS=N the web process is a thin front and the games live in
+N engine processes running game.py. A game always goes to shard
+crc32(game_id) % N, so it has a single writer and its calls run in arrival
+order, while different games use different cores. Calls, results and engine
+events travel as length-prefixed frames (pickled tuples) over one pipe per
+shard; events are emitted again in the front, where the listeners (stats,
+history, ratings, tournaments) and presence live.
+
+Every SNAPSHOT_INTERVAL seconds each shard sends the games changed since its
+previous snapshot. When a shard process dies it is started again with the
+same index and first gets its games back from that snapshot, so partitions
+never move; moves made after the last snapshot are lost.
+"""
+import asyncio
+import itertools
+import multiprocessing
+import os
+import pickle
+import queue
+import threading
+import time
+import uuid
+import zlib
+from collections.abc import Mapping
+from concurrent.futures import Future
+
+import game
+import presence
+import spectators
+
+COUNT = int(os.environ.get("GEOBLUFF_SHARDS") or 0)  # 0 runs the engine in the web process
+SNAPSHOT_INTERVAL = 5.0
+CALL_TIMEOUT = 30.0
+RESTART_DELAY = 1.0  # A shard that dies on start is not respawned in a tight loop
+MODULES = {"game": game, "spectators": spectators}  # Engine calls a shard may run
+STOP = None
+
+shards = []  # One dict per shard: process, connection, pending calls, last snapshot, metrics
+events = queue.Queue()  # (event, payload) sent by the shards, emitted by the dispatcher
+call_ids = itertools.count()
+stopping = threading.Event()
+threads = []
+
+
+class ShardError(Exception):
+    """An engine call raised on its shard."""
+
+
+class ShardUnavailable(ShardError):
+    """The shard went away before answering (it is being restarted)."""
+
+
+def send(connection, message):
+    connection.send_bytes(pickle.dumps(message, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def plain(value):
+    """Results as plain containers: card views and rows are not picklable mappings."""
+    if isinstance(value, Mapping):
+        return {key: plain(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [plain(item) for item in value]
+    if isinstance(value, tuple):
+        return tuple(plain(item) for item in value)
+    return value
+
+
+# Shard process
+
+def snapshot_changes(exported):
+    """Games changed since the previous snapshot (`exported` is game_id -> version)."""
+    changed = []
+    for game_id, game_state in game.games.items():
+        if exported.get(game_id) != game_state["version"]:
+            exported[game_id] = game_state["version"]
+            changed.append(game.export_game(game_state))
+    return {"games": len(game.games), "changed": changed}
+
+
+def serve(connection, index):
+    """Shard process: run engine calls in arrival order and forward engine events."""
+    game.add_listener(lambda event, payload: send(connection, ("event", event, payload)))
+    exported = {}
+    while True:
+        try:
+            message = pickle.loads(connection.recv_bytes())
+        except EOFError:
+            return
+        kind, call_id = message[0], message[1]
+        if kind == "stop":
+            return
+        started = time.perf_counter()
+        try:
+            if kind == "call":
+                module, name, args, kwargs = message[2:]
+                result = plain(getattr(MODULES[module], name)(*args, **kwargs))
+            elif kind == "snapshot":
+                result = snapshot_changes(exported)
+            else:
+                for state in message[2]:
+                    exported[state["game_id"]] = game.import_game(state)["version"]
+                result = len(message[2])
+            reply = ("result", call_id, result, time.perf_counter() - started)
+        except Exception as e:
+            reply = ("error", call_id, f"{type(e).__name__}: {e}", time.perf_counter() - started)
+        send(connection, reply)
+
+
+# Front
+
+def spawn(index):
+    context = multiprocessing.get_context("spawn")
+    front, back = context.Pipe()
+    process = context.Process(
+        target=serve, args=(back, index), name=f"geobluff-shard-{index}", daemon=True
+    )
+    process.start()
+    back.close()
+    return process, front
+
+
+def shard_of(game_id):
+    return shards[zlib.crc32(str(game_id).encode("utf-8")) % len(shards)]
+
+
+def routes(func):
+    """True if `func` is an engine call that must run on a shard."""
+    return bool(shards) and func.__module__ in MODULES
+
+
+def new_game_id():
+    """Games get their id in the front, so it can pick their shard."""
+    return str(uuid.uuid4())[:8]
+
+
+def submit(shard, kind, *payload):
+    """Send a frame to a shard, returning the Future of its answer."""
+    future = Future()
+    call_id = next(call_ids)
+    # A call given up on (timeout) stops waiting for its answer
+    future.add_done_callback(lambda _: shard["pending"].pop(call_id, None))
+    with shard["lock"]:
+        shard["pending"][call_id] = future
+        try:
+            send(shard["connection"], (kind, call_id, *payload))
+        except (OSError, ValueError) as e:
+            shard["pending"].pop(call_id, None)
+            raise ShardUnavailable(f"Shard {shard['index']} unavailable: {e}")
+        shard["metrics"]["calls"] += 1
+    return future
+
+
+def with_presence(result, client_id=None):
+    """Presence lives in the front: fill it into states built by a shard."""
+    if isinstance(result, dict) and "active_clients" in result and "game_id" in result:
+        result["active_clients"] = presence.count(result["game_id"])
+        result["other_present"] = presence.other_present(result["game_id"], client_id)
+    return result
+
+
+async def call(game_id, func, /, *args, **kwargs):
+    """Run an engine call on the shard that owns `game_id`."""
+    if func.__name__ == "new_game" and not kwargs.get("game_id"):
+        kwargs["game_id"] = new_game_id()
+    shard = shard_of(game_id or kwargs.get("game_id"))
+    future = submit(shard, "call", func.__module__, func.__name__, args, kwargs)
+    try:
+        result = await asyncio.wait_for(asyncio.wrap_future(future), CALL_TIMEOUT)
+    except asyncio.TimeoutError:
+        # A shard stuck without dying: fail the request instead of holding it forever
+        raise ShardUnavailable(f"Shard {shard['index']} did not answer in {CALL_TIMEOUT:.0f}s")
+    return with_presence(result, kwargs.get("client_id"))
+
+
+def new_games(count, seats=None, **settings):
+    """Deal games on their shards from a front thread (in process without shards)."""
+    if not shards:
+        return game.new_games(count, seats=seats, **settings)
+    game_ids = [new_game_id() for _ in range(count)]
+    groups = {}
+    for n, game_id in enumerate(game_ids):
+        groups.setdefault(shard_of(game_id)["index"], []).append(n)
+    futures = [
+        submit(shards[index], "call", "game", "new_games", (len(group),), {
+            **settings,
+            "game_ids": [game_ids[n] for n in group],
+            "seats": [seats[n] for n in group] if seats else None
+        })
+        for index, group in groups.items()
+    ]
+    states = {}
+    for future in futures:
+        for state in future.result(CALL_TIMEOUT):
+            states[state["game_id"]] = state
+    return [states[game_id] for game_id in game_ids]
+
+
+def read(shard):
+    """Reader thread of a shard: answers resolve their calls, events go to the dispatcher."""
+    while not stopping.is_set():
+        try:
+            message = pickle.loads(shard["connection"].recv_bytes())
+        except (EOFError, OSError):
+            if stopping.is_set():
+                return
+            restart(shard)
+            continue
+        if message[0] == "event":
+            events.put(message[1:])
+            continue
+        kind, call_id, value, elapsed = message
+        shard["metrics"]["busy"] += elapsed
+        future = shard["pending"].pop(call_id, None)
+        if future is None or future.done():
+            continue
+        if kind == "error":
+            shard["metrics"]["errors"] += 1
+            future.set_exception(ShardError(value))
+        else:
+            future.set_result(value)
+
+
+def restart(shard):
+    """Start a dead shard again; its games come back from the last snapshot before any call.
+
+    The new process is started and sent its games before it is swapped in, so
+    other shards' calls never wait on this one's lock while it starts.
+    """
+    time.sleep(RESTART_DELAY)
+    shard["process"].join(timeout=1)
+    process, connection = spawn(shard["index"])
+    states = list(shard["games"].values())
+    restore_id = next(call_ids)
+    if states:
+        # Queued first on the new pipe: later calls find their games restored
+        send(connection, ("restore", restore_id, states))
+    with shard["lock"]:
+        failed = list(shard["pending"].values())
+        shard["pending"].clear()
+        if states:
+            shard["pending"][restore_id] = Future()
+        shard["process"], shard["connection"] = process, connection
+        shard["metrics"]["restarts"] += 1
+    for future in failed:
+        if not future.done():
+            future.set_exception(ShardUnavailable(f"Shard {shard['index']} restarted"))
+
+
+def dispatch():
+    """Emit the shards' engine events to the front's listeners, in arrival order."""
+    while True:
+        item = events.get()
+        if item is STOP:
+            return
+        event, payload = item
+        try:
+            game.emit(event, **payload)
+        except Exception as e:
+            print(f"Shard event listener failed: {e}")
+
+
+def take_snapshots():
+    """Keep a copy of every shard's games, to restore a shard that died."""
+    while not stopping.wait(SNAPSHOT_INTERVAL):
+        for shard in shards:
+            try:
+                result = submit(shard, "snapshot").result(CALL_TIMEOUT)
+            except Exception:
+                continue
+            for state in result["changed"]:
+                shard["games"][state["game_id"]] = state
+            shard["metrics"]["games"] = result["games"]
+            shard["metrics"]["snapshot_at"] = time.time()
+
+
+def start(count=COUNT):
+    """Start `count` shard processes and the front threads that serve them."""
+    if shards or count <= 0:
+        return
+    stopping.clear()
+    for index in range(count):
+        process, connection = spawn(index)
+        shards.append({
+            "index": index,
+            "process": process,
+            "connection": connection,
+            "lock": threading.Lock(),  # Frames are written whole, and not during a restart
+            "pending": {},  # Dict of call id -> Future
+            "games": {},  # Dict of game_id -> exported state, from the last snapshots
+            "metrics": {
+                "calls": 0, "errors": 0, "busy": 0.0, "games": 0, "restarts": 0, "snapshot_at": None
+            }
+        })
+    for shard in shards:
+        name = f"shard-reader-{shard['index']}"
+        threads.append(threading.Thread(target=read, args=(shard,), name=name, daemon=True))
+    threads.append(threading.Thread(target=dispatch, name="shard-events", daemon=True))
+    threads.append(threading.Thread(target=take_snapshots, name="shard-snapshots", daemon=True))
+    for thread in threads:
+        thread.start()
+
+
+def stop():
+    """Stop the shard processes after the events they already sent are emitted."""
+    if not shards:
+        return
+    stopping.set()
+    for shard in shards:
+        with shard["lock"]:
+            try:
+                send(shard["connection"], ("stop", None))
+            except (OSError, ValueError):
+                pass
+        shard["process"].join(timeout=2)
+        if shard["process"].is_alive():
+            shard["process"].terminate()
+    events.put(STOP)
+    for thread in threads:
+        thread.join(timeout=2)
+    shards.clear()
+    threads.clear()
+
+
+def snapshot():
+    """Per-shard load: games, calls, time spent in the engine, restarts."""
+    now = time.time()
+    return [
+        {
+            "shard": shard["index"],
+            "pid": shard["process"].pid,
+            "alive": shard["process"].is_alive(),
+            "games": shard["metrics"]["games"],
+            "calls": shard["metrics"]["calls"],
+            "errors": shard["metrics"]["errors"],
+            "in_flight": len(shard["pending"]),
+            "busy_s": round(shard["metrics"]["busy"], 3),
+            "restarts": shard["metrics"]["restarts"],
+            "snapshot_games": len(shard["games"]),
+            "snapshot_age_s": (
+                None if shard["metrics"]["snapshot_at"] is None
+                else round(now - shard["metrics"]["snapshot_at"], 1)
+            )
+        }
+        for shard in shards
+    ]
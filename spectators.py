@@ -0,0 +1,30 @@
+"""Shared spectator frames for GeoBluff.
+
+Every spectator of a game receives the same projection, so it is built and
+serialized once per state version and the bytes are reused for all viewers.
+"""
+import game
+import wire
+
+frames = {}  # Dict of game_id -> {"version", "state", "bodies"}
+
+
+def get_frame(game_id, use_msgpack=False):
+    """Return (body, media type, etag) of the spectator frame, or None if no game."""
+    version = game.get_version(game_id)
+    if version is None:
+        frames.pop(game_id, None)
+        return None
+
+    frame = frames.get(game_id)
+    if frame is None or frame["version"] != version:
+        frame = {"version": version, "state": game.get_spectator_state(game_id), "bodies": {}}
+        frames[game_id] = frame
+
+    body = frame["bodies"].get(use_msgpack)
+    if body is None:
+        body = wire.encode(frame["state"], use_msgpack)
+        frame["bodies"][use_msgpack] = body
+    content, media_type = body
+    suffix = "m" if use_msgpack else "j"
+    return content, media_type, f'"{game_id}-{version}-{suffix}"'
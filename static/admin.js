@@ -0,0 +1,68 @@
+// Operator dashboard: live counters and recent transitions, read from /api/admin/stats
+const REFRESH_MS = 2000;
+const COUNTER_TITLES = {
+    phase: 'Phase',
+    mode: 'Mode',
+    language: 'Langue',
+    category_set: 'Catégories',
+    teams: 'Équipes'
+};
+
+const adminToken = new URLSearchParams(window.location.search).get('token');
+
+function renderCounter(title, counts) {
+    const box = document.createElement('div');
+    box.className = 'admin-counter';
+    const heading = document.createElement('h3');
+    heading.textContent = title;
+    box.appendChild(heading);
+    Object.entries(counts).sort((a, b) => b[1] - a[1]).forEach(([value, count]) => {
+        const row = document.createElement('div');
+        row.className = 'admin-row';
+        const label = document.createElement('span');
+        label.textContent = value;
+        const number = document.createElement('strong');
+        number.textContent = count;
+        row.append(label, number);
+        box.appendChild(row);
+    });
+    return box;
+}
+
+function renderRecent(transitions) {
+    return transitions.map((transition) => {
+        const row = document.createElement('tr');
+        const time = new Date(transition.ts * 1000).toLocaleTimeString();
+        [time, transition.game_id, transition.from || '—', transition.to].forEach((text) => {
+            const cell = document.createElement('td');
+            cell.textContent = text;
+            row.appendChild(cell);
+        });
+        return row;
+    });
+}
+
+async function refresh() {
+    try {
+        const headers = adminToken ? { 'X-Admin-Token': adminToken } : {};
+        const response = await fetch('/api/admin/stats', { headers });
+        const data = await response.json();
+        if (!response.ok) {
+            document.getElementById('admin-summary').textContent = data.error || response.statusText;
+            return;
+        }
+        const totals = data.totals;
+        document.getElementById('admin-summary').textContent =
+            `${data.games} parties · ${data.waiting_rooms} en attente d'adversaire · ` +
+            `${totals.finished} terminées · ${totals.transitions} transitions`;
+        document.getElementById('admin-counters').replaceChildren(
+            ...Object.entries(COUNTER_TITLES).map(([field, title]) => renderCounter(title, data[field] || {}))
+        );
+        document.getElementById('admin-recent').replaceChildren(...renderRecent(data.recent));
+    } catch (e) {
+        // Server restarting: try again on the next tick
+    }
+    setTimeout(refresh, REFRESH_MS);
+}
+
+refresh();
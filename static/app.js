@@ -8,6 +8,8 @@ let revealEnabled = true;
 let pollInterval = null;
 
 const POLL_INTERVAL_MS = 1000;
+const HEARTBEAT_INTERVAL_MS = 2000;
+let heartbeatInterval = null;
 
 // Get game_id from URL if present
 function getGameIdFromUrl() {
@@ -26,6 +28,7 @@ function updateUrlWithGameId(id) {
 const startScreen = document.getElementById('start-screen');
 const gameScreen = document.getElementById('game-screen');
 const startBtn = document.getElementById('start-btn');
+const quickMatchBtn = document.getElementById('quick-match-btn');
 const bluffBtn = document.getElementById('bluff-btn');
 const messageArea = document.getElementById('message-area');
 const toggleOpponentBtn = document.getElementById('toggle-opponent-btn');
@@ -37,6 +40,7 @@ const boardArea = document.getElementById('board-area');
 const capitalModal = document.getElementById('capital-modal');
 const capitalCountry = document.getElementById('capital-country');
 const capitalInput = document.getElementById('capital-input');
+const capitalSuggestions = document.getElementById('capital-suggestions');
 const capitalSubmit = document.getElementById('capital-submit');
 const capitalSkip = document.getElementById('capital-skip');
 const gameoverModal = document.getElementById('gameover-modal');
@@ -61,6 +65,9 @@ const bluffResultMessage = document.getElementById('bluff-result-message');
 const continueBtn = document.getElementById('continue-btn');
 const homeBtn = document.getElementById('home-btn');
 const cardsCountSelect = document.getElementById('cards-count');
+const teamsCountSelect = document.getElementById('teams-count');
+const yearSelector = document.getElementById('year-selector');
+const yearSelect = document.getElementById('year-select');
 const lastCapitalDiv = document.getElementById('last-capital');
 const languageBtn = document.getElementById('language-btn');
 const languageBtnStart = document.getElementById('language-btn-start');
@@ -75,7 +82,7 @@ const inviteCopyBtn = document.getElementById('invite-copy-btn');
 const inviteCloseBtn = document.getElementById('invite-close-btn');
 
 let currentLanguage = 'fr';
-const clientId = getOrCreateClientId();
+let clientId = getOrCreateClientId();
 let currentMode = 'local';
 
 const translations = {
@@ -102,6 +109,9 @@ const translations = {
         chip_north_south: '🧭 Nord/Sud',
         chip_east_west: '🧭 Est/Ouest',
         cards_label: 'Cartes par équipe :',
+        teams_label: 'Équipes :',
+        year_label: 'Année des données :',
+        year_latest: 'Dernières valeurs',
         start_button: 'Nouvelle Partie',
         home_title: 'Retour au menu',
         restart_title: 'Recommencer',
@@ -149,7 +159,8 @@ const translations = {
         invite_title: 'Inviter un joueur',
         invite_description: 'Copiez ce lien et partagez-le.',
         invite_copy: 'Copier le lien',
-        invite_close: 'Fermer'
+        invite_close: 'Fermer',
+        quick_match_button: 'Partie rapide en ligne'
     },
     en: {
         subtitle: 'Geography game for two teams',
@@ -174,6 +185,9 @@ const translations = {
         chip_north_south: '🧭 North/South',
         chip_east_west: '🧭 East/West',
         cards_label: 'Cards per team:',
+        teams_label: 'Teams:',
+        year_label: 'Data year:',
+        year_latest: 'Latest values',
         start_button: 'New Game',
         home_title: 'Back to menu',
         restart_title: 'Restart',
@@ -221,7 +235,8 @@ const translations = {
         invite_title: 'Invite a player',
         invite_description: 'Copy this link and share it.',
         invite_copy: 'Copy link',
-        invite_close: 'Close'
+        invite_close: 'Close',
+        quick_match_button: 'Quick online match'
     }
 };
 
@@ -309,6 +324,28 @@ function syncCategorySetSelection() {
     });
 }
 
+// Years with yearly data; the selector stays hidden without any
+async function loadYears() {
+    if (!yearSelect || !yearSelector) return;
+    try {
+        const result = await api('years');
+        const years = (result && result.years) || [];
+        years.slice().reverse().forEach((year) => {
+            const option = document.createElement('option');
+            option.value = String(year);
+            option.textContent = String(year);
+            yearSelect.appendChild(option);
+        });
+        yearSelector.classList.toggle('hidden', years.length === 0);
+    } catch (err) {
+        console.error('Error loading years:', err);
+    }
+}
+
+function getSelectedYear() {
+    return yearSelect && yearSelect.value ? parseInt(yearSelect.value, 10) : null;
+}
+
 async function syncLanguage() {
     try {
         const result = await api('set-language', 'POST', { game_id: gameId, language: currentLanguage });
@@ -328,11 +365,119 @@ function setLanguage(language) {
     syncLanguage();
 }
 
+// Wire format: JSON by default, MessagePack opt-in (localStorage.wireFormat = 'msgpack')
+const useMsgpack = localStorage.getItem('wireFormat') === 'msgpack';
+let wireKeysPromise = null;
+
+function getWireKeys() {
+    if (!wireKeysPromise) {
+        wireKeysPromise = fetch('/api/wire-keys')
+            .then((res) => res.json())
+            .then((keys) => new Map(Object.entries(keys).map(([long, short]) => [short, long])));
+    }
+    return wireKeysPromise;
+}
+
+// Minimal MessagePack decoder (maps, arrays, strings, numbers, booleans, nil)
+function decodeMsgpack(buffer) {
+    const view = new DataView(buffer);
+    const bytes = new Uint8Array(buffer);
+    const textDecoder = new TextDecoder();
+    let offset = 0;
+
+    function str(length) {
+        const value = textDecoder.decode(bytes.subarray(offset, offset + length));
+        offset += length;
+        return value;
+    }
+    function array(length) {
+        const items = [];
+        for (let i = 0; i < length; i++) items.push(read());
+        return items;
+    }
+    function map(length) {
+        const obj = {};
+        for (let i = 0; i < length; i++) {
+            const key = read();
+            obj[key] = read();
+        }
+        return obj;
+    }
+    function read() {
+        const type = bytes[offset++];
+        if (type <= 0x7f) return type;
+        if (type >= 0xe0) return type - 0x100;
+        if ((type & 0xf0) === 0x80) return map(type & 0x0f);
+        if ((type & 0xf0) === 0x90) return array(type & 0x0f);
+        if ((type & 0xe0) === 0xa0) return str(type & 0x1f);
+        let value;
+        switch (type) {
+            case 0xc0: return null;
+            case 0xc2: return false;
+            case 0xc3: return true;
+            case 0xca: value = view.getFloat32(offset); offset += 4; return value;
+            case 0xcb: value = view.getFloat64(offset); offset += 8; return value;
+            case 0xcc: return bytes[offset++];
+            case 0xcd: value = view.getUint16(offset); offset += 2; return value;
+            case 0xce: value = view.getUint32(offset); offset += 4; return value;
+            case 0xcf: value = Number(view.getBigUint64(offset)); offset += 8; return value;
+            case 0xd0: value = view.getInt8(offset); offset += 1; return value;
+            case 0xd1: value = view.getInt16(offset); offset += 2; return value;
+            case 0xd2: value = view.getInt32(offset); offset += 4; return value;
+            case 0xd3: value = Number(view.getBigInt64(offset)); offset += 8; return value;
+            case 0xd9: return str(bytes[offset++]);
+            case 0xda: value = view.getUint16(offset); offset += 2; return str(value);
+            case 0xdb: value = view.getUint32(offset); offset += 4; return str(value);
+            case 0xdc: value = view.getUint16(offset); offset += 2; return array(value);
+            case 0xdd: value = view.getUint32(offset); offset += 4; return array(value);
+            case 0xde: value = view.getUint16(offset); offset += 2; return map(value);
+            case 0xdf: value = view.getUint32(offset); offset += 4; return map(value);
+            default: throw new Error(`Unsupported MessagePack type 0x${type.toString(16)}`);
+        }
+    }
+    return read();
+}
+
+// Same escape as wire.ESCAPE: a data key that would read like a short key travels as '~' + key
+const WIRE_ESCAPE = '~';
+
+function expandKey(key, keys) {
+    if (key.startsWith(WIRE_ESCAPE)) return key.slice(WIRE_ESCAPE.length);
+    return keys.get(key) || key;
+}
+
+function expandKeys(data, keys) {
+    if (Array.isArray(data)) return data.map((item) => expandKeys(item, keys));
+    if (data && typeof data === 'object') {
+        const expanded = {};
+        Object.entries(data).forEach(([key, value]) => {
+            expanded[expandKey(key, keys)] = expandKeys(value, keys);
+        });
+        return expanded;
+    }
+    return data;
+}
+
 // API calls
+let backoffUntil = 0;
+
 async function api(endpoint, method = 'GET', body = null) {
-    const options = { method, headers: { 'Content-Type': 'application/json' } };
+    // Hot-seat games run in the browser once the country bundle is loaded
+    const local = typeof LocalEngine !== 'undefined' ? LocalEngine.call(endpoint, body) : null;
+    if (local) return local;
+    const options = { method, headers: { 'Content-Type': 'application/json', 'X-Client-Id': clientId } };
     if (body) options.body = JSON.stringify(body);
+    if (useMsgpack) options.headers.Accept = 'application/x-msgpack';
     const res = await fetch(`/api/${endpoint}`, options);
+    if (res.status === 429 || res.status === 503) {
+        // Server is shedding load: pause polls for the advertised delay
+        const retryAfter = parseInt(res.headers.get('Retry-After'), 10) || 2;
+        backoffUntil = Date.now() + retryAfter * 1000;
+    }
+    if (useMsgpack && (res.headers.get('Content-Type') || '').includes('msgpack')) {
+        const [keys, buffer] = await Promise.all([getWireKeys(), res.arrayBuffer()]);
+        return expandKeys(decodeMsgpack(buffer), keys);
+    }
     return res.json();
 }
 
@@ -468,13 +613,19 @@ function formatValue(value, category) {
 
 // Create card element
 function createCard(card, options = {}) {
-    const { isActive = false, showValue = false, isReference = false, isPending = false, canReveal = false, cardIndex = -1 } = options;
+    const { isActive = false, showValue = false, isReference = false, isPending = false, canReveal = false, cardIndex = -1, isRevealed = false } = options;
 
     const div = document.createElement('div');
     div.className = 'card';
+    if (card.hidden) {
+        // Spectators only see the back of hand cards
+        div.classList.add('card-back');
+        return div;
+    }
     if (isReference) div.classList.add('reference');
     if (isPending) div.classList.add('pending');
-    div.dataset.name = card.name;
+    if (isRevealed) div.classList.add('revealed');
+    div.dataset.name = card.id || card.name;
 
     const flag = document.createElement('div');
     flag.className = 'flag';
@@ -506,6 +657,77 @@ function createCard(card, options = {}) {
     return div;
 }
 
+// Everything a card element shows: an unchanged signature means the element can be kept
+function cardSignature(card, options) {
+    return [
+        card.hidden ? 'hidden' : card.name, card.flag,
+        options.showValue ? `${card.value}|${gameState.category}|${currentLanguage}` : '',
+        options.isActive ? 1 : 0, options.isReference ? 1 : 0, options.isPending ? 1 : 0,
+        options.canReveal ? options.cardIndex : -1, options.isRevealed ? 1 : 0
+    ].join('~');
+}
+
+function cardItem(card, options = {}, key = null) {
+    return {
+        key: key || `card:${card.id || card.name}`,
+        sig: cardSignature(card, options),
+        create: () => createCard(card, options)
+    };
+}
+
+function teamLabel(team) {
+    return t('team_1_label').replace('1', team);
+}
+
+function handLabelItem(team, isCurrent) {
+    return {
+        key: `label:${team}`,
+        sig: `${teamLabel(team)}|${isCurrent ? 1 : 0}`,
+        create: () => {
+            const label = document.createElement('div');
+            label.className = `hand-label player-label team-${team}`;
+            if (isCurrent) label.classList.add('current');
+            label.textContent = teamLabel(team);
+            return label;
+        }
+    };
+}
+
+function slotItem(index, isActive) {
+    return { key: `slot:${index}`, sig: isActive ? 'active' : '', create: () => createSlot(index, isActive) };
+}
+
+// Keyed patch: keep elements whose key and signature match, create the others,
+// and only move nodes that are out of place
+function patchChildren(container, items) {
+    const existing = new Map();
+    for (const el of container.children) {
+        if (el.dataset.key) existing.set(el.dataset.key, el);
+    }
+    let cursor = container.firstChild;
+    items.forEach((item) => {
+        let el = existing.get(item.key);
+        if (el && el.dataset.sig === item.sig) {
+            existing.delete(item.key);
+        } else {
+            el = item.create();
+            el.dataset.key = item.key;
+            el.dataset.sig = item.sig;
+        }
+        if (el === cursor) {
+            cursor = cursor.nextSibling;
+        } else {
+            container.insertBefore(el, cursor);
+        }
+    });
+    // Every placed element is before the cursor, what follows is stale
+    while (cursor) {
+        const next = cursor.nextSibling;
+        cursor.remove();
+        cursor = next;
+    }
+}
+
 // Create slot element for placement
 function createSlot(index, isActive) {
     const slot = document.createElement('div');
@@ -522,15 +744,20 @@ function createSlot(index, isActive) {
     return slot;
 }
 
+// Actions the server allows this viewer right now (published with every state)
+function canDo(action) {
+    return Boolean(gameState && (gameState.allowed_actions || []).includes(action));
+}
+
 // Select and play card (enter placing phase)
 async function selectAndPlayCard(card) {
-    if (gameState.phase !== 'playing' || isLoading) return;
+    if (!canDo('play_card') || isLoading) return;
 
     isLoading = true;
     const result = await api('play-card', 'POST', {
         game_id: gameId,
         player: gameState.current_player,
-        card_name: card.name
+        card_name: card.id || card.name
     });
     isLoading = false;
 
@@ -542,7 +769,7 @@ async function selectAndPlayCard(card) {
 
 // Set position for pending card (index)
 async function setPosition(position) {
-    if (gameState.phase !== 'placing' || isLoading) return;
+    if (!canDo('set_position') || isLoading) return;
 
     isLoading = true;
     const result = await api('set-position', 'POST', { game_id: gameId, position });
@@ -556,7 +783,7 @@ async function setPosition(position) {
 
 // Validate placement
 async function validatePlacement() {
-    if (gameState.phase !== 'placing') return;
+    if (!canDo('validate_placement')) return;
 
     const result = await api('validate-placement', 'POST', { game_id: gameId });
 
@@ -568,7 +795,7 @@ async function validatePlacement() {
 
 // Cancel placement
 async function cancelPlacement() {
-    if (gameState.phase !== 'placing') return;
+    if (!canDo('cancel_placement')) return;
 
     const result = await api('cancel-placement', 'POST', { game_id: gameId });
 
@@ -580,8 +807,7 @@ async function cancelPlacement() {
 
 // Call bluff
 async function callBluff() {
-    if (gameState.phase !== 'playing') return;
-    if (gameState.board.length < 2) return;
+    if (!canDo('call_bluff')) return;
 
     const result = await api('call-bluff', 'POST', {
         game_id: gameId,
@@ -599,8 +825,7 @@ async function callBluff() {
 
 // Reveal card during bluff or final validation (by clicking on it)
 async function revealCardByIndex(index) {
-    if (!revealEnabled) return;
-    if (gameState.phase !== 'bluff_reveal' && gameState.phase !== 'final_validation') return;
+    if (!revealEnabled || !canDo('reveal_card')) return;
 
     const result = await api('reveal-card', 'POST', { game_id: gameId, index });
 
@@ -613,13 +838,11 @@ async function revealCardByIndex(index) {
 // Submit capital answer
 async function submitCapital() {
     const answer = capitalInput.value.trim();
-    if (!answer) return;
-
-    const currentPlayer = gameState.player1_cards.length === 0 ? 1 : 2;
+    if (!answer || !canDo('check_capital')) return;
 
     const result = await api('check-capital', 'POST', {
         game_id: gameId,
-        player: currentPlayer,
+        player: gameState.final_player,
         answer: answer
     });
 
@@ -630,13 +853,45 @@ async function submitCapital() {
     }
 }
 
+// Capital autocomplete (debounced, latest query wins)
+let suggestTimeout = null;
+let suggestQuery = '';
+
+function suggestCapitals() {
+    if (!capitalSuggestions) return;
+    clearTimeout(suggestTimeout);
+    const query = capitalInput.value.trim();
+    suggestQuery = query;
+    if (query.length < 2) {
+        capitalSuggestions.innerHTML = '';
+        return;
+    }
+    suggestTimeout = setTimeout(async () => {
+        try {
+            // Other decks complete their own secret field instead of capitals
+            const deck = gameState && gameState.deck ? `&deck=${encodeURIComponent(gameState.deck)}` : '';
+            // The game id lets the browser engine answer for its own games only
+            const game = gameId ? `&game_id=${encodeURIComponent(gameId)}` : '';
+            const result = await api(`capitals/suggest?q=${encodeURIComponent(query)}${deck}${game}`);
+            if (query !== suggestQuery) return;
+            capitalSuggestions.innerHTML = '';
+            (result.suggestions || []).forEach((suggestion) => {
+                const option = document.createElement('option');
+                option.value = suggestion;
+                capitalSuggestions.appendChild(option);
+            });
+        } catch (err) {
+            console.error('Capital suggestions error:', err);
+        }
+    }, 120);
+}
+
 // Skip capital (don't know)
 async function skipCapital() {
-    const currentPlayer = gameState.player1_cards.length === 0 ? 1 : 2;
-
+    if (!canDo('check_capital')) return;
     const result = await api('check-capital', 'POST', {
         game_id: gameId,
-        player: currentPlayer,
+        player: gameState.final_player,
         answer: ''
     });
 
@@ -649,6 +904,7 @@ async function skipCapital() {
 
 // Capital validation decision (opponent accepts or refuses)
 async function capitalDecision(accepted) {
+    if (!canDo('capital_decision')) return;
     const result = await api('capital-decision', 'POST', { game_id: gameId, accepted });
 
     if (!result.error) {
@@ -659,6 +915,7 @@ async function capitalDecision(accepted) {
 
 // Change category
 async function changeCategory() {
+    if (!canDo('change_category')) return;
     const result = await api('change-category', 'POST', { game_id: gameId });
 
     if (!result.error) {
@@ -673,6 +930,7 @@ async function continueAfterResult() {
     if (gameState.phase === 'final_validation_result') {
         endpoint = 'continue-after-final-validation';
     }
+    if (!canDo(endpoint.replace(/-/g, '_'))) return;
 
     const result = await api(endpoint, 'POST', { game_id: gameId });
 
@@ -682,11 +940,25 @@ async function continueAfterResult() {
     }
 }
 
+// What a poll can change: the state version, the language, the seat and who is connected
+function stateKey(state) {
+    return `${state.version}|${state.language}|${state.viewer_seat}|${state.other_present}|${state.active_clients}`;
+}
+
+let renderedKey = null;
+
+// Render a polled state, skipping the whole render when nothing changed
+function applyPolledState(state) {
+    if (gameState && stateKey(state) === renderedKey) return false;
+    gameState = state;
+    render();
+    return true;
+}
+
 // Render game state
 function render() {
     if (!gameState) return;
-
-    console.log('Render state:', gameState.phase, 'Player:', gameState.current_player);
+    renderedKey = stateKey(gameState);
 
     // Update category
     categoryName.textContent = gameState.category_label;
@@ -725,14 +997,17 @@ function render() {
     // Clear last capital display (not used anymore)
     lastCapitalDiv.textContent = '';
 
-    // Swap visual: active player always at bottom, opponent always at top
+    // Bottom hand: my seat online, the player to move on a shared screen
     const currentPlayer = gameState.current_player;
-    const isPlaying = gameState.phase === 'playing';
+    const isOnlineSeat = currentMode === 'online' && gameState.viewer_seat;
+    const bottomTeam = isOnlineSeat ? gameState.viewer_seat : currentPlayer;
+    const isPlaying = canDo('play_card');
 
-    // Get the cards for current player and opponent
-    const activeCards = currentPlayer === 1 ? gameState.player1_cards : gameState.player2_cards;
-    const opponentCards = currentPlayer === 1 ? gameState.player2_cards : gameState.player1_cards;
-    const opponentTeam = currentPlayer === 1 ? 2 : 1;
+    // The other hands follow in turn order, starting after the bottom one
+    const order = gameState.turn_order || [1, 2];
+    const start = order.indexOf(bottomTeam);
+    const otherTeams = order.slice(start + 1).concat(order.slice(0, start));
+    const topTeam = otherTeams.length === 1 ? otherTeams[0] : null;
 
     // Update player areas - bottom area (player1-area in HTML) is always active
     const bottomArea = document.querySelector('.player1-area');
@@ -740,133 +1015,100 @@ function render() {
 
     bottomArea.classList.toggle('active', isPlaying);
     topArea.classList.remove('active'); // Opponent is never "active" visually
-    bottomArea.classList.toggle('team-1', currentPlayer === 1);
-    bottomArea.classList.toggle('team-2', currentPlayer === 2);
-    topArea.classList.toggle('team-1', opponentTeam === 1);
-    topArea.classList.toggle('team-2', opponentTeam === 2);
+    for (const team of order) {
+        bottomArea.classList.toggle(`team-${team}`, bottomTeam === team);
+        topArea.classList.toggle(`team-${team}`, topTeam === team);
+    }
 
     // Update labels to show correct team numbers
     const bottomLabel = bottomArea.querySelector('.player-label');
     if (bottomLabel) {
-        bottomLabel.textContent = t('team_1_label').replace('1', currentPlayer);
-        bottomLabel.classList.toggle('team-1', currentPlayer === 1);
-        bottomLabel.classList.toggle('team-2', currentPlayer === 2);
+        bottomLabel.textContent = teamLabel(bottomTeam);
+        bottomLabel.className = `player-label team-${bottomTeam}`;
     }
     const topLabel = topArea.querySelector('.player-label');
     if (topLabel) {
-        topLabel.textContent = t('team_2_label').replace('2', opponentTeam);
-        topLabel.classList.toggle('team-1', opponentTeam === 1);
-        topLabel.classList.toggle('team-2', opponentTeam === 2);
-    }
-
-    // Render active player cards (bottom - player1Cards container)
-    player1Cards.innerHTML = '';
-    activeCards.forEach(card => {
-        player1Cards.appendChild(createCard(card, { isActive: isPlaying, showValue: false }));
-    });
-
-    // Render opponent cards (top - player2Cards container)
-    player2Cards.innerHTML = '';
-    opponentCards.forEach(card => {
-        player2Cards.appendChild(createCard(card, { isActive: false, showValue: false }));
+        topLabel.textContent = topTeam ? teamLabel(topTeam) : '';
+        topLabel.className = topTeam ? `player-label team-${topTeam}` : 'player-label';
+    }
+
+    // Render hands, keyed by country (other teams and spectators get anonymous card backs)
+    const handItems = (team, isActive) => gameState.hands[team - 1].map((card, index) => cardItem(
+        card, { isActive }, card.hidden ? `back:${team}:${index}` : null
+    ));
+    patchChildren(player1Cards, handItems(bottomTeam, isPlaying));
+    const topItems = [];
+    otherTeams.forEach((team) => {
+        // With several other teams, each hand is introduced by its label
+        if (!topTeam) topItems.push(handLabelItem(team, team === currentPlayer));
+        topItems.push(...handItems(team, false));
     });
+    patchChildren(player2Cards, topItems);
 
     // Render board
-    boardCards.innerHTML = '';
-
+    const boardItems = [];
     if (gameState.phase === 'placing' && gameState.pending_card) {
-        // Placing phase: show slots between cards
+        // Placing phase: slots between cards, pending card shown at the selected slot
         const pendingPos = gameState.pending_position;
         const boardLength = gameState.board.length;
-
         for (let i = 0; i <= boardLength; i++) {
-            // Add slot before card at index i
-            const slotActive = (i === pendingPos);
-            boardCards.appendChild(createSlot(i, slotActive));
-
-            // Add card if exists
-            if (i < boardLength) {
-                const card = gameState.board[i];
-                const isReference = card.is_reference || false;
-                boardCards.appendChild(createCard(card, { isReference }));
-            }
-        }
-
-        // Show pending card preview at selected position
-        // We rebuild with the card inserted visually
-        boardCards.innerHTML = '';
-        for (let i = 0; i <= boardLength; i++) {
-            // Slot
-            const slotActive = (i === pendingPos);
-            boardCards.appendChild(createSlot(i, slotActive));
-
-            // If this is where pending card goes, show it
+            boardItems.push(slotItem(i, i === pendingPos));
             if (i === pendingPos) {
-                boardCards.appendChild(createCard(gameState.pending_card, { isPending: true }));
+                const pending = gameState.pending_card;
+                boardItems.push(cardItem(pending, { isPending: true }, `pending:${pending.id || pending.name}`));
             }
-
-            // Board card
             if (i < boardLength) {
                 const card = gameState.board[i];
-                const isReference = card.is_reference || false;
-                boardCards.appendChild(createCard(card, { isReference }));
+                boardItems.push(cardItem(card, { isReference: card.is_reference || false }));
             }
         }
     } else if (gameState.phase === 'bluff_reveal' || gameState.phase === 'final_validation') {
         // Bluff reveal or final validation: click on cards to reveal them
         gameState.board.forEach((card, index) => {
-            const isReference = card.is_reference || false;
             const isRevealed = card.revealed || false;
-            const canReveal = !isRevealed;
-            const cardEl = createCard(card, {
+            boardItems.push(cardItem(card, {
                 showValue: isRevealed,
-                isReference,
-                canReveal,
-                cardIndex: index
-            });
-
-            if (isRevealed) {
-                cardEl.classList.add('revealed');
-            }
-
-            boardCards.appendChild(cardEl);
+                isReference: card.is_reference || false,
+                canReveal: !isRevealed && canDo('reveal_card'),
+                cardIndex: index,
+                isRevealed
+            }));
         });
     } else if (gameState.phase === 'bluff_result' || gameState.phase === 'final_validation_result') {
         // Bluff result or final validation result: show all cards with values (all revealed)
-        gameState.board.forEach((card, index) => {
-            const isReference = card.is_reference || false;
-            const cardEl = createCard(card, { showValue: true, isReference });
-            cardEl.classList.add('revealed');
-            boardCards.appendChild(cardEl);
+        gameState.board.forEach((card) => {
+            boardItems.push(cardItem(card, { showValue: true, isReference: card.is_reference || false, isRevealed: true }));
         });
     } else {
         // Normal display
-        gameState.board.forEach((card, index) => {
-            const isReference = card.is_reference || false;
+        gameState.board.forEach((card) => {
             const showValue = card.revealed || (gameState.phase === 'game_over');
-            boardCards.appendChild(createCard(card, { isReference, showValue }));
+            boardItems.push(cardItem(card, { isReference: card.is_reference || false, showValue }));
         });
     }
+    patchChildren(boardCards, boardItems);
 
     // Show/hide action bars
     placingBar.classList.add('hidden');
     bluffResultBar.classList.add('hidden');
 
-    if (gameState.phase === 'placing') {
+    if (canDo('validate_placement')) {
         placingBar.classList.remove('hidden');
     } else if (gameState.phase === 'bluff_result' || gameState.phase === 'final_validation_result') {
         bluffResultBar.classList.remove('hidden');
         bluffResultMessage.textContent = gameState.message;
+        continueBtn.classList.toggle(
+            'hidden', !canDo('continue_after_bluff') && !canDo('continue_after_final_validation')
+        );
     }
 
-    // Update bluff button - only enabled when there are at least 2 cards on board
-    bluffBtn.disabled = gameState.phase !== 'playing' || gameState.board.length < 2;
-
-    // Update change category button - only enabled when board has just reference card
-    changeCategoryBtn.disabled = gameState.phase !== 'playing' || gameState.board.length > 1;
+    // Buttons follow the server's allowed actions (bluff needs 2 board cards,
+    // changing category only before any placement)
+    bluffBtn.disabled = !canDo('call_bluff');
+    changeCategoryBtn.disabled = !canDo('change_category');
 
     // Show/hide modals
-    if (gameState.phase === 'capital_check') {
+    if (canDo('check_capital')) {
         // Use capital_card (the card the player just placed)
         const card = gameState.capital_card || gameState.board[gameState.board.length - 1];
         capitalCountry.textContent = `${card.flag} ${card.name}`;
@@ -876,7 +1118,7 @@ function render() {
         capitalModal.classList.add('hidden');
     }
 
-    if (gameState.phase === 'capital_validation') {
+    if (canDo('capital_decision')) {
         capitalValidationText.textContent = gameState.message;
         capitalValidationModal.classList.remove('hidden');
     } else {
@@ -969,16 +1211,24 @@ async function copyInviteLink() {
     }
 }
 
+function sendHeartbeat(leaving = false) {
+    if (!gameId || (!leaving && Date.now() < backoffUntil)) return;
+    api('heartbeat', 'POST', { game_id: gameId, client_id: clientId, leaving })
+        .catch((err) => console.error('Heartbeat error:', err));
+}
+
 function startPolling() {
     stopPolling();
     if (currentMode !== 'online') return;
+    // Presence is kept alive by heartbeats, state polls are read-only
+    sendHeartbeat();
+    heartbeatInterval = setInterval(sendHeartbeat, HEARTBEAT_INTERVAL_MS);
     pollInterval = setInterval(async () => {
-        if (!gameId) return;
+        if (!gameId || Date.now() < backoffUntil) return;
         try {
             const state = await api(`game-state?game_id=${gameId}&client_id=${clientId}`, 'GET');
             if (!state.error) {
-                gameState = state;
-                render();
+                applyPolledState(state);
             }
         } catch (err) {
             console.error('Polling error:', err);
@@ -986,24 +1236,96 @@ function startPolling() {
     }, POLL_INTERVAL_MS);
 }
 
+function startSpectating(id) {
+    stopPolling();
+    currentMode = 'spectate';
+    gameId = id;
+    startScreen.classList.add('hidden');
+    gameScreen.classList.remove('hidden');
+    const poll = async () => {
+        if (!gameId || Date.now() < backoffUntil) return;
+        try {
+            const state = await api(`spectate?game_id=${gameId}`, 'GET');
+            // Frames are shared per version: skip rendering an unchanged one
+            if (!state.error) {
+                applyPolledState(state);
+            }
+        } catch (err) {
+            console.error('Spectating error:', err);
+        }
+    };
+    poll();
+    pollInterval = setInterval(poll, POLL_INTERVAL_MS);
+}
+
 function stopPolling() {
     if (pollInterval) {
         clearInterval(pollInterval);
         pollInterval = null;
     }
+    if (heartbeatInterval) {
+        clearInterval(heartbeatInterval);
+        heartbeatInterval = null;
+        sendHeartbeat(true);
+    }
 }
 
 // Start new game
 async function startGame() {
     const cardsCount = cardsCountSelect ? parseInt(cardsCountSelect.value) : 7;
+    const teamsCount = teamsCountSelect ? parseInt(teamsCountSelect.value) : 2;
     currentMode = modeSelect ? modeSelect.value : 'local';
     try {
         const categorySet = getSelectedCategorySet();
-        gameState = await api('new-game', 'POST', {
+        const state = await api('new-game', 'POST', {
             cards_per_player: cardsCount,
+            teams: teamsCount,
             language: currentLanguage,
-            category_set: categorySet
+            category_set: categorySet,
+            year: getSelectedYear(),
+            mode: currentMode
         });
+        enterGame(state, currentMode === 'online');
+    } catch (err) {
+        console.error('Error starting game:', err);
+    }
+}
+
+// Join the oldest open room with the same settings, or open one and wait
+async function quickMatch() {
+    const cardsCount = cardsCountSelect ? parseInt(cardsCountSelect.value) : 7;
+    const teamsCount = teamsCountSelect ? parseInt(teamsCountSelect.value) : 2;
+    currentMode = 'online';
+    if (modeSelect) modeSelect.value = 'online';
+    try {
+        const state = await api('quick-match', 'POST', {
+            client_id: clientId,
+            cards_per_player: cardsCount,
+            teams: teamsCount,
+            language: currentLanguage,
+            category_set: getSelectedCategorySet()
+        });
+        enterGame(state, !state.matched);
+    } catch (err) {
+        console.error('Error during quick match:', err);
+    }
+}
+
+// Open an online game by id, seated if this client holds one of its seats
+async function joinGame(id) {
+    currentMode = 'online';
+    if (modeSelect) modeSelect.value = 'online';
+    try {
+        const state = await api(`game-state?game_id=${encodeURIComponent(id)}&client_id=${encodeURIComponent(clientId)}`, 'GET');
+        if (state && state.game_id) enterGame(state, false);
+    } catch (err) {
+        console.error('Error joining game:', err);
+    }
+}
+
+function enterGame(state, showInvite) {
+    try {
+        gameState = state;
         gameId = gameState.game_id;
         updateUrlWithGameId(gameId);
         startScreen.classList.add('hidden');
@@ -1019,8 +1341,7 @@ async function startGame() {
         }
         render();
         if (currentMode === 'online') {
-            const inviteLink = getInviteLink();
-            showInviteModal(inviteLink);
+            if (showInvite) showInviteModal(getInviteLink());
             startPolling();
         } else {
             stopPolling();
@@ -1031,7 +1352,7 @@ async function startGame() {
             setTimeout(showTutorial, 500);
         }
     } catch (err) {
-        console.error('Error starting game:', err);
+        console.error('Error entering game:', err);
     }
 }
 
@@ -1039,9 +1360,9 @@ async function startGame() {
 function goHome() {
     gameScreen.classList.add('hidden');
     startScreen.classList.remove('hidden');
+    stopPolling();
     gameState = null;
     gameId = null;
-    stopPolling();
     hideInviteModal();
     // Clear game_id from URL
     const url = new URL(window.location);
@@ -1051,6 +1372,7 @@ function goHome() {
 
 // Event listeners
 startBtn.addEventListener('click', startGame);
+if (quickMatchBtn) quickMatchBtn.addEventListener('click', quickMatch);
 restartBtn.addEventListener('click', startGame);
 restartGameBtn.addEventListener('click', startGame);
 if (homeBtn) homeBtn.addEventListener('click', goHome);
@@ -1096,6 +1418,7 @@ capitalSkip.addEventListener('click', skipCapital);
 capitalInput.addEventListener('keypress', (e) => {
     if (e.key === 'Enter') submitCapital();
 });
+capitalInput.addEventListener('input', suggestCapitals);
 
 // Placing phase buttons
 cancelBtn.addEventListener('click', cancelPlacement);
@@ -1302,10 +1625,23 @@ currentLanguage = storedLanguage || (browserLanguage.startsWith('en') ? 'en' : '
 applyTranslations();
 syncCategorySetSelection();
 syncModeSelection();
+loadYears();
 
 // Clear any game_id from URL on page load to always start fresh
 function initFromUrl() {
+    const watchId = new URLSearchParams(window.location.search).get('watch');
+    if (watchId) {
+        startSpectating(watchId);
+        return;
+    }
     const urlGameId = getGameIdFromUrl();
+    const seatToken = new URLSearchParams(window.location.search).get('seat');
+    if (urlGameId && seatToken) {
+        // Bracket link: the seat token is this player's client id in that game
+        clientId = seatToken;
+        joinGame(urlGameId);
+        return;
+    }
     if (urlGameId) {
         // Clear game_id from URL - always start fresh on refresh
         const url = new URL(window.location);
@@ -1316,3 +1652,10 @@ function initFromUrl() {
 }
 
 initFromUrl();
+
+// Offline shell: the service worker caches the page, scripts, rules and country bundle
+if ('serviceWorker' in navigator) {
+    window.addEventListener('load', () => {
+        navigator.serviceWorker.register('/sw.js').catch((err) => console.error('Service worker error:', err));
+    });
+}
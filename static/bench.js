@@ -0,0 +1,103 @@
+// Render benchmark: replays synthetic polls on the real game screen and
+// compares a full rebuild with the keyed patch and the unchanged-payload skip.
+// Loaded by /bench only, after app.js (shares its globals).
+const BENCH_RUNS = 200;
+
+function benchCard(index) {
+    return {
+        id: `Country ${index}`,
+        name: `Country ${index}`,
+        flag: String.fromCodePoint(0x1F1E6 + (index % 26), 0x1F1E6 + ((index * 7) % 26)),
+        capital: `Capital ${index}`,
+        value: 1000 + index * 37
+    };
+}
+
+function benchState(version, boardSize) {
+    const board = [];
+    for (let i = 0; i < boardSize; i++) {
+        board.push({ ...benchCard(100 + i), is_reference: i === 0 });
+    }
+    return {
+        game_id: 'bench',
+        version,
+        language: currentLanguage,
+        category: 'population',
+        category_label: 'Population',
+        phase: 'playing',
+        current_player: 1,
+        allowed_actions: ['play_card', 'call_bluff', 'change_category'],
+        teams: 2,
+        turn_order: [1, 2],
+        hands: [
+            Array.from({ length: 10 }, (_, i) => benchCard(i)),
+            Array.from({ length: 10 }, (_, i) => benchCard(20 + i))
+        ],
+        board,
+        message: null,
+        other_present: true,
+        active_clients: 2
+    };
+}
+
+function clearRendered() {
+    // What every poll used to cost: all hands and board cards rebuilt
+    player1Cards.replaceChildren();
+    player2Cards.replaceChildren();
+    boardCards.replaceChildren();
+}
+
+function measure(label, step) {
+    const times = [];
+    for (let i = 0; i < BENCH_RUNS; i++) {
+        const start = performance.now();
+        step(i);
+        // Reading layout forces style and layout, like the next frame would
+        document.body.offsetHeight;
+        times.push(performance.now() - start);
+    }
+    times.sort((a, b) => a - b);
+    return {
+        label,
+        median: times[Math.floor(times.length / 2)],
+        p95: times[Math.floor(times.length * 0.95)]
+    };
+}
+
+function showBenchResults(results) {
+    const panel = document.createElement('div');
+    panel.className = 'bench-results';
+    panel.style.cssText = 'position:fixed;top:8px;right:8px;z-index:1000;background:#fff;padding:12px;border-radius:8px;box-shadow:0 6px 14px rgba(15,23,42,.15);font:13px monospace';
+    panel.innerHTML = '<strong>Render cost per poll (ms)</strong><br>' + results
+        .map((r) => `${r.label.padEnd(24)} median ${r.median.toFixed(3)}  p95 ${r.p95.toFixed(3)}`)
+        .join('<br>');
+    document.body.appendChild(panel);
+    console.table(results);
+}
+
+function runBench() {
+    currentMode = 'local';
+    startScreen.classList.add('hidden');
+    gameScreen.classList.remove('hidden');
+    let version = 1;
+
+    const results = [
+        measure('full rebuild', () => {
+            clearRendered();
+            gameState = benchState(version++, 8);
+            render();
+        }),
+        measure('keyed patch (1 move)', (i) => {
+            // One card moves from the hand to the board, like a real turn
+            gameState = benchState(version++, 6 + (i % 3));
+            render();
+        }),
+        measure('unchanged poll', () => {
+            applyPolledState(benchState(version, 8));
+        })
+    ];
+    hideToast();
+    showBenchResults(results);
+}
+
+window.addEventListener('load', () => requestAnimationFrame(runBench));
@@ -0,0 +1,496 @@
+// Hot-seat engine in the browser: local games are dealt and played from the
+// read-only country bundle, with the same states as the server, so a shared
+// screen needs no round trip (and no network once the service worker cached it).
+// Loaded before app.js, which routes local-game calls here once the bundle is ready.
+const LocalEngine = (() => {
+    const bundleUrl = document.currentScript ? document.currentScript.dataset.bundle : null;
+    const games = new Map(); // game_id -> internal state (cards are country indexes)
+    let data = null;
+
+    const ready = bundleUrl
+        ? fetch(bundleUrl).then((res) => (res.ok ? res.json() : null)).then((bundle) => { data = bundle; })
+            .catch(() => { data = null; })
+        : Promise.resolve();
+
+    function randomInt(n) {
+        return Math.floor(Math.random() * n);
+    }
+
+    // First `count` positions of a Fisher-Yates shuffle of 0..size-1 (see partial_shuffle)
+    function partialShuffle(size, count) {
+        const swapped = new Map();
+        const drawn = [];
+        for (let i = 0; i < Math.min(count, size); i++) {
+            const j = i + randomInt(size - i);
+            drawn.push(swapped.has(j) ? swapped.get(j) : j);
+            swapped.set(j, swapped.has(i) ? swapped.get(i) : i);
+        }
+        return drawn;
+    }
+
+    // Up to `count` distinct indexes below `size` outside `taken`, in O(taken + count): the
+    // taken slots of a virtual 0..size-1 are swapped past its end, then the rest partially shuffled
+    function sampleExcluding(size, taken, count) {
+        const slots = new Map(); // position -> index, for moved slots only
+        const positions = new Map(); // index -> position, for moved indexes only
+        const at = (position) => (slots.has(position) ? slots.get(position) : position);
+        const swap = (a, b) => {
+            const first = at(a);
+            const second = at(b);
+            slots.set(a, second);
+            positions.set(second, a);
+            slots.set(b, first);
+            positions.set(first, b);
+        };
+        let free = size;
+        for (const index of taken) {
+            free -= 1;
+            swap(positions.has(index) ? positions.get(index) : index, free);
+        }
+        const drawn = [];
+        for (let i = 0; i < Math.min(count, free); i++) {
+            swap(i, i + randomInt(free - i));
+            drawn.push(at(i));
+        }
+        return drawn;
+    }
+
+    function pickCategory(pool, exclude) {
+        if (exclude && pool.length > 1) {
+            const candidates = pool.filter((category) => category !== exclude);
+            if (candidates.length) return candidates[randomInt(candidates.length)];
+        }
+        return pool[randomInt(pool.length)];
+    }
+
+    function normalizeLanguage(language) {
+        return data.messages[language] ? language : data.default_language;
+    }
+
+    function valueOf(game, index, category) {
+        return data.countries.values[category || game.category][index];
+    }
+
+    function cardView(game, index, isReference = false) {
+        const countries = data.countries;
+        const view = {
+            id: countries.id[index],
+            name: countries.name[game.language][index],
+            flag: countries.flag[index],
+            capital: countries.capital[game.language][index]
+        };
+        if (isReference) view.is_reference = true;
+        return view;
+    }
+
+    function fullCard(game, index) {
+        return { ...cardView(game, index), value: valueOf(game, index) };
+    }
+
+    function translate(key, language, params) {
+        const values = { ...params };
+        if (values.category_id !== undefined) values.label = data.labels[language][values.category_id];
+        if (values.country_id !== undefined) values.country = data.countries.name[language][values.country_id];
+        if (values.capital_of !== undefined) values.capital = data.countries.capital[language][values.capital_of];
+        const template = data.messages[language][key] || key;
+        return template.replace(/\{(\w+)\}/g, (match, name) => (name in values ? values[name] : match));
+    }
+
+    function setMessage(game, key, params = {}) {
+        game.message_parts = [{ key, params }];
+    }
+
+    function appendMessage(game, key, params = {}) {
+        game.message_parts = (game.message_parts || []).concat([{ key, params }]);
+    }
+
+    function normalizeText(text) {
+        return text.toLowerCase().trim().normalize('NFD').replace(/\p{Mn}/gu, '');
+    }
+
+    function levenshtein(a, b) {
+        if (a.length < b.length) return levenshtein(b, a);
+        let previous = Array.from({ length: b.length + 1 }, (_, i) => i);
+        for (let i = 0; i < a.length; i++) {
+            const current = [i + 1];
+            for (let j = 0; j < b.length; j++) {
+                current.push(Math.min(previous[j + 1] + 1, current[j] + 1, previous[j] + (a[i] !== b[j] ? 1 : 0)));
+            }
+            previous = current;
+        }
+        return previous[b.length];
+    }
+
+    function checkCapital(answer, spelling) {
+        const input = normalizeText(answer);
+        const correct = normalizeText(spelling);
+        return input === correct || levenshtein(input, correct) <= 2;
+    }
+
+    function nextPlayer(game, player) {
+        const order = game.turn_order;
+        return order[(order.indexOf(player) + 1) % order.length];
+    }
+
+    function previousPlayer(game, player) {
+        const order = game.turn_order;
+        return order[(order.indexOf(player) - 1 + order.length) % order.length];
+    }
+
+    // Rules come from ACTIONS in game.py, shipped in the bundle: phases, board size, then who may act
+    function checkAction(game, action, player = null) {
+        const rule = data.actions[action];
+        if (!rule.phases.includes(game.phase)) return rule.error;
+        const board = game.board.length;
+        if (rule.min_board && board < rule.min_board[0]) return rule.min_board[1];
+        if (rule.max_board && board > rule.max_board[0]) return rule.max_board[1];
+        if (player === null || !rule.actor) return null;
+        if (rule.actor === 'current' && game.current_player !== player) return 'Not your turn';
+        if (rule.actor === 'final' && game.final_player !== player) return 'Not your turn';
+        if (rule.actor === 'opponent' && game.capital_player === player) return 'Not your decision';
+        return null;
+    }
+
+    function isOrdered(game) {
+        for (let i = 0; i < game.board.length - 1; i++) {
+            if (valueOf(game, game.board[i]) > valueOf(game, game.board[i + 1]) + data.tie_tolerance) return false;
+        }
+        return true;
+    }
+
+    function project(game) {
+        const phase = game.phase;
+        const state = {
+            game_id: game.game_id,
+            category: game.category,
+            category_label: data.labels[game.language][game.category],
+            category_set: game.category_set,
+            cards_per_player: game.cards_per_player,
+            mode: 'local',
+            teams: game.teams,
+            turn_order: game.turn_order,
+            current_player: game.current_player,
+            phase,
+            winner: game.winner,
+            bluff_caller: game.bluff_caller,
+            bluff_target: game.bluff_target,
+            bluff_loser: game.bluff_loser,
+            reveal_index: 0,
+            pending_card: game.pending_card === null ? null : cardView(game, game.pending_card),
+            pending_position: game.pending_position,
+            final_player: game.final_player,
+            final_validation_failed: game.final_validation_failed,
+            capital_answer: game.capital_answer,
+            capital_player: game.capital_player,
+            capital_card: game.capital_card === null ? null : cardView(game, game.capital_card),
+            language: game.language,
+            min_gap: null,
+            year: null,
+            rounds: game.rounds,
+            version: game.version,
+            viewer_seat: null,
+            active_clients: 0,
+            other_present: false
+        };
+        if (phase === 'playing' || phase === 'placing') {
+            state.hands = game.hands.map((hand) => hand.map((index) => cardView(game, index)));
+            state.board = game.board.map((index, i) => cardView(game, index, i === 0));
+        } else if (phase === 'bluff_reveal' || phase === 'final_validation') {
+            state.hands = game.hands.map((hand) => hand.map((index) => cardView(game, index)));
+            state.board = game.board.map((index, i) => ({
+                ...fullCard(game, index), revealed: game.revealed[i], is_reference: i === 0
+            }));
+        } else {
+            state.hands = game.hands.map((hand) => hand.map((index) => fullCard(game, index)));
+            state.board = game.board.map((index, i) => ({
+                ...fullCard(game, index), revealed: true, is_reference: i === 0
+            }));
+        }
+        state.message = game.message_parts
+            ? game.message_parts.map((part) => translate(part.key, game.language, part.params)).join(' ')
+            : null;
+        state.allowed_actions = Object.keys(data.actions).filter((action) => checkAction(game, action) === null);
+        return state;
+    }
+
+    function changed(game) {
+        game.version += 1;
+        return project(game);
+    }
+
+    function setPhase(game, phase) {
+        game.phase = phase;
+        if (phase === 'bluff_reveal' || phase === 'final_validation') {
+            game.revealed = game.board.map(() => false);
+        }
+    }
+
+    function finishGame(game, winner, key, params = {}) {
+        setPhase(game, 'game_over');
+        game.winner = winner;
+        setMessage(game, key, { player: winner, ...params });
+    }
+
+    function cardsInHands(game) {
+        return new Set(game.hands.flat());
+    }
+
+    function drawCards(game, player, count) {
+        game.hands[player - 1].push(...sampleExcluding(data.countries.id.length, cardsInHands(game), count));
+    }
+
+    function startNewRound(game, startingPlayer, category) {
+        const [drawn] = sampleExcluding(data.countries.id.length, cardsInHands(game), 1);
+        const reference = drawn === undefined ? game.hands[startingPlayer - 1].shift() : drawn;
+        game.board = [reference];
+        game.category = category || pickCategory(game.category_pool);
+        game.current_player = startingPlayer;
+        setPhase(game, 'playing');
+        game.bluff_caller = null;
+        game.bluff_target = null;
+        appendMessage(game, 'new_category', { category_id: game.category });
+    }
+
+    function newGame(options) {
+        const countries = data.countries;
+        const teams = Math.max(data.min_teams, Math.min(parseInt(options.teams, 10) || data.min_teams, data.max_teams));
+        const size = countries.id.length;
+        const requested = parseInt(options.cards_per_player, 10) || 7;
+        const cards = Math.max(3, Math.min(requested, 10, Math.floor((size - 1) / teams)));
+        const categorySet = data.category_sets[options.category_set] ? options.category_set : null;
+        const pool = categorySet ? data.category_sets[categorySet] : data.categories;
+        const dealt = partialShuffle(size, cards * teams + 1);
+        const game = {
+            game_id: `local-${Math.random().toString(36).slice(2, 10)}`,
+            category: pickCategory(pool),
+            category_pool: pool,
+            category_set: categorySet,
+            cards_per_player: cards,
+            teams,
+            hands: Array.from({ length: teams }, (_, seat) => dealt.slice(seat * cards, (seat + 1) * cards)),
+            turn_order: Array.from({ length: teams }, (_, seat) => seat + 1),
+            board: [dealt[cards * teams]],
+            revealed: [],
+            current_player: 1,
+            phase: 'playing',
+            winner: null,
+            message_parts: null,
+            bluff_caller: null,
+            bluff_target: null,
+            bluff_loser: null,
+            pending_card: null,
+            pending_position: 0,
+            final_player: null,
+            final_validation_failed: null,
+            capital_card: null,
+            capital_answer: null,
+            capital_player: null,
+            language: normalizeLanguage(options.language),
+            rounds: 0,
+            version: 0
+        };
+        games.set(game.game_id, game);
+        return project(game);
+    }
+
+    // Endpoint handlers, mirroring the server actions of the same name
+    const handlers = {
+        'set-language': (game, body) => {
+            game.language = normalizeLanguage(body.language);
+            return changed(game);
+        },
+        'change-category': (game) => {
+            game.category = pickCategory(game.category_pool, game.category);
+            setMessage(game, 'new_category', { category_id: game.category });
+            return changed(game);
+        },
+        'play-card': (game, body) => {
+            const hand = game.hands[body.player - 1];
+            const position = hand.findIndex((index) => data.countries.id[index] === body.card_name);
+            if (position < 0) return { error: 'Card not found' };
+            game.pending_card = hand.splice(position, 1)[0];
+            game.pending_position = game.board.length;
+            setPhase(game, 'placing');
+            setMessage(game, 'choose_position');
+            return changed(game);
+        },
+        'set-position': (game, body) => {
+            const max = game.board.length;
+            if (!Number.isInteger(body.position) || body.position < 0 || body.position > max) {
+                return { error: `Position must be between 0 and ${max}` };
+            }
+            game.pending_position = body.position;
+            return changed(game);
+        },
+        'validate-placement': (game) => {
+            const card = game.pending_card;
+            const player = game.current_player;
+            game.board.splice(game.pending_position, 0, card);
+            game.pending_card = null;
+            game.pending_position = null;
+            if (game.hands[player - 1].length === 0) {
+                game.final_player = player;
+                game.capital_card = card;
+                setPhase(game, 'final_validation');
+                setMessage(game, 'final_validation');
+                return changed(game);
+            }
+            game.current_player = nextPlayer(game, player);
+            setPhase(game, 'playing');
+            game.message_parts = null;
+            return changed(game);
+        },
+        'cancel-placement': (game) => {
+            game.hands[game.current_player - 1].push(game.pending_card);
+            game.pending_card = null;
+            game.pending_position = null;
+            setPhase(game, 'playing');
+            game.message_parts = null;
+            return changed(game);
+        },
+        'call-bluff': (game, body) => {
+            game.bluff_caller = body.player;
+            game.bluff_target = previousPlayer(game, body.player);
+            setPhase(game, 'bluff_reveal');
+            setMessage(game, 'reveal_cards');
+            return changed(game);
+        },
+        'reveal-card': (game, body) => {
+            if (!Number.isInteger(body.index) || body.index < 0 || body.index >= game.board.length) {
+                return { error: 'Invalid card index' };
+            }
+            game.revealed[body.index] = true;
+            if (game.revealed.every(Boolean)) {
+                const ordered = isOrdered(game);
+                game.rounds += 1;
+                if (game.phase === 'bluff_reveal') {
+                    game.bluff_loser = ordered ? game.bluff_caller : game.bluff_target;
+                    setMessage(game, ordered ? 'bluff_correct' : 'bluff_wrong', { player: game.bluff_loser });
+                    setPhase(game, 'bluff_result');
+                } else if (ordered) {
+                    setPhase(game, 'capital_check');
+                    setMessage(game, 'order_correct_capital', {
+                        player: game.final_player, country_id: game.capital_card
+                    });
+                } else {
+                    game.final_validation_failed = true;
+                    setPhase(game, 'final_validation_result');
+                    setMessage(game, 'order_wrong', { player: game.final_player });
+                }
+            }
+            return changed(game);
+        },
+        'continue-after-bluff': (game) => {
+            const loser = game.bluff_loser;
+            const category = pickCategory(game.category_pool);
+            game.board = [];
+            drawCards(game, loser, 2);
+            const winner = game.hands.findIndex((hand) => hand.length === 0);
+            if (winner >= 0) {
+                finishGame(game, winner + 1, 'game_over_win');
+                return changed(game);
+            }
+            startNewRound(game, loser, category);
+            return changed(game);
+        },
+        'continue-after-final-validation': (game) => {
+            const player = game.final_player;
+            const category = pickCategory(game.category_pool);
+            game.board = [];
+            drawCards(game, player, 2);
+            game.final_player = null;
+            game.capital_card = null;
+            game.final_validation_failed = null;
+            startNewRound(game, nextPlayer(game, player), category);
+            return changed(game);
+        },
+        'check-capital': (game, body) => {
+            const card = game.capital_card;
+            const answer = body.answer || '';
+            if (data.countries.spellings[card].some((spelling) => checkCapital(answer, spelling))) {
+                finishGame(game, body.player, 'capital_correct', { capital_of: card });
+            } else {
+                setPhase(game, 'capital_validation');
+                game.capital_answer = answer;
+                game.capital_player = body.player;
+                setMessage(game, 'capital_incorrect', { answer, capital_of: card });
+            }
+            return changed(game);
+        },
+        'capital-decision': (game, body) => {
+            const player = game.capital_player;
+            const card = game.capital_card;
+            if (body.accepted) {
+                finishGame(game, player, 'capital_accepted');
+            } else {
+                game.board = game.board.filter((index) => index !== card);
+                drawCards(game, player, 2);
+                setPhase(game, 'playing');
+                game.current_player = nextPlayer(game, player);
+                setMessage(game, 'capital_refused', { capital_of: card, player });
+            }
+            game.capital_answer = null;
+            game.capital_player = null;
+            game.capital_card = null;
+            return changed(game);
+        }
+    };
+
+    // Endpoint -> action rule checked before the handler runs
+    const GUARDS = {
+        'change-category': 'change_category',
+        'play-card': 'play_card',
+        'set-position': 'set_position',
+        'validate-placement': 'validate_placement',
+        'cancel-placement': 'cancel_placement',
+        'call-bluff': 'call_bluff',
+        'reveal-card': 'reveal_card',
+        'continue-after-bluff': 'continue_after_bluff',
+        'continue-after-final-validation': 'continue_after_final_validation',
+        'check-capital': 'check_capital',
+        'capital-decision': 'capital_decision'
+    };
+
+    function suggestCapitals(query, limit = 8) {
+        const prefix = normalizeText(query);
+        const seen = new Set();
+        const suggestions = [];
+        for (const spellings of data.countries.spellings) {
+            for (const spelling of spellings) {
+                if (suggestions.length >= limit) return suggestions;
+                if (!seen.has(spelling) && normalizeText(spelling).startsWith(prefix)) {
+                    seen.add(spelling);
+                    suggestions.push(spelling);
+                }
+            }
+        }
+        return suggestions;
+    }
+
+    // Answer an API call locally, or return null to let it reach the server
+    function call(endpoint, body) {
+        if (!data) return null;
+        if (endpoint === 'new-game') {
+            const local = body && body.mode === 'local' && !body.year && !body.min_gap && !body.game_id
+                && !body.deck;
+            return local ? newGame(body) : null;
+        }
+        if (endpoint.startsWith('capitals/suggest?')) {
+            // Only for games played here: server games get the server's ranked, typo-tolerant index
+            const params = new URLSearchParams(endpoint.split('?')[1]);
+            if (!games.has(params.get('game_id'))) return null;
+            return { suggestions: suggestCapitals(params.get('q') || '') };
+        }
+        const game = body && games.get(body.game_id);
+        if (!game || !handlers[endpoint]) return null;
+        const action = GUARDS[endpoint];
+        if (action) {
+            const player = typeof body.player === 'number' ? body.player : null;
+            const error = checkAction(game, action, player);
+            if (error) return { error };
+        }
+        return handlers[endpoint](game, body);
+    }
+
+    return { ready, call, games }; // games: read by the parity test against game.py
+})();
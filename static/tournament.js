@@ -0,0 +1,138 @@
+// Tournament organizer page: create a bracket, then follow it with one cached poll
+const POLL_INTERVAL_MS = 3000;
+
+const form = document.getElementById('tournament-form');
+const errorBox = document.getElementById('tournament-error');
+const bracketScreen = document.getElementById('bracket-screen');
+const bracketEl = document.getElementById('bracket');
+
+let tournamentId = new URLSearchParams(window.location.search).get('t');
+let lastVersion = null;
+let seats = {}; // game_id -> seat tokens, only known to the organizer
+
+// The organizer key stays in this browser: the page URL can be shared with viewers
+function organizerKey() {
+    return tournamentId ? localStorage.getItem(`tournamentKey:${tournamentId}`) : null;
+}
+
+function roundTitle(index, count) {
+    const remaining = count - index;
+    if (remaining === 1) return 'Finale';
+    if (remaining === 2) return 'Demi-finales';
+    if (remaining === 3) return 'Quarts de finale';
+    return `Tour ${index + 1}`;
+}
+
+function renderMatch(match) {
+    const el = document.createElement('div');
+    el.className = 'bracket-match';
+    match.teams.forEach((team, index) => {
+        const row = document.createElement('div');
+        row.className = 'bracket-team';
+        if (match.winner && team === match.winner) row.classList.add('winner');
+        row.textContent = team || (match.winner ? '—' : '…');
+        if (match.game_id && match.taken[index]) row.textContent += ' ✓';
+        el.appendChild(row);
+    });
+    if (match.game_id) {
+        const links = document.createElement('div');
+        links.className = 'bracket-links';
+        // Organizer only: one link per team, its seat token keeps the seat the bracket expects
+        const tokens = seats[match.game_id];
+        if (tokens) {
+            match.teams.forEach((team, index) => {
+                const play = document.createElement('a');
+                play.href = `/?game=${encodeURIComponent(match.game_id)}&seat=${encodeURIComponent(tokens[index])}`;
+                play.target = '_blank';
+                play.textContent = `Jouer : ${team}`;
+                links.append(play, ' · ');
+            });
+        }
+        const watch = document.createElement('a');
+        watch.href = `/?watch=${encodeURIComponent(match.game_id)}`;
+        watch.target = '_blank';
+        watch.textContent = 'Regarder';
+        links.append(watch);
+        el.appendChild(links);
+    }
+    return el;
+}
+
+function renderBracket(view) {
+    document.getElementById('bracket-title').textContent = `${view.name} (${view.teams} équipes)`;
+    document.getElementById('bracket-champion').textContent = view.champion ? `🏆 ${view.champion}` : '';
+    bracketEl.replaceChildren(...view.rounds.map((matches, index) => {
+        const column = document.createElement('div');
+        column.className = 'bracket-round';
+        const title = document.createElement('h3');
+        title.textContent = roundTitle(index, view.rounds.length);
+        column.appendChild(title);
+        matches.forEach((match) => column.appendChild(renderMatch(match)));
+        return column;
+    }));
+}
+
+async function loadSeats() {
+    const key = organizerKey();
+    if (!key) return;
+    const response = await fetch(`/api/tournament/seats?tournament_id=${encodeURIComponent(tournamentId)}`, {
+        headers: { 'X-Organizer-Key': key }
+    });
+    if (response.ok) seats = (await response.json()).seats;
+}
+
+async function poll() {
+    if (!tournamentId) return;
+    try {
+        // The browser revalidates with the ETag: an unchanged bracket is a 304
+        const response = await fetch(`/api/tournament?tournament_id=${encodeURIComponent(tournamentId)}`);
+        if (response.ok) {
+            const view = await response.json();
+            if (view.version !== lastVersion) {
+                lastVersion = view.version;
+                await loadSeats();
+                renderBracket(view);
+            }
+            if (view.champion) return;
+        }
+    } catch (e) {
+        // Network hiccup: try again on the next tick
+    }
+    setTimeout(poll, POLL_INTERVAL_MS);
+}
+
+function showBracket() {
+    form.classList.add('hidden');
+    bracketScreen.classList.remove('hidden');
+    poll();
+}
+
+form.addEventListener('submit', async (event) => {
+    event.preventDefault();
+    errorBox.textContent = '';
+    const teams = document.getElementById('tournament-teams').value
+        .split('\n').map((team) => team.trim()).filter(Boolean);
+    const response = await fetch('/api/tournaments', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({
+            name: document.getElementById('tournament-name').value,
+            teams,
+            category_set: document.getElementById('tournament-category-set').value,
+            cards_per_player: parseInt(document.getElementById('tournament-cards').value, 10)
+        })
+    });
+    const view = await response.json();
+    if (!response.ok) {
+        errorBox.textContent = view.error || 'Erreur';
+        return;
+    }
+    tournamentId = view.tournament_id;
+    localStorage.setItem(`tournamentKey:${tournamentId}`, view.organizer_key);
+    const url = new URL(window.location.href);
+    url.searchParams.set('t', tournamentId);
+    window.history.replaceState({}, '', url);
+    showBracket();
+});
+
+if (tournamentId) showBracket();
@@ -0,0 +1,65 @@
+"""Live game aggregates for the operator dashboard.
+
+Counters by phase, mode, language, category set and team count are updated
+from game.py's "transition" events, so reading them never walks the game
+table. A ring buffer keeps the most recent transitions for live debugging.
+"""
+import threading
+import time
+from collections import Counter, deque
+
+FIELDS = ("phase", "mode", "language", "category_set", "teams")
+RECENT_SIZE = 200
+
+games = {}  # Dict of game_id -> tuple of FIELDS values, as last counted
+counters = {field: Counter() for field in FIELDS}
+recent = deque(maxlen=RECENT_SIZE)  # Latest transitions, oldest dropped first
+totals = {"created": 0, "transitions": 0, "finished": 0}
+lock = threading.Lock()  # Transitions also arrive from engine worker threads
+
+
+def on_game_event(event, payload):
+    """game.py listener: move one game between counter buckets."""
+    if event != "transition":
+        return
+    game_id = payload["game_id"]
+    values = tuple(
+        payload.get(field) or ("all" if field == "category_set" else None) for field in FIELDS
+    )
+    with lock:
+        previous = games.get(game_id)
+        if previous is None:
+            totals["created"] += 1
+        else:
+            for field, value in zip(FIELDS, previous):
+                counters[field][value] -= 1
+                if not counters[field][value]:
+                    del counters[field][value]
+        for field, value in zip(FIELDS, values):
+            counters[field][value] += 1
+        games[game_id] = values
+        totals["transitions"] += 1
+        if payload["phase"] == "game_over" and payload.get("previous") != "game_over":
+            totals["finished"] += 1
+        recent.append({
+            "ts": round(time.time(), 3),
+            "game_id": game_id,
+            "from": payload.get("previous"),
+            "to": payload["phase"]
+        })
+
+
+def snapshot(limit=50):
+    """Current counters and the latest transitions, newest first."""
+    limit = max(0, min(limit, RECENT_SIZE))
+    with lock:
+        latest = [recent[-i] for i in range(1, min(limit, len(recent)) + 1)]
+        return {
+            "games": len(games),
+            **{
+                field: {str(value): count for value, count in counter.items()}
+                for field, counter in counters.items()
+            },
+            "totals": dict(totals),
+            "recent": latest
+        }
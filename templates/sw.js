@@ -0,0 +1,61 @@
+// GeoBluff service worker: keeps the app shell, the rules and the country
+// bundle in a cache named after the shell version, so a deploy replaces it.
+const CACHE_NAME = 'geobluff-{{ shell_version }}';
+const PRECACHE = [
+    '/',
+    '/manifest.webmanifest',
+    '{{ asset_url("style.css") }}',
+    '{{ asset_url("app.js") }}',
+    '{{ asset_url("local.js") }}',
+    '{{ asset_url("countries.bundle.json") }}',
+    '{{ asset_url("icon.svg") }}',
+    '/api/rules?lang=fr',
+    '/api/rules?lang=en'
+];
+const PRECACHED_PATHS = new Set(
+    PRECACHE.map((url) => new URL(url, self.location.origin)).map((url) => url.pathname + url.search)
+);
+
+self.addEventListener('install', (event) => {
+    event.waitUntil(
+        caches.open(CACHE_NAME)
+            .then((cache) => cache.addAll(PRECACHE))
+            .then(() => self.skipWaiting())
+    );
+});
+
+self.addEventListener('activate', (event) => {
+    event.waitUntil(
+        caches.keys()
+            .then((names) => Promise.all(
+                names.filter((name) => name.startsWith('geobluff-') && name !== CACHE_NAME)
+                    .map((name) => caches.delete(name))
+            ))
+            .then(() => self.clients.claim())
+    );
+});
+
+self.addEventListener('fetch', (event) => {
+    const request = event.request;
+    if (request.method !== 'GET') return;
+    const url = new URL(request.url);
+    if (url.origin !== self.location.origin) return;
+
+    // The page itself: any ?game= or ?watch= link starts from the cached shell
+    if (request.mode === 'navigate' && url.pathname === '/') {
+        event.respondWith(
+            caches.match('/', { cacheName: CACHE_NAME })
+                .then((cached) => cached || fetch(request))
+        );
+        return;
+    }
+
+    // Shell files, rules and fingerprinted assets: cache first, then network
+    if (PRECACHED_PATHS.has(url.pathname + url.search) || url.pathname.startsWith('/static/')) {
+        event.respondWith(
+            caches.match(request, { cacheName: CACHE_NAME, ignoreVary: true })
+                .then((cached) => cached || fetch(request))
+        );
+    }
+    // Everything else (game API, polls, heartbeats) goes to the network untouched
+});
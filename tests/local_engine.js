@@ -0,0 +1,39 @@
+// Runs static/local.js under node for test_local_parity.py: one JSON command per
+// stdin line, one JSON answer per stdout line. Usage: node local_engine.js bundle.json
+const fs = require('fs');
+const path = require('path');
+const readline = require('readline');
+
+const bundle = JSON.parse(fs.readFileSync(process.argv[2], 'utf8'));
+global.document = { currentScript: { dataset: { bundle: 'bundle.json' } } };
+global.fetch = async () => ({ ok: true, json: async () => bundle });
+const source = fs.readFileSync(path.join(__dirname, '..', 'static', 'local.js'), 'utf8');
+const LocalEngine = new Function(`${source}\nreturn LocalEngine;`)();
+const indexes = new Map(bundle.countries.id.map((id, index) => [id, index]));
+
+// Give a local game the cards and category game.py drew (the two engines draw differently)
+function load(game, state) {
+    game.hands = state.hands.map((hand) => hand.map((card) => indexes.get(card.id)));
+    game.board = state.board.map((card) => indexes.get(card.id));
+    game.category = state.category;
+    game.current_player = state.current_player;
+    return LocalEngine.call('set-language', { game_id: game.game_id, language: game.language });
+}
+
+const commands = {
+    new: ({ state }) => {
+        const { game_id: gameId } = LocalEngine.call('new-game', {
+            mode: 'local', cards_per_player: state.cards_per_player, teams: state.teams, language: state.language
+        });
+        return load(LocalEngine.games.get(gameId), state);
+    },
+    sync: ({ game_id: gameId, state }) => load(LocalEngine.games.get(gameId), state),
+    call: ({ endpoint, body }) => LocalEngine.call(endpoint, body)
+};
+
+LocalEngine.ready.then(() => {
+    readline.createInterface({ input: process.stdin }).on('line', (line) => {
+        const command = JSON.parse(line);
+        process.stdout.write(`${JSON.stringify(commands[command.command](command))}\n`);
+    });
+});
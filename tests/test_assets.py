@@ -0,0 +1,28 @@
+"""Precompressed assets: each encoding is served with its own ETag."""
+from types import SimpleNamespace
+
+import assets
+
+
+def request(**headers):
+    return SimpleNamespace(headers={key.replace("_", "-"): value for key, value in headers.items()})
+
+
+def test_each_encoding_has_its_own_etag():
+    asset = assets.build_asset(b"x" * 1000, "text/plain; charset=utf-8")
+    identity = assets.asset_response(request(), asset, assets.REVALIDATE_CACHE)
+    gzipped = assets.asset_response(request(accept_encoding="gzip"), asset, assets.REVALIDATE_CACHE)
+    assert gzipped.headers["content-encoding"] == "gzip"
+    assert identity.headers["etag"] != gzipped.headers["etag"]
+    assert gzipped.headers["vary"] == "Accept-Encoding"
+
+
+def test_revalidation_only_matches_the_same_encoding():
+    asset = assets.build_asset(b"x" * 1000, "text/plain; charset=utf-8")
+    etag = assets.asset_response(request(accept_encoding="gzip"), asset, assets.REVALIDATE_CACHE).headers["etag"]
+    current = assets.asset_response(
+        request(accept_encoding="gzip", if_none_match=etag), asset, assets.REVALIDATE_CACHE
+    )
+    assert current.status_code == 304
+    other = assets.asset_response(request(if_none_match=etag), asset, assets.REVALIDATE_CACHE)
+    assert other.status_code == 200 and "content-encoding" not in other.headers
@@ -0,0 +1,42 @@
+"""Batched background writers, and the history and ratings writers built on them."""
+import gzip
+import json
+
+import batches
+import history
+import ratings
+
+
+def test_stop_handles_every_queued_item():
+    handled = []
+    writer = batches.create("test-writer", lambda batch, context: handled.append(batch), 100, 3, 0.05)
+    for item in range(7):
+        assert batches.put(writer, item)
+    batches.start(writer)
+    batches.stop(writer)
+    assert [item for batch in handled for item in batch] == list(range(7))
+    assert all(len(batch) <= 3 for batch in handled)
+
+
+def test_full_queue_refuses_items():
+    writer = batches.create("test-writer", lambda batch, context: None, 1, 1, 0.05)
+    assert batches.put(writer, 1)
+    assert not batches.put(writer, 2)
+
+
+def test_history_and_ratings_writers(tmp_path, monkeypatch):
+    monkeypatch.setattr(history, "HISTORY_DIR", tmp_path)
+    monkeypatch.setattr(ratings, "DB_PATH", tmp_path / "ratings.sqlite3")
+    history.start()
+    ratings.start()
+    payload = {"game_id": "g1", "winner": 1, "clients": ["alice", "bob"]}
+    history.on_game_event("game_over", payload)
+    ratings.on_game_event("game_over", payload)
+    history.stop()
+    ratings.stop()
+
+    (path,) = tmp_path.glob("games-*.jsonl.gz")
+    with gzip.open(path) as f:
+        assert json.loads(f.readline())["game_id"] == "g1"
+    assert ratings.rating_of("alice")["rating"] > ratings.INITIAL_RATING
+    assert ratings.leaderboard()[0]["player"] == ratings.player_tag("alice")
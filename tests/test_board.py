@@ -0,0 +1,65 @@
+"""Incremental board trackers (descents, reveal progress) against a full naive recount."""
+import random
+
+import pytest
+
+import game
+
+
+def naive_descents(game_state):
+    values = [game.card_value(game_state, card) for card in game_state["board"]]
+    return sum(left > right + game.TIE_TOLERANCE for left, right in zip(values, values[1:]))
+
+
+def random_edits(rng, game_state, cards, steps):
+    """Random inserts, removals and board resets, checking the count after each one."""
+    for _ in range(steps):
+        board = game_state["board"]
+        roll = rng.random()
+        if roll < 0.55 or not board:
+            game.board_insert(game_state, rng.randint(0, len(board)), rng.choice(cards))
+        elif roll < 0.95:
+            game.board_remove(game_state, rng.randrange(len(board)))
+        else:
+            game.set_board(game_state, rng.sample(cards, rng.randint(0, 6)))
+        assert game_state["descents"] == naive_descents(game_state)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_descents_with_ties(seed):
+    rng = random.Random(seed)
+    # Few distinct values, some within the tie tolerance of each other
+    values = [1.0, 1.0 + game.TIE_TOLERANCE / 2, 2.0, 3.0, 3.0]
+    cards = [{"name": f"c{i}", "population": rng.choice(values)} for i in range(12)]
+    game_state = {"category": "population", "year": None}
+    game.set_board(game_state, [])
+    random_edits(rng, game_state, cards, 300)
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_descents_and_reveals_on_a_game(seed):
+    rng = random.Random(seed)
+    game_id = game.new_game(cards_per_player=3)["game_id"]
+    game_state = game.games[game_id]
+    random_edits(rng, game_state, game.COUNTRIES, 200)
+    if not game_state["board"]:
+        game.board_insert(game_state, 0, rng.choice(game.COUNTRIES))
+    if seed % 2:
+        # Half of the boards end in order, to reach both validation outcomes
+        game.set_board(game_state, sorted(game_state["board"], key=lambda c: game.card_value(game_state, c)))
+        assert game_state["descents"] == 0
+    ordered = naive_descents(game_state) == 0
+
+    game_state["final_player"] = 1
+    game_state["capital_card"] = game_state["board"][-1]
+    game.set_phase(game_state, "final_validation")
+    hidden = set(range(len(game_state["board"])))
+    while len(hidden) > 1:
+        index = rng.randrange(len(game_state["board"]))  # Cards already shown may be clicked again
+        game.reveal_card(game_id, index)
+        hidden.discard(index)
+        assert game_state["phase"] == "final_validation"
+        assert game_state["revealed_count"] == sum(game_state["revealed"])
+        assert game_state["revealed"] == [i not in hidden for i in range(len(game_state["board"]))]
+    game.reveal_card(game_id, hidden.pop())
+    assert game_state["phase"] == ("capital_check" if ordered else "final_validation_result")
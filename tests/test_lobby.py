@@ -0,0 +1,46 @@
+"""Quick matching only pairs rooms of the same size and keeps them open until full."""
+import pytest
+
+import lobby
+
+
+@pytest.fixture(autouse=True)
+def empty_lobby(monkeypatch):
+    monkeypatch.setattr(lobby, "buckets", {})
+    monkeypatch.setattr(lobby, "open_rooms", lobby.OrderedDict())
+    monkeypatch.setattr(lobby, "seated", {})
+    monkeypatch.setattr(lobby, "opened", {})
+
+
+def test_rooms_of_another_size_are_not_matched():
+    lobby.open_room("duel", "all", 7, "en", host="a", teams=2)
+    assert lobby.quick_match("all", 7, "en", client_id="b", teams=4) is None
+    assert lobby.quick_match("all", 7, "en", client_id="b", teams=2) == "duel"
+
+
+def test_room_stays_open_until_every_seat_is_taken():
+    lobby.open_room("table", "all", 7, "en", host="a", teams=3)
+    assert lobby.quick_match("all", 7, "en", client_id="b", teams=3) == "table"
+    assert "table" in lobby.open_rooms
+    # A client already seated is not matched into the same room again
+    assert lobby.quick_match("all", 7, "en", client_id="b", teams=3) is None
+    assert lobby.quick_match("all", 7, "en", client_id="c", teams=3) == "table"
+    assert "table" not in lobby.open_rooms
+
+
+def test_seats_taken_from_the_listing_close_the_room():
+    lobby.open_room("duel", "all", 7, "en", host="a", teams=2)
+    lobby.seat_taken("duel", "a")
+    assert "duel" in lobby.open_rooms
+    lobby.seat_taken("duel", "b")
+    assert lobby.list_rooms(teams=2)["rooms"] == []
+
+
+def test_rooms_nobody_joined_expire():
+    lobby.open_room("lonely", "all", 7, "en", host="a", teams=2)
+    lobby.open_room("table", "all", 7, "en", host="a", teams=3)
+    lobby.seat_taken("table", "b")
+    lobby.expire_rooms(now=lobby.opened["lonely"] + lobby.ROOM_TTL_SECONDS - 1)
+    assert list(lobby.open_rooms) == ["lonely", "table"]
+    lobby.expire_rooms(now=lobby.opened["table"] + lobby.ROOM_TTL_SECONDS + 1)
+    assert list(lobby.open_rooms) == ["table"]
@@ -0,0 +1,124 @@
+"""The browser engine (static/local.js) plays the same game as game.py, move for move.
+
+Seeded games are replayed in both engines through tests/local_engine.js. The
+engines draw cards differently, so after every move that draws, the browser
+game is given game.py's cards and category before the states are compared.
+"""
+import json
+import random
+import shutil
+import subprocess
+from pathlib import Path
+
+import pytest
+
+import game
+
+HARNESS = Path(__file__).parent / "local_engine.js"
+FIELDS = (
+    "category", "teams", "turn_order", "current_player", "phase", "winner", "bluff_caller",
+    "bluff_target", "bluff_loser", "pending_position", "final_player", "final_validation_failed",
+    "capital_answer", "capital_player", "rounds", "message"
+)
+CARD_FIELDS = ("id", "name", "flag", "capital", "value", "revealed", "is_reference")
+DRAWING_ACTIONS = {  # Moves that draw cards or a category: their new_category message differs too
+    "change_category", "continue_after_bluff", "continue_after_final_validation", "capital_decision"
+}
+WEIGHTS = {"change_category": 0.1, "cancel_placement": 0.2, "call_bluff": 0.2}  # Others weigh 1
+
+pytestmark = pytest.mark.skipif(shutil.which("node") is None, reason="node is not installed")
+
+
+@pytest.fixture
+def local_engine(tmp_path):
+    bundle = tmp_path / "bundle.json"
+    bundle.write_text(json.dumps(game.local_bundle()))
+    process = subprocess.Popen(
+        ["node", str(HARNESS), str(bundle)], stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True
+    )
+
+    def send(command, **fields):
+        process.stdin.write(json.dumps({"command": command, **fields}) + "\n")
+        process.stdin.flush()
+        return json.loads(process.stdout.readline())
+
+    yield send
+    process.stdin.close()
+    process.wait(timeout=10)
+
+
+def card_view(card):
+    return card and {field: card[field] for field in CARD_FIELDS if field in card}
+
+
+def comparable(state, drawn=False):
+    view = {field: state.get(field) for field in FIELDS}
+    view["hands"] = [[card_view(card) for card in cards] for cards in state["hands"]]
+    view["board"] = [card_view(card) for card in state["board"]]
+    view["pending_card"] = card_view(state.get("pending_card"))
+    view["capital_card"] = card_view(state.get("capital_card"))
+    view["allowed_actions"] = sorted(state["allowed_actions"])
+    if drawn:
+        del view["message"]
+    return view
+
+
+def next_move(state, rng):
+    """A random legal move, leaning towards the end of the game.
+
+    Returns (action, endpoint body, acting seat, game.py function, its arguments).
+    """
+    actions = state["allowed_actions"]
+    action = rng.choices(actions, [WEIGHTS.get(action, 1) for action in actions])[0]
+    player = state["current_player"]
+    if action == "play_card":
+        card = rng.choice(state["hands"][player - 1])["id"]
+        return action, {"player": player, "card_name": card}, player, game.play_card, (player, card)
+    if action == "set_position":
+        position = rng.randint(0, len(state["board"]))
+        return action, {"position": position}, None, game.set_position, (position,)
+    if action == "call_bluff":
+        return action, {"player": player}, player, game.call_bluff, (player,)
+    if action == "reveal_card":
+        index = next(i for i, card in enumerate(state["board"]) if not card.get("revealed"))
+        return action, {"index": index}, None, game.reveal_card, (index,)
+    if action == "check_capital":
+        player = state["final_player"]
+        answer = rng.choice([state["capital_card"]["capital"], "Atlantis"])
+        return action, {"player": player, "answer": answer}, player, game.check_capital_answer, (
+            player, answer
+        )
+    if action == "capital_decision":
+        accepted = rng.random() < 0.3
+        return action, {"accepted": accepted}, None, game.validate_capital_decision, (accepted,)
+    functions = {
+        "validate_placement": game.validate_placement,
+        "cancel_placement": game.cancel_placement,
+        "change_category": game.change_category,
+        "continue_after_bluff": game.continue_after_bluff,
+        "continue_after_final_validation": game.continue_after_final_validation,
+    }
+    return action, {}, None, functions[action], ()
+
+
+@pytest.mark.parametrize("seed", range(8))
+def test_seeded_games_match(local_engine, seed):
+    random.seed(seed)
+    rng = random.Random(seed)
+    state = game.new_game(cards_per_player=3, teams=2 + seed % 3, language="en")
+    game_id = state["game_id"]
+    local = local_engine("new", state=state)
+    local_id = local["game_id"]
+    assert comparable(local) == comparable(state)
+    for _ in range(1000):
+        if state["phase"] == "game_over":
+            break
+        action, body, player, func, args = next_move(state, rng)
+        state = game.act(game_id, None, action, player, func, *args)
+        endpoint = action.replace("_", "-")
+        local = local_engine("call", endpoint=endpoint, body={"game_id": local_id, **body})
+        drawn = action in DRAWING_ACTIONS
+        if drawn:
+            local = local_engine("sync", game_id=local_id, state=state)
+        assert comparable(local, drawn) == comparable(state, drawn), (seed, action)
+    assert state["phase"] == "game_over"
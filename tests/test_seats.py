@@ -0,0 +1,42 @@
+"""Online rooms only let a client act as its own seat; a shared screen plays every seat."""
+import game
+
+
+def online_game():
+    game_id = game.new_game(cards_per_player=3, mode="online")["game_id"]
+    assert game.join_seat(game_id, "first") == 1
+    assert game.join_seat(game_id, "second") == 2
+    return game_id
+
+
+def first_card(game_id, player):
+    return game.hand(game.games[game_id], player)[0]["name"]
+
+
+def test_client_cannot_play_for_another_seat():
+    game_id = online_game()
+    card = first_card(game_id, 1)
+    result = game.act(game_id, "second", "play_card", 1, game.play_card, 1, card)
+    assert result == {"error": "Not your seat"}
+    result = game.act(game_id, "first", "play_card", 1, game.play_card, 1, card)
+    assert "error" not in result
+
+
+def test_seatless_actions_are_checked_against_the_caller():
+    game_id = online_game()
+    game.act(game_id, "first", "play_card", 1, game.play_card, 1, first_card(game_id, 1))
+    assert game.games[game_id]["phase"] == "placing"
+    result = game.act(game_id, "second", "validate_placement", None, game.validate_placement)
+    assert result == {"error": "Not your turn"}
+    result = game.act(game_id, "watcher", "set_position", None, game.set_position, 0)
+    assert result == {"error": "Not seated in this game"}
+    result = game.act(game_id, "first", "validate_placement", None, game.validate_placement)
+    assert "error" not in result
+
+
+def test_shared_screen_plays_every_seat():
+    game_id = game.new_game(cards_per_player=3)["game_id"]
+    result = game.act(game_id, "screen", "play_card", 1, game.play_card, 1, first_card(game_id, 1))
+    assert "error" not in result
+    result = game.act(game_id, "screen", "validate_placement", None, game.validate_placement)
+    assert "error" not in result
@@ -0,0 +1,48 @@
+"""Bracket games reserve each seat for its team, so results go to the right team."""
+import json
+
+import pytest
+
+import game
+import tournament
+
+
+@pytest.fixture(autouse=True)
+def listening(monkeypatch):
+    """Bracket results and joined seats come from engine events, as in main.py."""
+    monkeypatch.setattr(game, "listeners", [tournament.on_game_event])
+
+
+def test_seats_are_reserved_per_team():
+    view = tournament.create("Cup", ["Lyon", "Nantes"], cards_per_player=3)
+    match = view["rounds"][0][0]
+    tokens = tournament.seat_tokens(view["tournament_id"], view["organizer_key"])[match["game_id"]]
+    assert game.games[match["game_id"]]["seats"] == {1: tokens[0], 2: tokens[1]}
+    # A stranger arriving first does not take a team's seat
+    assert game.join_seat(match["game_id"], "stranger") is None
+    assert game.join_seat(match["game_id"], tokens[1]) == 2
+
+
+def test_public_frame_has_no_seat_tokens():
+    view = tournament.create("Cup", ["Lyon", "Nantes", "Brest"], cards_per_player=3)
+    tokens = tournament.seat_tokens(view["tournament_id"], view["organizer_key"])
+    body, _, _ = tournament.get_frame(view["tournament_id"])
+    assert view["organizer_key"].encode() not in body
+    assert all(token.encode() not in body for seats in tokens.values() for token in seats)
+    assert tournament.seat_tokens(view["tournament_id"], "guess") is None
+    assert tournament.seat_tokens(view["tournament_id"], None) is None
+
+    # The frame only tells which seats were joined
+    game_id, seats = next(iter(tokens.items()))
+    game.join_seat(game_id, seats[0])
+    body, _, _ = tournament.get_frame(view["tournament_id"])
+    match = next(m for r in json.loads(body)["rounds"] for m in r if m["game_id"] == game_id)
+    assert match["taken"] == [True, False]
+
+
+def test_winning_seat_advances_its_team():
+    view = tournament.create("Cup", ["Lyon", "Nantes", "Brest", "Metz"], cards_per_player=3)
+    first = view["rounds"][0][0]
+    tournament.on_game_event("game_over", {"game_id": first["game_id"], "winner": 2})
+    assert view["rounds"][0][0]["winner"] == first["teams"][1]
+    assert view["rounds"][1][0]["teams"][0] == first["teams"][1]
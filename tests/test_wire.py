@@ -0,0 +1,43 @@
+"""Response encoding: cached frames and MessagePack keys."""
+from types import SimpleNamespace
+
+import wire
+
+
+def request(**headers):
+    return SimpleNamespace(headers={key.replace("_", "-"): value for key, value in headers.items()})
+
+
+def test_frame_response_revalidates():
+    frame = (b"{}", wire.JSON_MEDIA_TYPE, '"t1-3-j"')
+    response = wire.frame_response(request(), frame)
+    assert response.status_code == 200 and response.headers["etag"] == '"t1-3-j"'
+    assert wire.frame_response(request(if_none_match='"t1-3-j"'), frame).status_code == 304
+    assert wire.frame_response(request(if_none_match='"t1-2-j"'), frame).status_code == 200
+
+
+def expand_keys(data):
+    """What the client does (expandKeys in app.js)."""
+    long_keys = {short: key for key, short in wire.SHORT_KEYS.items()}
+    if isinstance(data, dict):
+        return {
+            key[len(wire.ESCAPE):] if isinstance(key, str) and key.startswith(wire.ESCAPE)
+            else long_keys.get(key, key): expand_keys(value)
+            for key, value in data.items()
+        }
+    if isinstance(data, list):
+        return [expand_keys(value) for value in data]
+    return data
+
+
+def test_data_keys_never_collide_with_short_keys():
+    data = {
+        "game_id": "g1",
+        "g": "a data key equal to a short key",
+        "labels": {"c": "Custom", "category": "Category", "~x": "escaped", "population": "Population"},
+        "seats": {1: "client"},
+        "board": [{"name": "France", "n": 3}]
+    }
+    short = wire.shorten_keys(data)
+    assert len(short) == len(data) and len(short["labels"]) == 4
+    assert expand_keys(short) == data
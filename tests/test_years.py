@@ -0,0 +1,65 @@
+"""Games with a reference year, on a small countries_years.bin written for the test."""
+import json
+import sys
+from array import array
+
+import pytest
+
+import game
+
+YEAR = 2010
+
+
+def write_years(path, first_year, last_year):
+    """Same layout as generate_countries.write_years_bin: every value known every year."""
+    iso3s = [c["iso3"] for c in game.COUNTRIES]
+    header = json.dumps({
+        "first_year": first_year,
+        "last_year": last_year,
+        "countries": iso3s,
+        "categories": game.CATEGORIES,
+        "byteorder": sys.byteorder
+    }).encode("utf-8")
+    with open(path, "wb") as f:
+        f.write(game.YEARS_MAGIC + len(header).to_bytes(4, "little") + header)
+        for category in game.CATEGORIES:
+            column = [float(c.get(category) or index + 1) for index, c in enumerate(game.COUNTRIES)]
+            f.write(array("d", column * (last_year - first_year + 1)).tobytes())
+
+
+@pytest.fixture
+def years(tmp_path, monkeypatch):
+    path = tmp_path / "countries_years.bin"
+    write_years(path, YEAR - 1, YEAR + 1)
+    monkeypatch.setattr(game, "YEARS_FILE", path)
+    first_year, year_count, width, columns, values = game.load_year_values()
+    monkeypatch.setattr(game, "FIRST_YEAR", first_year)
+    monkeypatch.setattr(game, "YEAR_COUNT", year_count)
+    monkeypatch.setattr(game, "YEAR_WIDTH", width)
+    monkeypatch.setattr(game, "YEAR_COLUMNS", columns)
+    monkeypatch.setattr(game, "YEAR_VALUES", values)
+    monkeypatch.setattr(game, "YEAR_DECKS", {})
+
+
+def test_available_years(years):
+    assert game.available_years() == [YEAR - 1, YEAR, YEAR + 1]
+
+
+def test_year_values_are_mapped(years):
+    table = game.YEAR_VALUES[game.CATEGORIES[0]]
+    assert isinstance(table, memoryview) and table.readonly
+    index = next(i for i, c in enumerate(game.COUNTRIES) if c.get(game.CATEGORIES[0]))
+    assert game.value_at(game.CATEGORIES[0], YEAR, index) == float(game.COUNTRIES[index][game.CATEGORIES[0]])
+
+
+def test_new_game_with_year(years):
+    state = game.new_game(cards_per_player=3, year=YEAR)
+    assert state["year"] == YEAR
+    game_state = game.games[state["game_id"]]
+    card = game_state["board"][0]
+    assert game.card_value(game_state, card) is not None
+
+
+def test_unknown_year_plays_latest_values(years):
+    state = game.new_game(cards_per_player=3, year=YEAR + 5)
+    assert state["year"] is None
@@ -0,0 +1,217 @@
+"""Single-elimination tournaments for GeoBluff.
+
+A bracket is laid out once, with byes for the top seeds. Each round's games
+are dealt together with shards.new_games, and the bracket advances from the
+engine's "game_over" events. Each team of a match gets its own join link
+with a seat token reserved for it, so seat n is always the match's team n
+and a game's winning seat names the team that won. A seat token lets its
+holder play that seat: tokens are only given to the organizer, who holds the
+tournament's key, while the public view only shows which seats were joined.
+The bracket view is a plain structure updated in place on every result and
+serialized once per version, so watching hundreds of games costs one cached
+request, not one poll per game.
+"""
+import secrets
+import threading
+import uuid
+
+import shards
+import wire
+
+MAX_TEAMS = 256
+MAX_NAME_LENGTH = 40
+
+tournaments = {}  # Dict of tournament_id -> tournament
+game_matches = {}  # Dict of game_id -> (tournament_id, round index, match index)
+lock = threading.Lock()  # Results arrive from engine worker threads
+
+
+def seed_order(size):
+    """Bracket positions of seeds 1..size, so the top seeds meet last."""
+    order = [1]
+    while len(order) < size:
+        order = [seed for s in order for seed in (s, 2 * len(order) + 1 - s)]
+    return order
+
+
+def create(name, teams, cards_per_player=7, language=None, category_set=None, min_gap=None,
+           year=None, deck=None):
+    """Lay out the bracket and deal the first round. Teams are listed by seed."""
+    teams = [str(team).strip()[:MAX_NAME_LENGTH] for team in teams if str(team).strip()]
+    if len(teams) < 2:
+        return {"error": "A tournament needs at least 2 teams"}
+    if len(teams) > MAX_TEAMS:
+        return {"error": f"A tournament is limited to {MAX_TEAMS} teams"}
+
+    size = 1 << (len(teams) - 1).bit_length()
+    seeds = seed_order(size)
+    rounds = []
+    matches = size // 2
+    while matches:
+        rounds.append([
+            {"teams": [None, None], "game_id": None, "seats": None, "winner": None}
+            for _ in range(matches)
+        ])
+        matches //= 2
+    for position, seed in enumerate(seeds):
+        if seed <= len(teams):
+            rounds[0][position // 2]["teams"][position % 2] = seed - 1
+
+    tournament = {
+        "id": str(uuid.uuid4())[:8],
+        "key": secrets.token_urlsafe(16),  # Organizer secret, to read the seat tokens
+        "name": str(name or "").strip()[:MAX_NAME_LENGTH] or "GeoBluff",
+        "teams": teams,
+        "settings": {
+            "cards_per_player": cards_per_player,
+            "language": language,
+            "category_set": category_set,
+            "min_gap": min_gap,
+            "year": year,
+            "deck": deck
+        },
+        "rounds": rounds,
+        "champion": None,
+        "version": 0,
+        "frames": {}
+    }
+    tournament["view"] = build_view(tournament)
+
+    with lock:
+        tournaments[tournament["id"]] = tournament
+        # Byes: a seed without an opponent goes through without a game
+        for index, match in enumerate(rounds[0]):
+            present = [team for team in match["teams"] if team is not None]
+            if len(present) == 1:
+                record_winner(tournament, 0, index, present[0], start_next=False)
+        start_round(tournament, 0)
+        return {**tournament["view"], "organizer_key": tournament["key"]}
+
+
+def build_view(tournament):
+    teams = tournament["teams"]
+    return {
+        "tournament_id": tournament["id"],
+        "name": tournament["name"],
+        "teams": len(teams),
+        "champion": None,
+        "version": 0,
+        "rounds": [
+            [
+                {
+                    "teams": [None if team is None else teams[team] for team in match["teams"]],
+                    "game_id": None,
+                    "taken": [False, False],  # Whether each team joined its seat
+                    "winner": None
+                }
+                for match in matches
+            ]
+            for matches in tournament["rounds"]
+        ]
+    }
+
+
+def changed(tournament):
+    tournament["version"] += 1
+    tournament["view"]["version"] = tournament["version"]
+    tournament["frames"] = {}
+
+
+def start_round(tournament, round_index):
+    """Deal every ready game of a round in one batch."""
+    matches = tournament["rounds"][round_index]
+    ready = [
+        index for index, match in enumerate(matches)
+        if None not in match["teams"] and match["game_id"] is None and match["winner"] is None
+    ]
+    if ready:
+        # Seat n of a game is reserved for the match's team n
+        seats = [[uuid.uuid4().hex for _ in matches[index]["teams"]] for index in ready]
+        states = shards.new_games(len(ready), mode="online", seats=seats, **tournament["settings"])
+        views = tournament["view"]["rounds"][round_index]
+        for index, state, tokens in zip(ready, states, seats):
+            matches[index]["game_id"] = state["game_id"]
+            matches[index]["seats"] = tokens
+            views[index]["game_id"] = state["game_id"]
+            game_matches[state["game_id"]] = (tournament["id"], round_index, index)
+        changed(tournament)
+    elif all(match["winner"] is not None for match in matches):
+        advance(tournament, round_index)
+
+
+def record_winner(tournament, round_index, match_index, team, start_next=True):
+    match = tournament["rounds"][round_index][match_index]
+    match["winner"] = team
+    tournament["view"]["rounds"][round_index][match_index]["winner"] = tournament["teams"][team]
+    if round_index + 1 < len(tournament["rounds"]):
+        following = tournament["rounds"][round_index + 1][match_index // 2]
+        following["teams"][match_index % 2] = team
+        view = tournament["view"]["rounds"][round_index + 1][match_index // 2]
+        view["teams"][match_index % 2] = tournament["teams"][team]
+    else:
+        tournament["champion"] = team
+        tournament["view"]["champion"] = tournament["teams"][team]
+    changed(tournament)
+    if start_next and all(m["winner"] is not None for m in tournament["rounds"][round_index]):
+        advance(tournament, round_index)
+
+
+def advance(tournament, round_index):
+    if round_index + 1 < len(tournament["rounds"]):
+        start_round(tournament, round_index + 1)
+
+
+def on_game_event(event, payload):
+    """game.py listener: seats joined in bracket games, and winners sent to the next round."""
+    if event == "seat_joined":
+        with lock:
+            location = game_matches.get(payload["game_id"])
+            tournament = location and tournaments.get(location[0])
+            if tournament is not None:
+                view = tournament["view"]["rounds"][location[1]][location[2]]
+                view["taken"][payload["player"] - 1] = True
+                changed(tournament)
+        return
+    if event != "game_over":
+        return
+    with lock:
+        location = game_matches.pop(payload["game_id"], None)
+        if location is None:
+            return
+        tournament_id, round_index, match_index = location
+        tournament = tournaments.get(tournament_id)
+        if tournament is None:
+            return
+        match = tournament["rounds"][round_index][match_index]
+        if match["winner"] is None:
+            # The winning seat was reserved for the team at the same position
+            team = match["teams"][payload["winner"] - 1]
+            record_winner(tournament, round_index, match_index, team)
+
+
+def seat_tokens(tournament_id, key):
+    """Seat tokens of every dealt game (game_id -> one per team), for the organizer only."""
+    with lock:
+        tournament = tournaments.get(tournament_id)
+        if tournament is None or not key or not secrets.compare_digest(key, tournament["key"]):
+            return None
+        return {
+            match["game_id"]: match["seats"]
+            for matches in tournament["rounds"] for match in matches if match["game_id"]
+        }
+
+
+def get_frame(tournament_id, use_msgpack=False):
+    """Return (body, media type, etag) of the bracket view, or None if unknown."""
+    with lock:
+        tournament = tournaments.get(tournament_id)
+        if tournament is None:
+            return None
+        body = tournament["frames"].get(use_msgpack)
+        if body is None:
+            body = wire.encode(tournament["view"], use_msgpack)
+            tournament["frames"][use_msgpack] = body
+        version = tournament["version"]
+    content, media_type = body
+    suffix = "m" if use_msgpack else "j"
+    return content, media_type, f'"t{tournament_id}-{version}-{suffix}"'
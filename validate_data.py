@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""Validate GeoBluff country data before it reaches a game.
+
+Usage:
+    python validate_data.py [--countries countries.json] [--config categories_config.json]
+
+Loads every enabled category into a column of floats (NaN when missing) and
+reports coverage, exact and near ties, outliers and the playable pool of each
+category set. Exits with status 1 when the data would break a game.
+"""
+import argparse
+import json
+import math
+import sys
+import time
+from array import array
+from pathlib import Path
+
+BASE_DIR = Path(__file__).parent
+REQUIRED_FIELDS = ("name", "capital", "flag")
+TIE_TOLERANCE = 0.0001  # Same tolerance as the order check in game.py
+NEAR_TIE = 0.001  # Relative gap under which two values are hard to tell apart
+OUTLIER_MADS = 8  # Distance from the median, in median absolute deviations
+MIN_POOL = 21  # Two hands of the largest size plus the reference card
+MAX_EXAMPLES = 3
+
+
+def load_json(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_columns(countries, categories):
+    """One array('d') per category, NaN for a missing value; also the non-numeric entries."""
+    columns = {}
+    invalid = []
+    for category in categories:
+        column = array("d", [math.nan]) * len(countries)
+        for i, country in enumerate(countries):
+            value = country.get(category)
+            if value is None:
+                continue
+            if isinstance(value, bool) or not isinstance(value, (int, float)) or math.isnan(value):
+                invalid.append((category, country.get("name"), value))
+                continue
+            column[i] = value
+        columns[category] = column
+    return columns, invalid
+
+
+def tie_clusters(values, near_tie):
+    """Runs of sorted values whose neighbours are closer than the near-tie gap."""
+    clusters = []
+    run = [values[0]] if values else []
+    for previous, value in zip(values, values[1:]):
+        if value - previous <= max(abs(previous) * near_tie, TIE_TOLERANCE):
+            run.append(value)
+        else:
+            if len(run) > 1:
+                clusters.append(run)
+            run = [value]
+    if len(run) > 1:
+        clusters.append(run)
+    return clusters
+
+
+def outliers(values, sorted_values):
+    """Indexes of values far from the median (robust z-score, on a log scale when all positive)."""
+    if len(sorted_values) < 3:
+        return []
+    # Sizes and amounts span orders of magnitude: China is big, not wrong
+    scale = math.log10 if sorted_values[0] > 0 else float
+    scaled = [scale(v) for v in sorted_values]
+    median = scaled[len(scaled) // 2]
+    deviations = sorted(abs(v - median) for v in scaled)
+    mad = deviations[len(deviations) // 2]
+    if mad == 0:
+        return []
+    return [
+        i for i, v in enumerate(values)
+        if not math.isnan(v) and abs(scale(v) - median) > OUTLIER_MADS * mad
+    ]
+
+
+def validate(countries_path, config_path, near_tie=NEAR_TIE):
+    """Return (report lines, errors, warnings)."""
+    report, errors, warnings = [], [], []
+
+    try:
+        countries = load_json(countries_path)
+    except (OSError, ValueError) as e:
+        return report, [f"Cannot load {countries_path}: {e}"], warnings
+    if not isinstance(countries, list) or not countries:
+        return report, [f"{countries_path} holds no countries"], warnings
+
+    config = {}
+    if config_path and Path(config_path).exists():
+        try:
+            config = load_json(config_path)
+        except (OSError, ValueError) as e:
+            return report, [f"Cannot load {config_path}: {e}"], warnings
+    configured = config.get("categories") or []
+    enabled = config.get("enabled_categories") or [c["id"] for c in configured if "id" in c]
+
+    # The engine keys countries by name and shows name, capital and flag on every card
+    names = {}
+    for i, country in enumerate(countries):
+        missing = [field for field in REQUIRED_FIELDS if not country.get(field)]
+        if missing:
+            errors.append(f"Country #{i} ({country.get('name')}) misses {', '.join(missing)}")
+        if country.get("name") in names:
+            errors.append(f"Duplicate country name: {country.get('name')}")
+        names[country.get("name")] = i
+
+    # Categories absent from the first country are dropped by game.py, not played
+    available = set(countries[0].keys())
+    dropped = [c for c in enabled if c not in available]
+    if dropped:
+        warnings.append(f"Enabled categories missing from the data (not played): {', '.join(dropped)}")
+    categories = [c for c in enabled if c in available]
+    if not categories:
+        errors.append("No playable category")
+
+    columns, invalid = load_columns(countries, categories)
+    for category, name, value in invalid[:MAX_EXAMPLES * 4]:
+        errors.append(f"{category}: non-numeric value {value!r} for {name}")
+
+    report.append(f"{len(countries)} countries, {len(categories)} categories")
+    report.append(f"{'category':<28}{'coverage':>9}{'ties':>6}{'near':>6}{'biggest':>9}{'outliers':>10}")
+    for category in categories:
+        column = columns[category]
+        present = [v for v in column if not math.isnan(v)]
+        missing = [countries[i].get("name") for i, v in enumerate(column) if math.isnan(v)]
+        if missing:
+            # Every dealt card is compared in check_bluff_result: a gap crashes a game
+            examples = ", ".join(map(str, missing[:MAX_EXAMPLES]))
+            errors.append(f"{category}: {len(missing)} countries without a value ({examples})")
+        sorted_values = sorted(present)
+        exact = tie_clusters(sorted_values, 0)
+        near = tie_clusters(sorted_values, near_tie)
+        biggest = max((len(cluster) for cluster in near), default=0)
+        far = outliers(column, sorted_values)
+        coverage = f"{len(present)}/{len(column)}"
+        report.append(
+            f"{category:<28}{coverage:>9}{len(exact):>6}{len(near):>6}{biggest:>9}{len(far):>10}"
+        )
+        if far:
+            examples = ", ".join(f"{countries[i].get('name')}={column[i]:g}" for i in far[:MAX_EXAMPLES])
+            warnings.append(f"{category}: {len(far)} outliers ({examples})")
+
+    category_sets = config.get("category_sets") or []
+    if category_sets:
+        report.append("")
+        report.append(f"{'category set':<28}{'categories':>11}{'pool':>6}")
+    for category_set in category_sets:
+        set_id = category_set.get("id")
+        members = category_set.get("categories", [])
+        unknown = [c for c in members if c not in columns]
+        if unknown:
+            warnings.append(f"Category set {set_id}: unknown or disabled categories {', '.join(unknown)}")
+        playable = [c for c in members if c in columns]
+        pool = sum(
+            1 for i in range(len(countries))
+            if all(not math.isnan(columns[c][i]) for c in playable)
+        ) if playable else 0
+        report.append(f"{str(set_id):<28}{len(playable):>11}{pool:>6}")
+        if not playable:
+            warnings.append(f"Category set {set_id} has no playable category and is hidden")
+        elif pool < MIN_POOL:
+            errors.append(f"Category set {set_id}: only {pool} playable countries (needs {MIN_POOL})")
+
+    return report, errors, warnings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Validate GeoBluff country data.")
+    parser.add_argument("--countries", default=str(BASE_DIR / "countries.json"))
+    parser.add_argument("--config", default=str(BASE_DIR / "categories_config.json"))
+    parser.add_argument("--near-tie", type=float, default=NEAR_TIE, help="relative gap counted as a near tie")
+    parser.add_argument("--quiet", action="store_true", help="only print problems")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    report, errors, warnings = validate(args.countries, args.config, args.near_tie)
+    elapsed = time.perf_counter() - start
+
+    if not args.quiet:
+        print("\n".join(report))
+        print()
+    for warning in warnings:
+        print(f"WARNING {warning}")
+    for error in errors:
+        print(f"ERROR {error}")
+    print(f"{len(errors)} errors, {len(warnings)} warnings ({elapsed * 1000:.0f} ms)")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,124 @@
+"""Response encoding for GeoBluff: fast JSON and optional MessagePack."""
+import json
+
+from fastapi import Response
+
+import assets
+
+try:
+    import orjson
+except ImportError:  # Fall back to the stdlib encoder
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # MessagePack is only served when installed
+    msgpack = None
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPES = ("application/x-msgpack", "application/msgpack")
+
+# Short field keys used by the MessagePack representation (unknown keys pass through)
+SHORT_KEYS = {
+    "game_id": "g",
+    "category": "c",
+    "category_label": "cl",
+    "category_set": "cs",
+    "cards_per_player": "cn",
+    "mode": "mo",
+    "matched": "mt",
+    "teams": "tn",
+    "hands": "h",
+    "turn_order": "to",
+    "viewer_seat": "vw",
+    "allowed_actions": "aa",
+    "seat": "st",
+    "board": "b",
+    "current_player": "p",
+    "phase": "ph",
+    "winner": "w",
+    "bluff_caller": "bc",
+    "bluff_loser": "bl",
+    "bluff_target": "bt",
+    "reveal_index": "ri",
+    "pending_card": "pc",
+    "pending_position": "pp",
+    "language": "l",
+    "min_gap": "mg",
+    "year": "yr",
+    "deck": "dk",
+    "message": "m",
+    "active_clients": "ac",
+    "other_present": "op",
+    "version": "vs",
+    "spectator": "sp",
+    "final_player": "fp",
+    "final_validation_failed": "ff",
+    "capital_card": "cc",
+    "capital_answer": "ca",
+    "capital_player": "cp",
+    "id": "i",
+    "name": "n",
+    "flag": "f",
+    "capital": "k",
+    "value": "v",
+    "is_reference": "r",
+    "revealed": "rv",
+    "hidden": "x",
+    "suggestions": "su",
+    "error": "e"
+}
+# Other keys that read like a short key (or start with ESCAPE) get ESCAPE in front,
+# so data keys such as category ids never expand into, or clobber, a field
+ESCAPE = "~"
+SHORT_VALUES = frozenset(SHORT_KEYS.values())
+
+
+def dumps_json(data):
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def shorten_key(key):
+    short = SHORT_KEYS.get(key)
+    if short is not None:
+        return short
+    if isinstance(key, str) and (key in SHORT_VALUES or key.startswith(ESCAPE)):
+        return ESCAPE + key
+    return key
+
+
+def shorten_keys(data):
+    if isinstance(data, dict):
+        return {shorten_key(key): shorten_keys(value) for key, value in data.items()}
+    if isinstance(data, list):
+        return [shorten_keys(value) for value in data]
+    return data
+
+
+def wants_msgpack(request):
+    accept = request.headers.get("accept", "")
+    return msgpack is not None and any(media in accept for media in MSGPACK_MEDIA_TYPES)
+
+
+def encode(data, use_msgpack=False):
+    """Encode a response body, returning (bytes, media type)."""
+    if use_msgpack:
+        return msgpack.packb(shorten_keys(data), use_bin_type=True), MSGPACK_MEDIA_TYPES[0]
+    return dumps_json(data), JSON_MEDIA_TYPE
+
+
+def encode_response(request, data, status_code=200):
+    """Encode straight to bytes, bypassing FastAPI's generic encoder."""
+    body, media_type = encode(data, wants_msgpack(request))
+    return Response(body, status_code=status_code, media_type=media_type, headers={"Vary": "Accept"})
+
+
+def frame_response(request, frame):
+    """Serve a cached (body, media type, etag) frame, or 304 when the client holds it."""
+    body, media_type, etag = frame
+    headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept"}
+    if assets.etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type=media_type, headers=headers)